@@ -3,6 +3,16 @@ from typing_extensions import Annotated
 
 from focus_converter.data_loaders.data_exporter import ExportDataFormats
 from focus_converter.data_loaders.data_loader import DataFormats, ParquetDataFormat
+from focus_converter.data_loaders.partitioning import parse_billing_period
+
+
+def __validate_billing_period__(billing_period):
+    try:
+        parse_billing_period(billing_period)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    return billing_period
+
 
 PROVIDER_OPTION = Annotated[
     str,
@@ -23,7 +33,11 @@ EXPORT_DATA_FORMAT = Annotated[
 ]
 
 DATA_PATH = Annotated[
-    str, typer.Option(help="Source data path", rich_help_panel="Source Data")
+    str,
+    typer.Option(
+        help="Source data path, csv data can also be a directory or a glob pattern",
+        rich_help_panel="Source Data",
+    ),
 ]
 
 DATA_FORMAT_OPTION = Annotated[
@@ -35,6 +49,40 @@ PARQUET_DATA_FORMAT_OPTION = Annotated[
     typer.Option(help="Parquet data format", rich_help_panel="Source Data"),
 ]
 
+DELTA_TABLE_VERSION_OPTION = Annotated[
+    int,
+    typer.Option(
+        help="Delta table version to read, defaults to latest",
+        rich_help_panel="Source Data",
+    ),
+]
+
+BILLING_PERIOD_FROM_OPTION = Annotated[
+    str,
+    typer.Option(
+        help="First billing period (YYYY-MM) to convert, used to prune partitioned inputs",
+        rich_help_panel="Source Data",
+        callback=__validate_billing_period__,
+    ),
+]
+
+BILLING_PERIOD_TO_OPTION = Annotated[
+    str,
+    typer.Option(
+        help="Last billing period (YYYY-MM) to convert, used to prune partitioned inputs",
+        rich_help_panel="Source Data",
+        callback=__validate_billing_period__,
+    ),
+]
+
+DATA_CACHE_DIR_OPTION = Annotated[
+    str,
+    typer.Option(
+        help="Directory to cache decoded source data in, re-runs on unchanged source data read from the cache",
+        rich_help_panel="Source Data",
+    ),
+]
+
 PLAN_GRAPH_PATH = Annotated[
     str,
     typer.Option(
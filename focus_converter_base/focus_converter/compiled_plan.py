@@ -0,0 +1,462 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import networkx as nx
+import polars as pl
+
+from focus_converter.conversion_functions.deferred_column_functions import (
+    DeferredColumnFunctions,
+)
+from focus_converter.conversion_functions.lookup_function import LookupFunction
+from focus_converter.conversion_functions.sql_compiler import SQLCompiler
+from focus_converter.conversion_functions.sql_functions import (
+    DEFAULT_SQL_TABLE_NAME,
+    SQLFunctions,
+)
+from focus_converter.conversion_functions.validations import ColumnValidator
+from focus_converter.distinct_values import (
+    DISTINCT_RATIO_THRESHOLD,
+    DistinctValueLayer,
+    low_cardinality_columns,
+)
+from focus_converter.models.focus_column_names import (
+    FocusColumnNames,
+    get_dtype_for_focus_column_name,
+)
+
+
+class CompiledConversionPlan:
+    """
+    Conversion plan of a provider compiled into expressions and sql queries when the plan is
+    built. Applying it doesn't change the compiled plans, so a single plan can be shared across
+    threads or pickled and sent to worker processes.
+
+    Steps that depend on the batch schema are compiled for the first batch with a schema and
+    reused for all batches with the same schema. Compiled steps and datetime formats inferred
+    from source batches are the only run state of a plan, they are compiled under a lock and are
+    not pickled, so each worker process compiles its own.
+    """
+
+    def __init__(
+        self,
+        collected_columns: Iterable[str],
+        column_exprs: Iterable[pl.Expr],
+        sql_queries: Iterable[str],
+        lookup_reference_args: Iterable[Dict[str, Any]],
+        temporary_columns: Iterable[str],
+        source_column_names: Iterable[str],
+        deferred_column_plans: DeferredColumnFunctions,
+        column_prefix: Optional[str] = None,
+        distinct_ratio_threshold: Optional[float] = DISTINCT_RATIO_THRESHOLD,
+    ):
+        self.__collected_columns__ = tuple(dict.fromkeys(collected_columns))
+        self.__column_exprs__ = tuple(column_exprs)
+        self.__sql_queries__ = tuple(sql_queries)
+        self.__lookup_reference_args__ = tuple(lookup_reference_args)
+
+        # lookups against preloaded reference datasets are applied as expressions after all
+        # column expressions, instead of a join with every batch
+        lookup_exprs = [
+            LookupFunction.lookup_expression(lookup_args)
+            for lookup_args in self.__lookup_reference_args__
+        ]
+
+        # column expressions grouped into layers of independent expressions. Subexpressions
+        # repeated across plans of a layer, e.g. the split of a resource id read by more than one
+        # plan, are computed once per batch by the common subexpression elimination of polars,
+        # which applies within a single with_columns.
+        self.__column_expr_layers__ = self.__expression_layers__(
+            list(self.__column_exprs__) + lookup_exprs
+        )
+
+        # sql queries compiled into layers of column expressions, consecutive compiled queries
+        # are layered together. queries that can't be compiled are run in a sql context.
+        sql_steps: List[Union[str, List[pl.Expr]]] = []
+        for sql_query in self.__sql_queries__:
+            sql_column_exprs = SQLCompiler.compile_query(sql_query)
+            if sql_column_exprs is None:
+                sql_steps.append(sql_query)
+            elif sql_steps and not isinstance(sql_steps[-1], str):
+                sql_steps[-1] += sql_column_exprs
+            else:
+                sql_steps.append(sql_column_exprs)
+
+        # process stages applied in order, a stage is a layer of column expressions or a sql query
+        # run in a sql context
+        self.__process_stages__: Tuple[Union[List[pl.Expr], str], ...] = tuple(
+            self.__column_expr_layers__
+        ) + tuple(
+            layer
+            for step in sql_steps
+            for layer in (
+                [step] if isinstance(step, str) else self.__expression_layers__(step)
+            )
+        )
+        self.__temporary_columns__ = tuple(temporary_columns)
+
+        # plan expressions are row wise, expressions reading a single string column can be
+        # evaluated on distinct values of that column. None disables distinct value evaluation.
+        self.__distinct_ratio_threshold__ = distinct_ratio_threshold
+        self.__source_column_names__ = tuple(source_column_names)
+        self.__deferred_column_plans__ = deferred_column_plans
+        self.__column_prefix__ = column_prefix
+
+        self.__init_run_state__()
+
+    def __init_run_state__(self):
+        # steps compiled for a batch schema, keyed by the schema fingerprint, and formats of
+        # datetime columns inferred from source batches. Written only while holding the lock.
+        self.__compile_lock__ = threading.Lock()
+        self.__compiled_prepare_steps__: Dict[Tuple, List[List[pl.Expr]]] = {}
+        self.__compiled_process_steps__: Dict[
+            Tuple,
+            Tuple[
+                List[List[pl.Expr]],
+                List[List[str]],
+                List[Union[DistinctValueLayer, str]],
+            ],
+        ] = {}
+        self.__datetime_formats__: Dict[str, Optional[str]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            name: value
+            for name, value in self.__dict__.items()
+            if name
+            not in (
+                "__compile_lock__",
+                "__compiled_prepare_steps__",
+                "__compiled_process_steps__",
+                "__datetime_formats__",
+            )
+        }
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.__init_run_state__()
+
+    @property
+    def collected_columns(self) -> Tuple[str, ...]:
+        return self.__collected_columns__
+
+    @property
+    def column_exprs(self) -> Tuple[pl.Expr, ...]:
+        return self.__column_exprs__
+
+    @property
+    def sql_queries(self) -> Tuple[str, ...]:
+        return self.__sql_queries__
+
+    @property
+    def lookup_reference_args(self) -> Tuple[Dict[str, Any], ...]:
+        return self.__lookup_reference_args__
+
+    @property
+    def source_column_names(self) -> Tuple[str, ...]:
+        return self.__source_column_names__
+
+    @property
+    def column_prefix(self) -> Optional[str]:
+        return self.__column_prefix__
+
+    @property
+    def deferred_column_plans(self) -> DeferredColumnFunctions:
+        return self.__deferred_column_plans__
+
+    @staticmethod
+    def __schema_fingerprint__(lf: pl.LazyFrame) -> Tuple:
+        return tuple(lf.schema.items())
+
+    @staticmethod
+    def __apply_compiled_steps__(
+        lf: pl.LazyFrame, steps: List[List[pl.Expr]]
+    ) -> pl.LazyFrame:
+        for column_exprs in steps:
+            lf = lf.with_columns(column_exprs)
+        return lf
+
+    @staticmethod
+    def __expression_layers__(column_exprs: Iterable[pl.Expr]) -> List[List[pl.Expr]]:
+        # groups expressions applied in order into topological layers of a dependency graph,
+        # expressions in a layer don't depend on each other and are evaluated in parallel by a
+        # single with_columns. An expression depends on earlier expressions that write a column
+        # it reads, write the same column or read the column it writes.
+        column_exprs = list(column_exprs)
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(range(len(column_exprs)))
+        column_writes, column_reads = {}, {}
+        for index, column_expr in enumerate(column_exprs):
+            output_name = column_expr.meta.output_name()
+            root_names = column_expr.meta.root_names()
+
+            for root_name in root_names:
+                if root_name in column_writes:
+                    graph.add_edge(column_writes[root_name], index)
+            if output_name in column_writes:
+                graph.add_edge(column_writes[output_name], index)
+            for reader_index in column_reads.get(output_name, []):
+                graph.add_edge(reader_index, index)
+
+            column_writes[output_name] = index
+            for root_name in root_names:
+                column_reads.setdefault(root_name, []).append(index)
+
+        return [
+            [column_exprs[index] for index in sorted(generation)]
+            for generation in nx.topological_generations(graph)
+        ]
+
+    @staticmethod
+    def __apply_lookup_reference_plans__(
+        lf: pl.LazyFrame, lookup_args: Iterable[Dict[str, Any]]
+    ) -> pl.LazyFrame:
+        for lookup_arg in lookup_args:
+            lf = lf.with_columns(LookupFunction.lookup_expression(lookup_arg))
+        return lf
+
+    @staticmethod
+    def __stage_columns__(
+        stage: Union[List[pl.Expr], str]
+    ) -> Tuple[Optional[Set[str]], Set[str]]:
+        # columns read and written by a process stage, read columns are None when they can't be
+        # determined and the stage is assumed to read every column
+        if isinstance(stage, str):
+            query_columns = SQLCompiler.query_column_names(stage)
+            return query_columns if query_columns is not None else (None, set())
+
+        read_columns = set()
+        for column_expr in stage:
+            if column_expr.meta.has_multiple_outputs():
+                return None, set()
+            read_columns.update(column_expr.meta.root_names())
+        return read_columns, {column_expr.meta.output_name() for column_expr in stage}
+
+    def __drop_columns_after_stages__(self, drop_columns: List[str]) -> List[List[str]]:
+        # columns dropped after their last use, index 0 holds columns dropped before the first
+        # stage and index i columns dropped right after the stage i - 1
+        last_uses = dict.fromkeys(drop_columns, 0)
+        for stage_index, stage in enumerate(self.__process_stages__, start=1):
+            read_columns, write_columns = self.__stage_columns__(stage)
+            for column_name in drop_columns:
+                if (
+                    read_columns is None
+                    or column_name in read_columns
+                    or column_name in write_columns
+                ):
+                    last_uses[column_name] = stage_index
+
+        drop_columns_after_stages = [
+            [] for _ in range(len(self.__process_stages__) + 1)
+        ]
+        for column_name, last_use in last_uses.items():
+            drop_columns_after_stages[last_use].append(column_name)
+        return drop_columns_after_stages
+
+    def __re_mapped_column_names__(self, column_names: Iterable[str]) -> List[str]:
+        # source column names for prefixed source columns, re-mapped so that plans can be applied
+        if self.__column_prefix__ is None:
+            return []
+
+        return [
+            column_name[len(self.__column_prefix__) :]
+            for column_name in column_names
+            if column_name.startswith(self.__column_prefix__)
+        ]
+
+    def __compile_prepare_steps__(self, lf: pl.LazyFrame) -> List[List[pl.Expr]]:
+        # compiles plans that only depend on source data for a source schema, batch is sampled
+        # to infer datetime formats
+        schema = dict(lf.schema)
+
+        steps = []
+        if self.__column_prefix__ is not None:
+            re_map_exprs = []
+            for column_name, dtype in list(schema.items()):
+                if column_name.startswith(self.__column_prefix__):
+                    orig_column_name = column_name[len(self.__column_prefix__) :]
+                    re_map_exprs.append(pl.col(column_name).alias(orig_column_name))
+                    schema[orig_column_name] = dtype
+            steps.append(re_map_exprs)
+
+        # apply deferred column plans, dtype expressions are applied one at a time
+        # as a column can be set by more than one plan
+        steps.append(self.__deferred_column_plans__.missing_column_exprs(schema=schema))
+        steps += [
+            [column_expr]
+            for column_expr in self.__deferred_column_plans__.dtype_exprs(
+                schema=schema,
+                lf=self.__apply_compiled_steps__(lf=lf, steps=steps),
+                datetime_formats=self.__datetime_formats__,
+            )
+        ]
+        return steps
+
+    def __compile_process_stages__(
+        self, lf: pl.LazyFrame, drop_columns_after_stages: List[List[str]]
+    ) -> List[Union[DistinctValueLayer, str]]:
+        # process stages for a batch schema, layers are grouped by the string columns their
+        # expressions read, for columns of the batch not written by an earlier stage. Schema of each stage is
+        # resolved on an empty frame.
+        stages = []
+        schema_lf = pl.LazyFrame(schema=lf.schema)
+        batch_column_names = set(lf.columns)
+        for stage_index, stage in enumerate(self.__process_stages__):
+            if drop_columns_after_stages[stage_index]:
+                schema_lf = schema_lf.drop(drop_columns_after_stages[stage_index])
+
+            if isinstance(stage, str):
+                schema_lf = SQLFunctions.create_sql_context(lf=schema_lf).execute(
+                    stage, eager=False
+                )
+            else:
+                schema = schema_lf.schema
+                schema_lf = schema_lf.with_columns(stage)
+                stage = DistinctValueLayer.compile(
+                    column_exprs=stage,
+                    schema=schema,
+                    column_names=(
+                        batch_column_names
+                        if self.__distinct_ratio_threshold__ is not None
+                        else ()
+                    ),
+                )
+            stages.append(stage)
+
+            read_columns, write_columns = self.__stage_columns__(
+                self.__process_stages__[stage_index]
+            )
+            if read_columns is None:
+                # columns written by the stage can't be determined
+                batch_column_names = set()
+            else:
+                batch_column_names -= write_columns
+        return stages
+
+    def __compile_process_steps__(
+        self, lf: pl.LazyFrame
+    ) -> Tuple[
+        List[List[pl.Expr]], List[List[str]], List[Union[DistinctValueLayer, str]]
+    ]:
+        # validate all source columns exist in the lazy frame
+        ColumnValidator.validate_source_columns(
+            source_columns=self.__source_column_names__, column_names=lf.columns
+        )
+
+        # add missing focus columns with null values to produce a valid parquet file
+        missing_focus_column_exprs = [
+            pl.lit(None)
+            .alias(focus_column_name.value)
+            .cast(get_dtype_for_focus_column_name(focus_column_name))
+            for focus_column_name in FocusColumnNames
+            if focus_column_name.value not in self.__collected_columns__
+            and focus_column_name != FocusColumnNames.PLACE_HOLDER
+        ]
+
+        # temporary plan columns and re-mapped source columns are dropped from the final dataset,
+        # each one right after the last stage using it so later stages carry fewer columns
+        drop_columns = list(self.__temporary_columns__) + [
+            column_name
+            for column_name in self.__re_mapped_column_names__(lf.columns)
+            if column_name not in self.__temporary_columns__
+        ]
+        drop_columns_after_stages = self.__drop_columns_after_stages__(
+            drop_columns=drop_columns
+        )
+        return (
+            [missing_focus_column_exprs],
+            drop_columns_after_stages,
+            self.__compile_process_stages__(
+                lf=lf.with_columns(missing_focus_column_exprs),
+                drop_columns_after_stages=drop_columns_after_stages,
+            ),
+        )
+
+    def prepare(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """
+        Applies plans that only depend on source data, results of this step can be cached.
+
+        :param lf: pl.LazyFrame, source batch
+        :return: pl.LazyFrame, prepared batch
+        """
+
+        schema_fingerprint = self.__schema_fingerprint__(lf)
+
+        steps = self.__compiled_prepare_steps__.get(schema_fingerprint)
+        if steps is None:
+            with self.__compile_lock__:
+                steps = self.__compiled_prepare_steps__.get(schema_fingerprint)
+                if steps is None:
+                    steps = self.__compiled_prepare_steps__[
+                        schema_fingerprint
+                    ] = self.__compile_prepare_steps__(lf=lf)
+
+        return self.__apply_compiled_steps__(lf=lf, steps=steps)
+
+    def process(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """
+        Applies conversion plans to a prepared batch.
+
+        :param lf: pl.LazyFrame, batch returned by prepare
+        :return: pl.LazyFrame, converted batch
+        """
+
+        schema_fingerprint = self.__schema_fingerprint__(lf)
+
+        compiled_steps = self.__compiled_process_steps__.get(schema_fingerprint)
+        if compiled_steps is None:
+            with self.__compile_lock__:
+                compiled_steps = self.__compiled_process_steps__.get(schema_fingerprint)
+                if compiled_steps is None:
+                    compiled_steps = self.__compiled_process_steps__[
+                        schema_fingerprint
+                    ] = self.__compile_process_steps__(lf=lf)
+        steps, drop_columns_after_stages, stages = compiled_steps
+
+        lf = self.__apply_compiled_steps__(lf=lf, steps=steps)
+
+        # cardinality of string columns read by layers is counted over the whole batch, only
+        # these columns are read so the count doesn't evaluate the other columns of the batch
+        batch_low_cardinality_columns = low_cardinality_columns(
+            lf=lf,
+            column_names=dict.fromkeys(
+                column_name
+                for stage in stages
+                if not isinstance(stage, str)
+                for column_name in stage.distinct_value_columns
+            ),
+            distinct_ratio_threshold=self.__distinct_ratio_threshold__,
+        )
+
+        # compiled sql queries are applied as column expressions, other queries share a single
+        # sql context where the result of each query is registered in place of the table
+        sql_context = None
+        for stage_index, stage in enumerate(stages):
+            if drop_columns_after_stages[stage_index]:
+                lf = lf.drop(drop_columns_after_stages[stage_index])
+
+            if isinstance(stage, str):
+                if sql_context is None:
+                    sql_context = SQLFunctions.create_sql_context(lf=lf)
+                else:
+                    sql_context.register(DEFAULT_SQL_TABLE_NAME, lf)
+                lf = sql_context.execute(stage, eager=False)
+            else:
+                lf = stage.apply(
+                    lf=lf, low_cardinality_columns=batch_low_cardinality_columns
+                )
+
+        # drop temporary columns last used by the final stage
+        if drop_columns_after_stages[-1]:
+            lf = lf.drop(drop_columns_after_stages[-1])
+        return lf
+
+    def apply(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """
+        Converts a source batch, actual computation happens in collect.
+
+        :param lf: pl.LazyFrame, source batch
+        :return: pl.LazyFrame, converted batch
+        """
+
+        return self.process(self.prepare(lf))
@@ -32,6 +32,13 @@ class LookupConversionArgs(BaseModel):
     source_value: str
     destination_value: str
 
+    # hash looks up values in a hash map built from the reference keys, sorted sorts keys once
+    # when the dataset is loaded and looks up values with a binary search
+    key_index: Literal["hash", "sorted"] = "hash"
+
+    # exact matches values with keys, prefix and regex match values with key patterns
+    match: Literal["exact", "prefix", "regex"] = "exact"
+
     @field_validator("reference_dataset_path", mode="before")
     def __validate_reference_dataset_path__(
         cls, reference_dataset_path, field_info: ValidationInfo
@@ -89,6 +96,9 @@ class DTypeConversionArg(BaseModel):
     dtype: Literal["string", "float", "int", "datetime", "date"]
     strict: bool = False
 
+    # strptime format of datetime and date values read as strings, inferred from values if not set
+    format: Optional[str] = None
+
 
 class SetColumnDTypesConversionArgs(BaseModel):
     dtype_args: List[DTypeConversionArg]
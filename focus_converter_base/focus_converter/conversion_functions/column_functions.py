@@ -1,3 +1,5 @@
+from typing import Dict, List, Tuple
+
 import polars as pl
 
 from focus_converter.configs.base_config import (
@@ -12,6 +14,9 @@ from focus_converter.conversion_functions.validations import (
 )
 from focus_converter.models.focus_column_names import FocusColumnNames
 
+# prefix of struct columns holding all fields unnested from a list column in a single pass
+FUSED_UNNEST_COLUMN_PREFIX = "__unnest_"
+
 
 class ColumnFunctions:
     @staticmethod
@@ -28,16 +33,37 @@ class ColumnFunctions:
         return pl.lit(provider).alias(FocusColumnNames.PROVIDER.value)
 
     @staticmethod
-    def unnest(
-        plan: ConversionPlan, column_alias, column_validator: ColumnValidator
-    ) -> pl.col:
+    def __unnest_conversion_args__(plan: ConversionPlan) -> UnnestValueConversionArgs:
         # validate conversion args
         if plan.conversion_args:
-            conversion_args = UnnestValueConversionArgs.model_validate(
-                plan.conversion_args
-            )
+            return UnnestValueConversionArgs.model_validate(plan.conversion_args)
+        return UnnestValueConversionArgs()
+
+    @staticmethod
+    def __aggregate__(values, aggregation_operation: str) -> pl.Expr:
+        # aggregates values of a list namespace or an expression evaluated on list elements
+        if aggregation_operation == "first":
+            return values.first()
+        elif aggregation_operation == "last":
+            return values.last()
+        elif aggregation_operation == "sum":
+            return values.sum()
+        elif aggregation_operation == "mean":
+            return values.mean()
+        elif aggregation_operation == "min":
+            return values.min()
+        elif aggregation_operation == "max":
+            return values.max()
         else:
-            conversion_args = UnnestValueConversionArgs()
+            raise RuntimeError(
+                f"Unknown aggregation_operation type: {aggregation_operation}"
+            )
+
+    @classmethod
+    def unnest(
+        cls, plan: ConversionPlan, column_alias, column_validator: ColumnValidator
+    ) -> pl.col:
+        conversion_args = cls.__unnest_conversion_args__(plan)
 
         # split column name by dots to find nested structs
         field_depths = plan.column.split(".")
@@ -52,23 +78,9 @@ class ColumnFunctions:
             predicate = pl.col(field_depths[0]).list.eval(
                 pl.element().struct.field(field_depths[1])
             )
-
-            if conversion_args.aggregation_operation == "first":
-                predicate = predicate.list.first()
-            elif conversion_args.aggregation_operation == "last":
-                predicate = predicate.list.last()
-            elif conversion_args.aggregation_operation == "sum":
-                predicate = predicate.list.sum()
-            elif conversion_args.aggregation_operation == "mean":
-                predicate = predicate.list.mean()
-            elif conversion_args.aggregation_operation == "min":
-                predicate = predicate.list.min()
-            elif conversion_args.aggregation_operation == "max":
-                predicate = predicate.list.max()
-            else:
-                raise RuntimeError(
-                    f"Unknown aggregation_operation type: {conversion_args.aggregation_operation}"
-                )
+            predicate = cls.__aggregate__(
+                predicate.list, conversion_args.aggregation_operation
+            )
         else:
             raise RuntimeError(
                 "Unknown children type: {}".format(conversion_args.children_type)
@@ -81,6 +93,84 @@ class ColumnFunctions:
 
         return predicate.alias(column_alias)
 
+    @classmethod
+    def fuse_list_unnests(
+        cls,
+        column_exprs: List[pl.Expr],
+        unnest_plans: List[Tuple[int, ConversionPlan, str]],
+    ) -> List[str]:
+        """
+        Unnest plans of list children that read the same parent column are evaluated in a single
+        pass over the list, which extracts and aggregates all fields together into a struct column.
+        Plan expressions are replaced in place by fields of this struct column.
+
+        :param column_exprs: List[pl.Expr], column expressions applied in order
+        :param unnest_plans: List[Tuple[int, ConversionPlan, str]], index of the plan expression in
+        column_exprs, unnest plan and column alias
+        :return: List[str], names of fused struct columns to be dropped
+        """
+
+        list_unnests: Dict[str, List[Tuple[int, str, str, str]]] = {}
+        for index, plan, column_alias in unnest_plans:
+            conversion_args = cls.__unnest_conversion_args__(plan)
+            if conversion_args.children_type == "list":
+                parent_column, field_name = plan.column.split(".")[:2]
+                list_unnests.setdefault(parent_column, []).append(
+                    (
+                        index,
+                        field_name,
+                        conversion_args.aggregation_operation,
+                        column_alias,
+                    )
+                )
+
+        output_names = [column_expr.meta.output_name() for column_expr in column_exprs]
+
+        fused_column_exprs = {}
+        for parent_column, unnests in list_unnests.items():
+            # only plans reading the parent column before it is rewritten are fused
+            first_index = unnests[0][0]
+            unnests = [
+                unnest
+                for unnest in unnests
+                if parent_column not in output_names[first_index : unnest[0]]
+            ]
+            if len(unnests) < 2:
+                continue
+
+            fused_column_name = f"{FUSED_UNNEST_COLUMN_PREFIX}{parent_column}"
+            aggregation_exprs = {}
+            for index, field_name, aggregation_operation, column_alias in unnests:
+                struct_field_name = f"{aggregation_operation}({field_name})"
+                aggregation_exprs.setdefault(
+                    struct_field_name,
+                    cls.__aggregate__(
+                        pl.element().struct.field(field_name), aggregation_operation
+                    ).alias(struct_field_name),
+                )
+                column_exprs[index] = (
+                    pl.col(fused_column_name)
+                    .struct.field(struct_field_name)
+                    .alias(column_alias)
+                )
+
+            # aggregations return a single struct per list, same values as aggregating each list
+            # of fields on its own
+            fused_column_exprs[first_index] = (
+                pl.col(parent_column)
+                .list.eval(pl.struct(list(aggregation_exprs.values())))
+                .list.first()
+                .alias(fused_column_name)
+            )
+
+        # fused columns are computed right before the first plan using them
+        for index in sorted(fused_column_exprs, reverse=True):
+            column_exprs.insert(index, fused_column_exprs[index])
+        return [
+            fused_column_expr.meta.output_name()
+            for fused_column_expr in fused_column_exprs.values()
+        ]
+
     @staticmethod
     def map_values(
         plan: ConversionPlan, column_alias, column_validator: ColumnValidator
@@ -1,10 +1,79 @@
+from typing import Optional
+
 import polars as pl
 
 from focus_converter.configs.base_config import ConversionPlan
 from focus_converter.conversion_functions.validations import ColumnValidator
 
+# formats tried in order for datetime columns without a format set, a format is only used if it
+# parses a sample of the column to the same values as polars format inference
+DATETIME_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S%.f%#z",
+    "%Y-%m-%dT%H:%M%#z",
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%Y-%m-%d %H:%M:%S%.f%#z",
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y-%m-%d",
+]
+
+# number of non null values of a column used to infer its datetime format
+DATETIME_FORMAT_SAMPLE_SIZE = 1_000
+
 
 class DateTimeConversionFunctions:
+    @staticmethod
+    def infer_datetime_format(values: pl.Series) -> Optional[str]:
+        """
+        Infers the format of datetime strings, so that a column can be parsed with a fixed format
+        instead of inferring it again for each batch.
+
+        :param values: pl.Series, sample of non null values of a column
+        :return: str, datetime format parsing values to microseconds or None if no format
+        parses values same as inference
+        """
+
+        try:
+            inferred_values = values.str.to_datetime()
+        except pl.ComputeError:
+            return None
+
+        for datetime_format in DATETIME_FORMATS:
+            parsed_values = values.str.to_datetime(
+                format=datetime_format, time_unit="us", strict=False
+            )
+            if parsed_values.dtype == inferred_values.dtype and parsed_values.equals(
+                inferred_values
+            ):
+                return datetime_format
+        return None
+
+    @staticmethod
+    def parse_inferred_datetime(column_name: str, datetime_format: str) -> pl.Expr:
+        """
+        Parses a datetime column with a format inferred from an earlier batch. Values in another
+        layout, e.g. without seconds, are parsed with the other formats of the same time zone
+        awareness, values not matching any format are set to null instead of failing the batch.
+
+        :param column_name: str, datetime strings column
+        :param datetime_format: str, format inferred for the column
+        :return: pl.Expr, expression parsing the column to microseconds
+        """
+
+        fallback_formats = [
+            fallback_format
+            for fallback_format in DATETIME_FORMATS
+            if fallback_format != datetime_format
+            and fallback_format.endswith("%#z") == datetime_format.endswith("%#z")
+        ]
+        return pl.coalesce(
+            [
+                pl.col(column_name).str.to_datetime(
+                    format=parse_format, time_unit="us", strict=False
+                )
+                for parse_format in [datetime_format] + fallback_formats
+            ]
+        ).alias(column_name)
+
     @staticmethod
     def convert_timezone(
         plan: ConversionPlan, column_alias, column_validator: ColumnValidator
@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import polars as pl
 
@@ -7,6 +7,10 @@ from focus_converter.configs.base_config import (
     MissingColumnDType,
     SetColumnDTypesConversionArgs,
 )
+from focus_converter.conversion_functions.datetime_functions import (
+    DATETIME_FORMAT_SAMPLE_SIZE,
+    DateTimeConversionFunctions,
+)
 from focus_converter.conversion_functions.validations import ColumnValidator
 
 
@@ -52,84 +56,192 @@ class DeferredColumnFunctions:
         self.__enforced_column_dtypes__.append(plan)
         column_validator.map_dtype_enforced_node(plan=plan)
 
-    def apply_missing_column_plan(self, lf: pl.LazyFrame):
-        for column_alias, missing_column_plan in self.__missing_column_plans__:
-            if missing_column_plan.column not in lf.columns:
-                conversion_arg: MissingColumnDType = MissingColumnDType.model_validate(
-                    missing_column_plan.conversion_args
-                )
+    def reader_column_dtypes(self) -> Dict[str, pl.PolarsDataType]:
+        """
+        Compiles enforced column dtypes into dtypes used by source readers, so that values are parsed
+        into their final types once. Datetime and date columns are read as strings and parsed
+        by apply_dtype_plan with the format set in the plan.
+
+        :return: Dict[str, pl.PolarsDataType], column name to dtype
+        """
 
-                if conversion_arg.data_type == "string":
-                    dtype = pl.Utf8
-                elif conversion_arg.data_type == "float":
-                    dtype = pl.Float64
-                elif conversion_arg.data_type == "int":
-                    dtype = pl.Int64
+        column_dtypes = {}
+        for plan in self.__enforced_column_dtypes__:
+            conversion_args = SetColumnDTypesConversionArgs.model_validate(
+                plan.conversion_args
+            )
+            for column_obj in conversion_args.dtype_args:
+                if column_obj.dtype in ["datetime", "date"]:
+                    column_dtypes[column_obj.column_name] = pl.Utf8
                 else:
-                    raise RuntimeError(
-                        f"data_type: {conversion_arg.data_types} not implemented"
-                    )
+                    column_dtypes[
+                        column_obj.column_name
+                    ] = self.convert_focus_data_type_polars_dtype(column_obj.dtype)
+        return column_dtypes
 
-                lf = lf.with_columns(
-                    pl.lit(None).cast(dtype).alias(missing_column_plan.column)
-                )
+    def cache_key_args(self):
+        # deferred plans change the decoded source batches, so they are part of data cache keys
+        return {
+            "missing_column_plans": [
+                [column_alias, plan.model_dump(mode="json")]
+                for column_alias, plan in self.__missing_column_plans__
+            ],
+            "enforced_column_dtypes": [
+                plan.model_dump(mode="json") for plan in self.__enforced_column_dtypes__
+            ],
+        }
+
+    def missing_column_exprs(
+        self, schema: Dict[str, pl.PolarsDataType]
+    ) -> List[pl.Expr]:
+        """
+        Compiles missing column plans into expressions for a source schema, schema is updated with
+        the columns added so that it can be passed on to the next plans.
+
+        :param schema: Dict[str, pl.PolarsDataType], column names to dtypes of the source
+        :return: List[pl.Expr], expressions adding default columns
+        """
+
+        column_exprs = []
+        for column_alias, missing_column_plan in self.__missing_column_plans__:
+            if missing_column_plan.column in schema:
+                continue
+
+            conversion_arg: MissingColumnDType = MissingColumnDType.model_validate(
+                missing_column_plan.conversion_args
+            )
+
+            if conversion_arg.data_type == "string":
+                dtype = pl.Utf8
+            elif conversion_arg.data_type == "float":
+                dtype = pl.Float64
+            elif conversion_arg.data_type == "int":
+                dtype = pl.Int64
             else:
-                lf = lf.with_columns(
-                    pl.col(missing_column_plan.column).alias(missing_column_plan.column)
+                raise RuntimeError(
+                    f"data_type: {conversion_arg.data_types} not implemented"
                 )
-        return lf
 
-    def apply_dtype_plan(self, lf: pl.LazyFrame):
+            column_exprs.append(
+                pl.lit(None).cast(dtype).alias(missing_column_plan.column)
+            )
+            schema[missing_column_plan.column] = dtype
+        return column_exprs
+
+    @staticmethod
+    def __datetime_format__(
+        column_name: str,
+        lf: Optional[pl.LazyFrame],
+        datetime_formats: Dict[str, Optional[str]],
+    ) -> Optional[str]:
+        # format inferred from a sample of the first batch with values in a datetime column,
+        # inferred formats are kept by the caller for the rest of the run
+        if column_name in datetime_formats:
+            return datetime_formats[column_name]
+        elif lf is None:
+            return None
+
+        values = (
+            lf.select(
+                pl.col(column_name).drop_nulls().head(DATETIME_FORMAT_SAMPLE_SIZE)
+            )
+            .collect()
+            .to_series()
+        )
+        if values.is_empty():
+            return None
+
+        datetime_format = datetime_formats[
+            column_name
+        ] = DateTimeConversionFunctions.infer_datetime_format(values=values)
+        return datetime_format
+
+    def dtype_exprs(
+        self,
+        schema: Dict[str, pl.PolarsDataType],
+        lf: Optional[pl.LazyFrame] = None,
+        datetime_formats: Optional[Dict[str, Optional[str]]] = None,
+    ) -> List[pl.Expr]:
+        """
+        Compiles enforced column dtypes into expressions for a source schema, expressions are to be
+        applied in order. Schema is updated with the resulting dtypes.
+
+        :param schema: Dict[str, pl.PolarsDataType], column names to dtypes of the source
+        :param lf: pl.LazyFrame, source batch sampled to infer formats of datetime columns
+        :param datetime_formats: Dict[str, Optional[str]], formats inferred for earlier batches
+        of the run, updated with the formats inferred from this batch
+        :return: List[pl.Expr], cast and parse expressions
+        """
+
+        if datetime_formats is None:
+            datetime_formats = {}
+
+        column_exprs = []
         for plan in self.__enforced_column_dtypes__:
             conversion_args = SetColumnDTypesConversionArgs.model_validate(
                 plan.conversion_args
             )
             for column_obj in conversion_args.dtype_args:
-                if column_obj.column_name not in lf.columns:
-                    lf = lf.with_columns(
+                cast_type = self.convert_focus_data_type_polars_dtype(column_obj.dtype)
+
+                if column_obj.column_name not in schema:
+                    column_exprs.append(
                         pl.lit(None)
-                        .cast(
-                            self.convert_focus_data_type_polars_dtype(column_obj.dtype),
-                            strict=False,
-                        )
+                        .cast(cast_type, strict=False)
                         .alias(column_obj.column_name)
                     )
-                else:
+                elif cast_type in [pl.Datetime, pl.Date]:
                     # check if the column is i64 for the cast to work else fail, at the point the column
                     # should be used with datetime parser plan.
-                    cast_type = self.convert_focus_data_type_polars_dtype(
-                        column_obj.dtype
-                    )
-                    if cast_type in [pl.Datetime, pl.Date]:
-                        if lf.schema[column_obj.column_name] in [pl.Datetime, pl.Date]:
-                            # ignore if the column is already of type datetime/date
-                            pass
-                        elif lf.schema[column_obj.column_name] == pl.Utf8:
-                            if cast_type == pl.Datetime:
-                                lf = lf.with_columns(
-                                    pl.col(column_obj.column_name).str.to_datetime()
+                    if schema[column_obj.column_name] in [pl.Datetime, pl.Date]:
+                        # ignore if the column is already of type datetime/date
+                        continue
+                    elif schema[column_obj.column_name] == pl.Utf8:
+                        if cast_type == pl.Datetime and column_obj.format:
+                            # parsed with the known format, unit matches inferred formats
+                            column_exprs.append(
+                                pl.col(column_obj.column_name).str.to_datetime(
+                                    format=column_obj.format, time_unit="us"
                                 )
-                            else:
-                                lf = lf.with_columns(
-                                    pl.col(column_obj.column_name).str.to_date()
+                            )
+                        elif cast_type == pl.Datetime:
+                            # format is inferred once and reused for later batches, batches
+                            # with values in another layout fall back to the other formats
+                            datetime_format = self.__datetime_format__(
+                                column_name=column_obj.column_name,
+                                lf=lf,
+                                datetime_formats=datetime_formats,
+                            )
+                            column_exprs.append(
+                                pl.col(column_obj.column_name).str.to_datetime()
+                                if datetime_format is None
+                                else DateTimeConversionFunctions.parse_inferred_datetime(
+                                    column_name=column_obj.column_name,
+                                    datetime_format=datetime_format,
                                 )
+                            )
                         else:
-                            # possibly a timestamp column
-                            lf = lf.with_columns(
-                                pl.col(column_obj.column_name).cast(
-                                    self.convert_focus_data_type_polars_dtype(
-                                        column_obj.dtype
-                                    ),
-                                    strict=True,
+                            column_exprs.append(
+                                pl.col(column_obj.column_name).str.to_date(
+                                    format=column_obj.format
                                 )
                             )
                     else:
-                        lf = lf.with_columns(
-                            pl.col(column_obj.column_name).cast(
-                                self.convert_focus_data_type_polars_dtype(
-                                    column_obj.dtype
-                                ),
-                                strict=False,
-                            )
+                        # possibly a timestamp column
+                        column_exprs.append(
+                            pl.col(column_obj.column_name).cast(cast_type, strict=True)
                         )
+                else:
+                    column_exprs.append(
+                        pl.col(column_obj.column_name).cast(cast_type, strict=False)
+                    )
+                schema[column_obj.column_name] = cast_type
+        return column_exprs
+
+    def apply_missing_column_plan(self, lf: pl.LazyFrame):
+        return lf.with_columns(self.missing_column_exprs(schema=dict(lf.schema)))
+
+    def apply_dtype_plan(self, lf: pl.LazyFrame):
+        for column_expr in self.dtype_exprs(schema=dict(lf.schema), lf=lf):
+            lf = lf.with_columns(column_expr)
         return lf
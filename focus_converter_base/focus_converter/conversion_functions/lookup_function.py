@@ -1,32 +1,243 @@
+import os
+import pathlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
 import polars as pl
 
 from focus_converter.configs.base_config import ConversionPlan, LookupConversionArgs
 from focus_converter.conversion_functions.validations import ColumnValidator
 
+# reference dataset file suffixes read as arrow ipc files, any other suffix except parquet is csv
+IPC_FILE_SUFFIXES = {".arrow", ".ipc", ".feather"}
+
+
+class PatternLookup:
+    """
+    Maps values matching prefix or regex patterns of a reference dataset. Prefixes are compiled
+    into a trie where the longest matching prefix wins, regex patterns into a single alternation
+    matched from the start of a value where the first matching pattern in file order wins.
+    Patterns are evaluated once for each unique value of a batch.
+    """
+
+    def __init__(self, patterns: pl.Series, values: pl.Series, match: str):
+        self.__match__ = match
+        self.__values__ = values
+
+        if match == "prefix":
+            # each trie node maps a character to a child node, the index of the value mapped by
+            # the prefix ending at a node is stored under the None key
+            self.__trie__: Dict[Optional[str], Any] = {}
+            for index, prefix in enumerate(patterns):
+                node = self.__trie__
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, index)
+        elif match == "regex":
+            self.__regex__ = re.compile(
+                "|".join(
+                    f"(?P<pattern_{index}>{pattern})"
+                    for index, pattern in enumerate(patterns)
+                )
+            )
+        else:
+            raise ValueError(f"Unknown lookup match type: {match}")
+
+    def __lookup_index__(self, value: str) -> Optional[int]:
+        # index of the value mapped by the pattern matching a value
+        if self.__match__ == "prefix":
+            index, node = self.__trie__.get(None), self.__trie__
+            for char in value:
+                node = node.get(char)
+                if node is None:
+                    break
+                index = node.get(None, index)
+            return index
+
+        regex_match = self.__regex__.match(value)
+        if regex_match is None:
+            return None
+        return next(
+            int(name[len("pattern_") :])
+            for name, group in regex_match.groupdict().items()
+            if name.startswith("pattern_") and group is not None
+        )
+
+    def __call__(self, series: pl.Series) -> pl.Series:
+        unique_values = series.drop_nulls().unique()
+
+        mapped_values = []
+        for value in unique_values:
+            index = self.__lookup_index__(value)
+            mapped_values.append(None if index is None else self.__values__[index])
+
+        return series.replace(
+            unique_values,
+            pl.Series(mapped_values, dtype=self.__values__.dtype),
+            default=None,
+            return_dtype=self.__values__.dtype,
+        )
+
 
 class LookupFunction:
+    # reference datasets loaded once per run and shared by all plans using them, with the file
+    # stats they were loaded for. A changed file is loaded again and replaces the stale entry.
+    __reference_datasets__: Dict[Tuple, Tuple[Tuple[int, int], pl.DataFrame]] = {}
+
+    @staticmethod
+    def __read_reference_dataset__(
+        reference_dataset_path: str, columns: List[str]
+    ) -> pl.DataFrame:
+        # parquet and arrow ipc files are memory mapped, only the selected columns are read
+        suffix = pathlib.Path(reference_dataset_path).suffix.lower()
+        if suffix == ".parquet":
+            return pl.read_parquet(
+                reference_dataset_path, columns=columns, memory_map=True
+            )
+        elif suffix in IPC_FILE_SUFFIXES:
+            return pl.read_ipc(reference_dataset_path, columns=columns, memory_map=True)
+        return pl.read_csv(
+            reference_dataset_path, columns=columns, dtypes={columns[0]: pl.Utf8}
+        )
+
+    @classmethod
+    def load_reference_dataset(
+        cls,
+        reference_dataset_path: str,
+        source_value: str,
+        destination_value: str,
+        key_index: str = "hash",
+    ) -> pl.DataFrame:
+        """
+        Loads source and destination columns of a csv, parquet or arrow ipc reference dataset into
+        memory. Keys are unique, a key listed more than once maps to its first value and null keys
+        are never matched.
+
+        :param reference_dataset_path: str, path to the reference dataset
+        :param source_value: str, column holding lookup keys
+        :param destination_value: str, column holding mapped values
+        :param key_index: str, hash to keep keys in file order or sorted to sort them
+        :return: pl.DataFrame, reference dataset with unique keys
+        """
+
+        stat = os.stat(reference_dataset_path)
+        file_stats = (stat.st_size, stat.st_mtime_ns)
+        cache_key = (
+            os.path.abspath(reference_dataset_path),
+            source_value,
+            destination_value,
+            key_index,
+        )
+
+        cached_file_stats, reference_df = cls.__reference_datasets__.get(
+            cache_key, (None, None)
+        )
+        if cached_file_stats != file_stats:
+            reference_df = (
+                cls.__read_reference_dataset__(
+                    reference_dataset_path=reference_dataset_path,
+                    columns=list(dict.fromkeys([source_value, destination_value])),
+                )
+                .with_columns(pl.col(source_value).cast(pl.Utf8))
+                .filter(pl.col(source_value).is_not_null())
+                .unique(subset=[source_value], keep="first", maintain_order=True)
+            )
+            if key_index == "sorted":
+                reference_df = reference_df.sort(source_value)
+            cls.__reference_datasets__[cache_key] = (file_stats, reference_df)
+        return reference_df
+
     @classmethod
     def map_values_using_lookup(
         cls, plan: ConversionPlan, column_alias, column_validator: ColumnValidator
     ):
         conversion_args = LookupConversionArgs.model_validate(plan.conversion_args)
         reference_data_lf = (
-            pl.scan_csv(conversion_args.reference_dataset_path)
-            .select([conversion_args.source_value, conversion_args.destination_value])
-            .with_columns(
+            cls.load_reference_dataset(
+                reference_dataset_path=str(conversion_args.reference_dataset_path),
+                source_value=conversion_args.source_value,
+                destination_value=conversion_args.destination_value,
+                # patterns are matched in file order
+                key_index=conversion_args.key_index
+                if conversion_args.match == "exact"
+                else "hash",
+            )
+            .lazy()
+            .select(
                 [
-                    pl.col(conversion_args.source_value).cast(pl.Utf8),
+                    pl.col(conversion_args.source_value),
+                    pl.col(conversion_args.destination_value).alias(column_alias),
                 ]
             )
-            .rename({conversion_args.destination_value: column_alias})
         )
 
         # add to column validator and check if source column exists
         column_validator.map_non_sql_plan(plan=plan, column_alias=column_alias)
 
-        return {
+        lookup_args = {
             "other": reference_data_lf,
             "left_on": plan.column,
             "how": "left",
             "right_on": conversion_args.source_value,
         }
+
+        # exact lookups can also be applied as a join with the reference dataset
+        if conversion_args.match != "exact":
+            lookup_args["match"] = conversion_args.match
+        return lookup_args
+
+    @staticmethod
+    def lookup_expression(lookup_args: Dict[str, Any]) -> pl.Expr:
+        """
+        Builds an expression from lookup join arguments, which maps values same as the left join
+        with the preloaded reference dataset without building a join table per batch. Sorted keys
+        are searched with a binary search, other keys are hashed by a replace. Prefix and regex
+        patterns are matched against unique values.
+
+        :param lookup_args: Dict[str, Any], lookup join arguments
+        :return: pl.Expr, column expression adding the looked up column
+        """
+
+        reference_df = lookup_args["other"].collect()
+        source_values = reference_df[lookup_args["right_on"]]
+        (destination_values,) = reference_df.drop(lookup_args["right_on"])
+
+        match = lookup_args.get("match", "exact")
+        if match != "exact":
+            return (
+                pl.col(lookup_args["left_on"])
+                .cast(pl.Utf8)
+                .map_batches(
+                    PatternLookup(
+                        patterns=source_values, values=destination_values, match=match
+                    ),
+                    return_dtype=destination_values.dtype,
+                )
+                .alias(destination_values.name)
+            )
+
+        if source_values.flags["SORTED_ASC"] and len(source_values):
+            values = pl.col(lookup_args["left_on"]).cast(pl.Utf8)
+            indices = (
+                pl.lit(source_values)
+                .search_sorted(values)
+                .clip(0, len(source_values) - 1)
+            )
+            return (
+                pl.when(pl.lit(source_values).gather(indices) == values)
+                .then(pl.lit(destination_values).gather(indices))
+                .otherwise(pl.lit(None, dtype=destination_values.dtype))
+                .alias(destination_values.name)
+            )
+
+        return (
+            pl.col(lookup_args["left_on"])
+            .cast(pl.Utf8)
+            .replace(
+                source_values,
+                destination_values,
+                default=None,
+                return_dtype=destination_values.dtype,
+            )
+            .alias(destination_values.name)
+        )
@@ -0,0 +1,327 @@
+import operator
+import re
+from typing import List, Optional, Set, Tuple
+
+import polars as pl
+import sqlglot
+from sqlglot import exp
+
+from focus_converter.conversion_functions.sql_functions import DEFAULT_SQL_TABLE_NAME
+
+# sql binary operators mapped to polars expression operators
+BINARY_OPERATORS = {
+    exp.EQ: operator.eq,
+    exp.NEQ: operator.ne,
+    exp.GT: operator.gt,
+    exp.GTE: operator.ge,
+    exp.LT: operator.lt,
+    exp.LTE: operator.le,
+    exp.Add: operator.add,
+    exp.Sub: operator.sub,
+    exp.Mul: operator.mul,
+    exp.And: operator.and_,
+    exp.Or: operator.or_,
+}
+
+# sql expression nodes mapped to the names of the handlers compiling them
+EXPRESSION_HANDLERS = {
+    exp.Column: "__compile_column__",
+    exp.Literal: "__compile_literal__",
+    exp.Null: "__compile_null__",
+    exp.Boolean: "__compile_boolean__",
+    exp.Paren: "__compile_paren__",
+    exp.Not: "__compile_not__",
+    exp.Neg: "__compile_neg__",
+    exp.Is: "__compile_is__",
+    exp.Div: "__compile_div__",
+    exp.Like: "__compile_like__",
+    exp.Lower: "__compile_lower__",
+    exp.Upper: "__compile_upper__",
+    exp.Coalesce: "__compile_coalesce__",
+    exp.Case: "__compile_case__",
+}
+
+# select clauses that are compiled, queries using any other clause run in a sql context
+SUPPORTED_SELECT_ARGS = {"expressions", "from"}
+
+# CASE expressions comparing a single column with at least this many string literals are
+# evaluated as one hash map lookup instead of a chain of comparisons
+EQUALITY_CHAIN_MIN_VALUES = 2
+
+
+class SQLCompiler:
+    """
+    Compiles sql plans of the form `select *, <expression> as <column> from cost_data` into polars
+    expressions, so that they are applied with with_columns instead of a sql context.
+    Expressions are limited to CASE/WHEN, COALESCE, comparisons, boolean and arithmetic operators,
+    LIKE and LOWER/UPPER on columns and literals.
+    """
+
+    @staticmethod
+    def __compile_literal__(node: exp.Literal) -> pl.Expr:
+        if node.is_string:
+            return pl.lit(node.this)
+
+        # integer literals are typed as i64, same as the polars sql context
+        try:
+            return pl.lit(int(node.this), dtype=pl.Int64)
+        except ValueError:
+            return pl.lit(float(node.this), dtype=pl.Float64)
+
+    @staticmethod
+    def __like_pattern__(pattern: str) -> str:
+        # sql like pattern as an anchored regular expression
+        regex = "".join(
+            ".*" if char == "%" else "." if char == "_" else re.escape(char)
+            for char in pattern
+        )
+        return f"^{regex}$"
+
+    @staticmethod
+    def __string_literal_value__(node: exp.Expression):
+        # value of a string literal or null, raises for any other expression
+        if isinstance(node, exp.Null):
+            return None
+        elif isinstance(node, exp.Literal) and node.is_string:
+            return node.this
+        raise NotImplementedError(f"Not a string literal: {node.key}")
+
+    @classmethod
+    def __equality_condition_values__(cls, node: exp.Expression):
+        # column name and values of `col = 'value' [OR col = 'value' ...]` conditions
+        while isinstance(node, exp.Paren):
+            node = node.this
+
+        if isinstance(node, exp.Or):
+            column_name, values = cls.__equality_condition_values__(node.this)
+            other_column_name, other_values = cls.__equality_condition_values__(
+                node.expression
+            )
+            if column_name != other_column_name:
+                raise NotImplementedError("Conditions on different columns")
+            return column_name, values + other_values
+        elif isinstance(node, exp.EQ):
+            column, value = node.this, node.expression
+            if isinstance(value, exp.Column):
+                column, value = value, column
+
+            if (
+                isinstance(column, exp.Column)
+                and isinstance(value, exp.Literal)
+                and value.is_string
+            ):
+                return column.name, [value.this]
+        raise NotImplementedError(f"Not an equality condition: {node.key}")
+
+    @classmethod
+    def __compile_equality_chain__(cls, node: exp.Case) -> Optional[pl.Expr]:
+        # CASE WHEN col = 'a' THEN 'x' WHEN col = 'b' OR col = 'c' THEN 'y' ELSE 'z' END is
+        # compiled into a replace with a map of values, same as value map plans. Values listed
+        # more than once map to the first match, same as the order of WHEN conditions.
+        try:
+            value_map = {}
+            chain_column_name = None
+            for condition in node.args["ifs"]:
+                column_name, values = cls.__equality_condition_values__(condition.this)
+                if chain_column_name not in (None, column_name):
+                    return None
+                chain_column_name = column_name
+
+                mapped_value = cls.__string_literal_value__(condition.args["true"])
+                for value in values:
+                    value_map.setdefault(value, mapped_value)
+
+            default = node.args.get("default")
+            default_value = (
+                None if default is None else cls.__string_literal_value__(default)
+            )
+        except NotImplementedError:
+            return None
+
+        if len(value_map) < EQUALITY_CHAIN_MIN_VALUES:
+            return None
+
+        # compared as strings, null values map to the default value same as in CASE
+        return (
+            pl.col(chain_column_name)
+            .cast(pl.Utf8)
+            .replace(
+                value_map,
+                default=pl.lit(default_value, dtype=pl.Utf8),
+                return_dtype=pl.Utf8,
+            )
+        )
+
+    @staticmethod
+    def __compile_column__(node: exp.Column) -> pl.Expr:
+        if node.table and node.table != DEFAULT_SQL_TABLE_NAME:
+            raise NotImplementedError(f"Column table: {node.table}")
+        return pl.col(node.name)
+
+    @staticmethod
+    def __compile_null__(_: exp.Null) -> pl.Expr:
+        return pl.lit(None)
+
+    @staticmethod
+    def __compile_boolean__(node: exp.Boolean) -> pl.Expr:
+        return pl.lit(node.this)
+
+    @classmethod
+    def __compile_paren__(cls, node: exp.Paren) -> pl.Expr:
+        return cls.__compile_expression__(node.this)
+
+    @classmethod
+    def __compile_not__(cls, node: exp.Not) -> pl.Expr:
+        return ~cls.__compile_expression__(node.this)
+
+    @classmethod
+    def __compile_neg__(cls, node: exp.Neg) -> pl.Expr:
+        return -cls.__compile_expression__(node.this)
+
+    @classmethod
+    def __compile_is__(cls, node: exp.Is) -> pl.Expr:
+        if not isinstance(node.expression, exp.Null):
+            raise NotImplementedError(f"IS {node.expression.key}")
+        return cls.__compile_expression__(node.this).is_null()
+
+    @classmethod
+    def __compile_binary__(cls, node: exp.Binary) -> pl.Expr:
+        return BINARY_OPERATORS[type(node)](
+            cls.__compile_expression__(node.this),
+            cls.__compile_expression__(node.expression),
+        )
+
+    @classmethod
+    def __compile_div__(cls, node: exp.Div) -> pl.Expr:
+        # the sql context divides integers with floor division and other numbers with true
+        # division. Operand types are not known when compiling, so only divisions with a float
+        # literal operand, which are always true divisions, are compiled.
+        if not any(
+            isinstance(operand, exp.Literal)
+            and not operand.is_string
+            and not operand.is_int
+            for operand in (node.this, node.expression)
+        ):
+            raise NotImplementedError("Division without a float literal operand")
+        return cls.__compile_expression__(node.this) / cls.__compile_expression__(
+            node.expression
+        )
+
+    @classmethod
+    def __compile_like__(cls, node: exp.Like) -> pl.Expr:
+        if not isinstance(node.expression, exp.Literal):
+            raise NotImplementedError(f"LIKE {node.expression.key}")
+        return cls.__compile_expression__(node.this).str.contains(
+            cls.__like_pattern__(node.expression.this)
+        )
+
+    @classmethod
+    def __compile_lower__(cls, node: exp.Lower) -> pl.Expr:
+        return cls.__compile_expression__(node.this).str.to_lowercase()
+
+    @classmethod
+    def __compile_upper__(cls, node: exp.Upper) -> pl.Expr:
+        return cls.__compile_expression__(node.this).str.to_uppercase()
+
+    @classmethod
+    def __compile_coalesce__(cls, node: exp.Coalesce) -> pl.Expr:
+        return pl.coalesce(
+            [cls.__compile_expression__(node.this)]
+            + [cls.__compile_expression__(arg) for arg in node.expressions]
+        )
+
+    @classmethod
+    def __compile_case__(cls, node: exp.Case) -> pl.Expr:
+        conditions = node.args.get("ifs") or []
+        if node.this is not None:
+            raise NotImplementedError("CASE with an operand")
+        elif not conditions:
+            raise NotImplementedError("CASE without WHEN")
+
+        equality_chain_expr = cls.__compile_equality_chain__(node)
+        if equality_chain_expr is not None:
+            return equality_chain_expr
+
+        expr = pl
+        for condition in conditions:
+            expr = expr.when(cls.__compile_expression__(condition.this)).then(
+                cls.__compile_expression__(condition.args["true"])
+            )
+
+        default = node.args.get("default")
+        return expr.otherwise(
+            pl.lit(None) if default is None else cls.__compile_expression__(default)
+        )
+
+    @classmethod
+    def __compile_expression__(cls, node: exp.Expression) -> pl.Expr:
+        if type(node) in BINARY_OPERATORS:
+            return cls.__compile_binary__(node)
+        elif type(node) in EXPRESSION_HANDLERS:
+            return getattr(cls, EXPRESSION_HANDLERS[type(node)])(node)
+        raise NotImplementedError(f"SQL expression: {node.key}")
+
+    @staticmethod
+    def query_column_names(sql_query: str) -> Optional[Tuple[Set[str], Set[str]]]:
+        """
+        Lists columns referenced by a sql plan query and columns it adds.
+
+        :param sql_query: str, sql query rendered for the plan
+        :return: Tuple[Set[str], Set[str]], read and aliased column names or None if the query
+        can't be parsed
+        """
+
+        try:
+            select = sqlglot.parse_one(sql_query)
+        except sqlglot.errors.ParseError:
+            return None
+
+        if not isinstance(select, exp.Select):
+            return None
+
+        return {column.name for column in select.find_all(exp.Column)}, {
+            expression.alias
+            for expression in select.expressions
+            if isinstance(expression, exp.Alias)
+        }
+
+    @classmethod
+    def compile_query(cls, sql_query: str) -> Optional[List[pl.Expr]]:
+        """
+        Compiles a sql plan query into column expressions.
+
+        :param sql_query: str, sql query rendered for the plan
+        :return: List[pl.Expr], column expressions or None if the query is not supported
+        """
+
+        select = sqlglot.parse_one(sql_query)
+        if not isinstance(select, exp.Select) or any(
+            value
+            for key, value in select.args.items()
+            if key not in SUPPORTED_SELECT_ARGS
+        ):
+            return None
+
+        table = select.args["from"].this if select.args.get("from") else None
+        if (
+            not isinstance(table, exp.Table)
+            or table.name != DEFAULT_SQL_TABLE_NAME
+            or table.alias
+            or table.db
+        ):
+            return None
+
+        # all source columns are selected first, followed by aliased expressions
+        star, *aliases = select.expressions
+        if not isinstance(star, exp.Star) or not all(
+            isinstance(alias, exp.Alias) for alias in aliases
+        ):
+            return None
+
+        try:
+            return [
+                cls.__compile_expression__(alias.this).alias(alias.alias)
+                for alias in aliases
+            ]
+        except NotImplementedError:
+            return None
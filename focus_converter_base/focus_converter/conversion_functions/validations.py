@@ -1,5 +1,6 @@
 import base64
 import io
+from typing import Iterable, List
 
 import networkx as nx
 import polars as pl
@@ -123,18 +124,31 @@ class ColumnValidator:
                 SOURCE_COLUMN_NAME, column_obj.column_name, plan=plan
             )
 
-    def validate_lazy_frame_columns(self, lf: pl.LazyFrame):
-        # get all columns that have edge from source
-        source_columns = [
-            column for column in self.__network_graph__.successors(SOURCE_COLUMN_NAME)
-        ]
+    def source_column_names(self) -> List[str]:
+        """
+        Lists columns the plans expect to be provided by the source dataset
+
+        :return: List[str], sorted list of source column names
+        """
+
+        return sorted(self.__network_graph__.successors(SOURCE_COLUMN_NAME))
 
-        columns_missing = sorted(set(source_columns) - set(lf.columns))
+    @staticmethod
+    def validate_source_columns(
+        source_columns: Iterable[str], column_names: Iterable[str]
+    ):
+        columns_missing = sorted(set(source_columns) - set(column_names))
         if columns_missing:
             raise ValueError(
                 f"Column(s) '{', '.join(columns_missing)}' not found in data"
             )
 
+    def validate_lazy_frame_columns(self, lf: pl.LazyFrame):
+        # get all columns that have edge from source
+        self.validate_source_columns(
+            source_columns=self.source_column_names(), column_names=lf.columns
+        )
+
     def validate_graph_is_connected(self):
         """
         Validates that the graph is connected
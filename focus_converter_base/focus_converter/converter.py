@@ -2,16 +2,17 @@ import importlib.resources
 import logging
 import os
 from operator import attrgetter
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 import polars as pl
 
+from focus_converter.compiled_plan import CompiledConversionPlan
 from focus_converter.configs.base_config import ConversionPlan
 from focus_converter.conversion_functions import STATIC_CONVERSION_TYPES
+from focus_converter.conversion_functions.column_functions import ColumnFunctions
 from focus_converter.conversion_functions.deferred_column_functions import (
     DeferredColumnFunctions,
 )
-from focus_converter.conversion_functions.sql_functions import SQLFunctions
 from focus_converter.conversion_functions.validations import ColumnValidator
 from focus_converter.conversion_strategy import (
     ColumnAssignStaticCommand,
@@ -31,12 +32,10 @@ from focus_converter.conversion_strategy import (
     SQLEvalQueryCommand,
     StringFunctionsCommand,
 )
+from focus_converter.data_loaders.data_cache import DataCache
 from focus_converter.data_loaders.data_exporter import DataExporter
 from focus_converter.data_loaders.data_loader import DataLoader
-from focus_converter.models.focus_column_names import (
-    FocusColumnNames,
-    get_dtype_for_focus_column_name,
-)
+from focus_converter.models.focus_column_names import FocusColumnNames
 
 # TODO: Make this path configurable so that we can load from a directory outside of the project
 BASE_CONVERSION_CONFIGS = (
@@ -50,14 +49,10 @@ class FocusConverter:
     plans: Dict[str, List[ConversionPlan]]
     data_loader: DataLoader
     data_exporter: DataExporter = None
+    data_cache: Optional[DataCache] = None
 
-    # set of plan variables for horizontal transformation plans
-    h_collected_columns: List[str]  # collected columns
-    h_column_exprs: List[pl.col]  # column expressions
-    h_sql_queries: List[str]  # sql_queries
-
-    # temporary columns to be removed from final dataset
-    __temporary_columns__: List[str]
+    # plan compiled for horizontal transformation, set by prepare_horizontal_conversion_plan
+    conversion_plan: Optional[CompiledConversionPlan] = None
 
     # column prefix used in source dataset
     __column_prefix__: Optional[str] = None
@@ -70,7 +65,6 @@ class FocusConverter:
     def __init__(
         self, column_prefix=None, converted_column_prefix=None, basename_template=None
     ):
-        self.__temporary_columns__ = []
         self.__column_prefix__ = column_prefix
         self.__converted_column_prefix__ = converted_column_prefix
 
@@ -78,9 +72,6 @@ class FocusConverter:
         self.__column_validator__ = ColumnValidator()
         self.plans = {}
 
-        # deferred column plans, these plans are applied after lazyframe is loaded
-        self.__deferred_column_plans__ = DeferredColumnFunctions()
-
         self.__basename_template__ = basename_template
 
     def load_provider_conversion_configs(self):
@@ -115,18 +106,47 @@ class FocusConverter:
     def configure_data_export(self, *args, **kwargs):
         self.data_exporter = DataExporter(*args, **kwargs)
 
-    def prepare_horizontal_conversion_plan(self, provider):
+    def configure_data_cache(self, cache_dir: Optional[str]):
+        # cache is keyed by source data, reader options and deferred plans, so it needs to be
+        # configured after data is loaded and the conversion plan is prepared
+        if cache_dir is None:
+            self.data_cache = None
+            return
+
+        self.__configure_data_loader__()
+        self.data_cache = DataCache(
+            cache_dir=cache_dir,
+            cache_key_args={
+                "data_loader": self.data_loader.cache_key_args(),
+                "column_prefix": self.__column_prefix__,
+                "deferred_column_plans": self.conversion_plan.deferred_column_plans.cache_key_args(),
+            },
+        )
+
+    def prepare_horizontal_conversion_plan(self, provider) -> CompiledConversionPlan:
         # final set of columns produced after this transform step
-        self.h_collected_columns = collected_columns = []
+        collected_columns = []
 
         # column expressions that will be applied to loaded lazy frame in order
-        self.h_column_exprs = column_exprs = []
+        column_exprs = []
 
         # sql queries collected to be applied on the lazy frame
-        self.h_sql_queries = sql_queries = []
+        sql_queries = []
 
         # lookup lazyframes arguments to be assembled later on the final source lazyframe
-        self.lookup_reference_args = []
+        lookup_reference_args = []
+
+        # temporary columns to be removed from final dataset
+        temporary_columns = []
+
+        # unnest plans with the index of their column expression, fused after all plans are added
+        unnest_plans = []
+
+        # ColumnValidator, used to validate column names in sql queries and transformations
+        self.__column_validator__ = column_validator = ColumnValidator()
+
+        # deferred column plans, these plans are applied after lazyframe is loaded
+        deferred_column_plans = DeferredColumnFunctions()
 
         # Create a dictionary to map conversion types to command classes.
         command_classes = {
@@ -156,11 +176,16 @@ class FocusConverter:
         for plan in self.plans[provider]:
             # column name generated with temporary prefix
             column_alias = self.generate_column_name(plan)
+            if plan.column_prefix:
+                temporary_columns.append(column_alias)
 
             # add column to plan to collect these dimensions to be added in the computed dataframe
             if plan.focus_column != FocusColumnNames.PLACE_HOLDER:
                 collected_columns.append(plan.focus_column.value)
 
+            if plan.conversion_type == STATIC_CONVERSION_TYPES.UNNEST_COLUMN:
+                unnest_plans.append((len(column_exprs), plan, column_alias))
+
             # process data based on conversion type
             command_class = command_classes.get(plan.conversion_type)
             if (
@@ -168,31 +193,31 @@ class FocusConverter:
                 or command_class.categorty(self) == "datetime"
             ):
                 command_class().execute(
-                    plan, column_alias, self.__column_validator__, column_exprs
+                    plan, column_alias, column_validator, column_exprs
                 )
             elif command_class.categorty(self) == "sql":
                 command_class().execute(
-                    plan, column_alias, self.__column_validator__, sql_queries
+                    plan, column_alias, column_validator, sql_queries
                 )
             elif command_class.categorty(self) == "lookup":
                 command_class().execute(
                     plan,
                     column_alias,
-                    self.__column_validator__,
-                    self.lookup_reference_args,
+                    column_validator,
+                    lookup_reference_args,
                 )
             elif command_class.categorty(self) == "deferred":
                 command_class().execute(
                     plan,
                     column_alias,
-                    self.__column_validator__,
-                    self.__deferred_column_plans__,
+                    column_validator,
+                    deferred_column_plans,
                 )
             elif command_class.categorty(self) == "string":
                 command_class().execute(
                     plan,
                     column_alias,
-                    self.__column_validator__,
+                    column_validator,
                     column_exprs,
                 )
             else:
@@ -201,38 +226,38 @@ class FocusConverter:
                 )
 
         # apply the plan to the lazy frame
-        self.__column_validator__.validate_graph_is_connected()
+        column_validator.validate_graph_is_connected()
 
-        return column_exprs
+        # unnest plans on the same list column walk the list once
+        temporary_columns += ColumnFunctions.fuse_list_unnests(
+            column_exprs=column_exprs, unnest_plans=unnest_plans
+        )
+
+        self.conversion_plan = CompiledConversionPlan(
+            collected_columns=collected_columns,
+            column_exprs=column_exprs,
+            sql_queries=sql_queries,
+            lookup_reference_args=lookup_reference_args,
+            temporary_columns=temporary_columns,
+            source_column_names=column_validator.source_column_names(),
+            deferred_column_plans=deferred_column_plans,
+            column_prefix=self.__column_prefix__,
+        )
+        return self.conversion_plan
 
-    def generate_column_name(self, plan):
+    @staticmethod
+    def generate_column_name(plan):
         if plan.column_prefix:
             column_alias = f"{plan.column_prefix}_{plan.focus_column.value}"
-            self.__temporary_columns__.append(column_alias)
         else:
             column_alias = plan.focus_column.value
         return column_alias
 
-    @staticmethod
-    def __apply_sql_queries__(lf: pl.LazyFrame, sql_queries):
-        for sql_query in sql_queries:
-            sql_context = SQLFunctions.create_sql_context(lf=lf)
-            lf = sql_context.execute(sql_query, eager=False)
-        return lf
-
-    @staticmethod
-    def __apply_column_expressions__(
-        lf: pl.LazyFrame, column_expressions: List[pl.col]
-    ):
-        for expr in column_expressions:
-            lf = lf.with_columns_seq(expr)
-        return lf
-
     @staticmethod
     def __apply_lookup_reference_plans__(lf: pl.LazyFrame, lookup_args):
-        for lookup_arg in lookup_args:
-            lf = lf.join(**lookup_arg)
-        return lf
+        return CompiledConversionPlan.__apply_lookup_reference_plans__(
+            lf=lf, lookup_args=lookup_args
+        )
 
     def explain(self):
         # get batched data lazy frame, build the plan and then break
@@ -240,72 +265,60 @@ class FocusConverter:
 
     def apply_plan(self, lf: pl.LazyFrame) -> pl.LazyFrame:
         # creates lazy frame using the config, actual computation happens in collect
+        return self.conversion_plan.process(lf=lf)
 
-        lf = self.__apply_column_expressions__(
-            lf=lf, column_expressions=self.h_column_exprs
-        )
-
-        # apply lazyframe joins
-        lf = self.__apply_lookup_reference_plans__(
-            lf=lf, lookup_args=self.lookup_reference_args
-        )
-
-        lf = self.__apply_sql_queries__(lf=lf, sql_queries=self.h_sql_queries)
-
-        # drop temporary columns from the final dataset
-        lf = lf.drop(self.__temporary_columns__)
-
-        return lf
-
-    def __re_map_source_columns__(self, lf: pl.LazyFrame):
-        # helper function to re-map prefixed source columns to source columns
-        # so that conversion plans can be applied.
-
-        column_prefix_length = len(self.__column_prefix__)
-        for column in lf.columns:
-            if column.startswith(self.__column_prefix__):
-                orig_column_name = column[column_prefix_length:]
-                lf = lf.with_columns_seq(pl.col(column).alias(orig_column_name))
-
-                # add remapped column to temporary columns list so that it can be dropped later
-                self.__temporary_columns__.append(orig_column_name)
-        return lf
-
-    def __add_empty_columns_for_missing_focus_columns__(self, lf: pl.LazyFrame):
-        # add missing focus columns with null values to produce a valid parquet file
-        for focus_column_name in FocusColumnNames:
-            if (
-                focus_column_name.value not in self.h_collected_columns
-                and focus_column_name != FocusColumnNames.PLACE_HOLDER
-            ):
-                lf = lf.with_columns(
-                    pl.lit(None)
-                    .alias(focus_column_name.value)
-                    .cast(get_dtype_for_focus_column_name(focus_column_name))
-                )
-        return lf
+    def __prepare_source_lazy_frame__(self, lf: pl.LazyFrame):
+        # applies plans that only depend on source data, results of this step can be cached
+        return self.conversion_plan.prepare(lf=lf)
 
     def __process_lazy_frame__(self, lf: pl.LazyFrame):
         # prepares lazyframe for the operations to be applied on the lazy loaded polars dataframe
-        if self.__column_prefix__ is not None:
-            lf = self.__re_map_source_columns__(lf=lf)
+        return self.conversion_plan.apply(lf=lf)
 
-        # apply deferred column plans
-        lf = self.__deferred_column_plans__.apply_missing_column_plan(lf=lf)
-        lf = self.__deferred_column_plans__.apply_dtype_plan(lf=lf)
+    def __process_prepared_lazy_frame__(self, lf: pl.LazyFrame):
+        return self.conversion_plan.process(lf=lf)
 
-        # validate all source columns exist in the lazy frame
-        self.__column_validator__.validate_lazy_frame_columns(lf=lf)
+    def __source_columns__(self) -> Optional[List[str]]:
+        # source columns read by the plans, None if source columns are exported and all
+        # columns need to be read
+        if self.data_exporter is None or self.data_exporter.include_source_columns:
+            return None
 
-        # add missing focus columns with null values to produce a valid parquet file
-        lf = self.__add_empty_columns_for_missing_focus_columns__(lf=lf)
-
-        return self.apply_plan(lf=lf)
+        source_columns = list(self.conversion_plan.source_column_names)
+        if self.__column_prefix__ is not None:
+            # prefixed source columns are re-mapped to the column names used by the plans
+            source_columns += [
+                f"{self.__column_prefix__}{column}" for column in source_columns
+            ]
+        return source_columns
+
+    def __configure_data_loader__(self):
+        # pushes column dtypes and columns read by the plans down to the source readers
+        self.data_loader.configure_column_dtypes(
+            self.conversion_plan.deferred_column_plans.reader_column_dtypes()
+        )
+        self.data_loader.configure_columns(self.__source_columns__())
+
+    def __scan_prepared_source__(self) -> Iterable[pl.LazyFrame]:
+        # reads source batches with plans that only depend on source data applied,
+        # from the data cache if configured and already populated
+        self.__configure_data_loader__()
+
+        if self.data_cache is None:
+            for lf in self.data_loader.data_scanner():
+                yield self.__prepare_source_lazy_frame__(lf=lf)
+        elif self.data_cache.is_cached:
+            yield from self.data_cache.read()
+        else:
+            yield from self.data_cache.write(
+                self.__prepare_source_lazy_frame__(lf=lf)
+                for lf in self.data_loader.data_scanner()
+            )
 
     def convert(self):
-        for lf in self.data_loader.data_scanner():
-            lf = self.__process_lazy_frame__(lf=lf)
+        for lf in self.__scan_prepared_source__():
+            lf = self.__process_prepared_lazy_frame__(lf=lf)
             self.data_exporter.collect(
-                lf=lf, collected_columns=list(set(self.h_collected_columns))
+                lf=lf, collected_columns=list(self.conversion_plan.collected_columns)
             )
         self.data_exporter.close()
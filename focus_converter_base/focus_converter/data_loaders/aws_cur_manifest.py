@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import polars as pl
+from pydantic import BaseModel, ConfigDict, Field
+
+# manifest files are written next to each report version, e.g. my-report-Manifest.json
+MANIFEST_FILE_SUFFIX = "-Manifest.json"
+
+# column types listed in the manifest mapped to polars dtypes, types not listed here (DateTime,
+# Interval, String etc.) are read as strings and left to the provider dtype plan
+MANIFEST_COLUMN_DTYPES = {
+    "BigDecimal": pl.Float64,
+    "OptionalBigDecimal": pl.Float64,
+    "Double": pl.Float64,
+    "OptionalDouble": pl.Float64,
+    "Long": pl.Int64,
+    "OptionalLong": pl.Int64,
+    "Integer": pl.Int64,
+    "OptionalInteger": pl.Int64,
+    "Boolean": pl.Boolean,
+    "OptionalBoolean": pl.Boolean,
+}
+
+
+def is_aws_cur_manifest(path: str) -> bool:
+    return os.path.isfile(path) and path.endswith(MANIFEST_FILE_SUFFIX)
+
+
+class ManifestColumn(BaseModel):
+    category: str
+    name: str
+    type: Optional[str] = None
+
+    @property
+    def column_name(self) -> str:
+        # column names in CUR csv headers are written as category/name, e.g. lineItem/UnblendedCost
+        return f"{self.category}/{self.name}"
+
+
+class ManifestBillingPeriod(BaseModel):
+    # formatted as 20230101T000000.000Z
+    start: str
+    end: str
+
+
+class AWSCURManifest(BaseModel):
+    columns: List[ManifestColumn] = []
+    report_keys: List[str] = Field(default_factory=list, alias="reportKeys")
+    billing_period: Optional[ManifestBillingPeriod] = Field(
+        default=None, alias="billingPeriod"
+    )
+    compression: Optional[str] = None
+    content_type: Optional[str] = Field(default=None, alias="contentType")
+
+    # local path of the manifest, used to resolve report keys
+    manifest_path: Optional[str] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @classmethod
+    def load(cls, manifest_path: str) -> "AWSCURManifest":
+        with open(manifest_path) as fd:
+            manifest = cls.model_validate(json.load(fd))
+        manifest.manifest_path = manifest_path
+
+        if manifest.content_type and manifest.content_type != "text/csv":
+            raise NotImplementedError(
+                f"CUR manifest content type: {manifest.content_type} not supported"
+            )
+        return manifest
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.column_name for column in self.columns]
+
+    @property
+    def column_dtypes(self) -> Dict[str, pl.PolarsDataType]:
+        return {
+            column.column_name: MANIFEST_COLUMN_DTYPES.get(column.type, pl.Utf8)
+            for column in self.columns
+        }
+
+    def __resolve_report_key__(self, report_key: str) -> str:
+        # report keys are s3 keys that include the report path prefix, the synced local copy
+        # can be rooted anywhere so the longest key suffix found under the manifest directory is used
+        manifest_directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        key_parts = report_key.split("/")
+
+        for index in range(len(key_parts)):
+            report_path = os.path.join(manifest_directory, *key_parts[index:])
+            if os.path.isfile(report_path):
+                return report_path
+
+        raise FileNotFoundError(
+            f"Report key: {report_key} listed in manifest not found under {manifest_directory}"
+        )
+
+    def report_paths(self) -> List[str]:
+        return [
+            self.__resolve_report_key__(report_key) for report_key in self.report_keys
+        ]
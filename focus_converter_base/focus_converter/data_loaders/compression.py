@@ -0,0 +1,43 @@
+from typing import Optional
+
+import pyarrow
+
+# leading bytes of compressed files, compression is detected from file contents since
+# provider exports are often renamed or stored without an extension
+COMPRESSION_MAGIC_BYTES = {
+    "gzip": b"\x1f\x8b",
+    "zstd": b"\x28\xb5\x2f\xfd",
+    "bz2": b"BZh",
+}
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """
+    Detects compression codec of a file from its magic bytes.
+
+    :param path: str, path of the file
+    :return: str, pyarrow codec name or None if the file is not compressed
+    """
+
+    with open(path, "rb") as fd:
+        header = fd.read(max(map(len, COMPRESSION_MAGIC_BYTES.values())))
+
+    for compression, magic_bytes in COMPRESSION_MAGIC_BYTES.items():
+        if header.startswith(magic_bytes):
+            return compression
+    return None
+
+
+def open_input_stream(path: str, compression: Optional[str] = None):
+    """
+    Opens a file as a pyarrow input stream, compressed files are decompressed as they are read
+    so that only the bytes being consumed are held in memory.
+
+    :param path: str, path of the file
+    :param compression: str, codec name as returned by detect_compression
+    :return: pyarrow.NativeFile
+    """
+
+    if compression is None:
+        return pyarrow.OSFile(path)
+    return pyarrow.CompressedInputStream(pyarrow.OSFile(path), compression)
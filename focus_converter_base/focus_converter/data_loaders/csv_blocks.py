@@ -0,0 +1,67 @@
+from typing import BinaryIO, Iterable, Optional, Tuple
+
+QUOTE_CHAR = b'"'
+NEW_LINE = b"\n"
+
+
+def __find_record_end__(
+    data: bytes, start: int = 0, last: bool = False
+) -> Optional[int]:
+    # finds the offset just past a new line that is not inside a quoted field, data is assumed to
+    # start at a record boundary. Escaped quotes ("") toggle the quote state twice so counting
+    # quotes up to a new line tells whether the new line is quoted.
+
+    if last:
+        new_line = data.rfind(NEW_LINE, start)
+        while new_line != -1:
+            if data.count(QUOTE_CHAR, start, new_line) % 2 == 0:
+                return new_line + 1
+            new_line = data.rfind(NEW_LINE, start, new_line)
+    else:
+        new_line = data.find(NEW_LINE, start)
+        while new_line != -1:
+            if data.count(QUOTE_CHAR, start, new_line) % 2 == 0:
+                return new_line + 1
+            new_line = data.find(NEW_LINE, new_line + 1)
+    return None
+
+
+def split_csv_header(block: bytes) -> Tuple[bytes, bytes]:
+    """
+    Splits the header record from the first block of a csv file.
+
+    :param block: bytes, first block as returned by iter_csv_record_blocks
+    :return: Tuple[bytes, bytes], header record and the remaining records
+    """
+
+    header_end = __find_record_end__(block)
+    if header_end is None:
+        return block, b""
+    return block[:header_end], block[header_end:]
+
+
+def iter_csv_record_blocks(fd: BinaryIO, block_size: int) -> Iterable[bytes]:
+    """
+    Reads a csv file in blocks of roughly block_size bytes, each block ends on a record boundary so
+    that it can be parsed on its own. New lines inside quoted fields are never used as boundaries.
+
+    :param fd: BinaryIO, file opened in binary mode
+    :param block_size: int, number of bytes read at a time
+    :return: Iterable[bytes], blocks of whole records in file order
+    """
+
+    buffer = b""
+    while True:
+        data = fd.read(block_size)
+        if not data:
+            if buffer:
+                yield buffer
+            return
+
+        buffer += data
+
+        # a single record larger than block size is accumulated until its end is read
+        record_end = __find_record_end__(buffer, last=True)
+        if record_end is not None:
+            yield buffer[:record_end]
+            buffer = buffer[record_end:]
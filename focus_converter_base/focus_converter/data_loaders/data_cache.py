@@ -0,0 +1,99 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, List
+from uuid import uuid4
+
+import polars as pl
+
+CACHE_FILE_TEMPLATE = "part-{index:06d}.arrow"
+
+
+def source_file_stats(data_path: str) -> List[List[Any]]:
+    """
+    Lists path, size and modification time of every file under a data path, which can be a file,
+    a directory or a glob pattern. Any change to the source data changes these stats.
+
+    :param data_path: str, source data path
+    :return: List[List[Any]], sorted list of [path, size, mtime_ns]
+    """
+
+    if glob.escape(data_path) != data_path:
+        paths = glob.glob(data_path, recursive=True)
+    elif os.path.isdir(data_path):
+        paths = [
+            os.path.join(root, file_name)
+            for root, _, file_names in os.walk(data_path)
+            for file_name in file_names
+        ]
+    else:
+        paths = [data_path]
+
+    file_stats = []
+    for path in sorted(paths):
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            file_stats.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return file_stats
+
+
+class DataCache:
+    """
+    Cache of decoded source batches stored as uncompressed arrow ipc files, one file per batch,
+    which are memory mapped when read back. Entries are keyed by a hash of the source file stats,
+    reader options and plans applied before the batches are stored.
+    """
+
+    def __init__(self, cache_dir: str, cache_key_args: Dict[str, Any]):
+        self.__cache_dir__ = cache_dir
+
+        cache_key = hashlib.sha256(
+            json.dumps(cache_key_args, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        self.__entry_path__ = os.path.join(cache_dir, cache_key)
+
+    @property
+    def is_cached(self) -> bool:
+        return os.path.isdir(self.__entry_path__)
+
+    def read(self) -> Iterable[pl.LazyFrame]:
+        file_names = sorted(os.listdir(self.__entry_path__))
+        for file_name in file_names:
+            yield pl.scan_ipc(
+                os.path.join(self.__entry_path__, file_name), memory_map=True
+            )
+
+    def write(self, batches: Iterable[pl.LazyFrame]) -> Iterable[pl.LazyFrame]:
+        """
+        Stores batches while passing them through. Batches are written to a temporary directory
+        that is renamed into place only once all batches are written, so partially written entries
+        are never read.
+
+        :param batches: Iterable[pl.LazyFrame], batches to be stored
+        :return: Iterable[pl.LazyFrame], collected batches
+        """
+
+        os.makedirs(self.__cache_dir__, exist_ok=True)
+        temp_entry_path = f"{self.__entry_path__}.tmp-{uuid4().hex}"
+        os.makedirs(temp_entry_path)
+
+        try:
+            for index, lf in enumerate(batches):
+                df = lf.collect()
+                df.write_ipc(
+                    os.path.join(
+                        temp_entry_path, CACHE_FILE_TEMPLATE.format(index=index)
+                    ),
+                    compression="uncompressed",
+                )
+                yield df.lazy()
+
+            try:
+                os.rename(temp_entry_path, self.__entry_path__)
+            except OSError:
+                # entry written by a concurrent run
+                pass
+        finally:
+            shutil.rmtree(temp_entry_path, ignore_errors=True)
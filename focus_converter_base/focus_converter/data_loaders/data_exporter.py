@@ -82,6 +82,10 @@ class DataExporter:
         # start processes
         [p.start() for p in processes]
 
+    @property
+    def include_source_columns(self) -> bool:
+        return self.__export_include_source_columns__
+
     def __del__(self):
         if self.__queue__:
             self.close()
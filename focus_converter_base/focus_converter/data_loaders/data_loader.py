@@ -1,10 +1,40 @@
+import glob
+import io
+import itertools
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Iterable
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 import polars as pl
+import pyarrow
+import pyarrow.csv as pacsv
 import pyarrow.dataset as ds
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
+from focus_converter.data_loaders.aws_cur_manifest import AWSCURManifest
+from focus_converter.data_loaders.compression import (
+    detect_compression,
+    open_input_stream,
+)
+from focus_converter.data_loaders.csv_blocks import (
+    iter_csv_record_blocks,
+    split_csv_header,
+)
+from focus_converter.data_loaders.data_cache import source_file_stats
+from focus_converter.data_loaders.delta_log import (
+    DeltaDataFile,
+    DeltaTableLog,
+    cast_partition_values,
+)
+from focus_converter.data_loaders.partitioning import BillingPeriodRange
+
 # these values need to be tweaked, for datasets with small number of columns,
 # following values can be much larger.
 # for very fragments with large number of row groups, this will cause memory to exhaust
@@ -12,10 +42,157 @@ DEFAULT_BATCH_READ_SIZE = 50000
 FRAGMENT_READ_AHEAD = 0
 BATCH_READ_AHEAD = 0
 
+# uncompressed csv files are split into blocks of whole records of roughly this many bytes, which
+# are parsed in parallel. Peak memory is bound by the number of workers times block size.
+CSV_BYTE_RANGE_SIZE = 16 << 20
+CSV_PARSE_WORKERS = os.cpu_count() or 1
+
+# file name suffixes of csv files read from a directory, compressed files are detected by contents
+CSV_FILE_SUFFIXES = (".csv", ".csv.gz", ".csv.bz2", ".csv.zst", ".csv.zstd")
+
+# compressed csv files are decompressed as a stream and parsed in blocks of this many bytes,
+# schema is inferred once from the first rows of a sample read from the head of the stream
+CSV_STREAM_BLOCK_SIZE = 16 << 20
+CSV_SCHEMA_SAMPLE_SIZE = 1 << 20
+CSV_SCHEMA_INFER_ROWS = 100
+
+# json lines files are decoded in blocks of whole lines of roughly this many bytes,
+# schema is inferred from the first block and applied to all blocks
+NDJSON_BLOCK_SIZE = 16 << 20
+
+# number of files read in parallel, each worker streams one file and holds at most
+# PARALLEL_FILE_READ_AHEAD of its batches in memory until they are yielded
+PARALLEL_FILE_READ_WORKERS = min(4, os.cpu_count() or 1)
+PARALLEL_FILE_READ_AHEAD = 2
+
+
+def __ordered_parallel_map__(
+    func: Callable, items: Iterable, max_workers: int = PARALLEL_FILE_READ_WORKERS
+) -> Iterable:
+    # maps items on a thread pool and yields results in input order, at most max_workers items are
+    # in flight so memory stays bound by the number of workers and not the number of items
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = deque()
+        for item in items:
+            futures.append(executor.submit(func, item))
+            if len(futures) >= max_workers:
+                yield futures.popleft().result()
+
+        while futures:
+            yield futures.popleft().result()
+
+
+def __ordered_parallel_batches__(
+    func: Callable[[Any], Iterable],
+    items: Iterable,
+    max_workers: int = PARALLEL_FILE_READ_WORKERS,
+) -> Iterable:
+    # streams batches of items on a thread pool and yields them in item order. Each worker passes
+    # the batches of its item through a bounded queue, so memory stays bound by the number of
+    # workers times the read ahead and not by the size of an item.
+
+    end_of_item = object()
+    stopped = threading.Event()
+
+    def put(batches: queue.Queue, batch) -> bool:
+        # waits for the consumer unless the consumer has stopped
+        while not stopped.is_set():
+            try:
+                batches.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def stream_item(item, batches: queue.Queue):
+        try:
+            for batch in func(item):
+                if not put(batches, batch):
+                    return
+        finally:
+            put(batches, end_of_item)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            in_flight = deque()
+            items = iter(items)
+            for item in itertools.islice(items, max_workers):
+                batches = queue.Queue(maxsize=PARALLEL_FILE_READ_AHEAD)
+                in_flight.append((executor.submit(stream_item, item, batches), batches))
+
+            while in_flight:
+                future, batches = in_flight.popleft()
+                while True:
+                    batch = batches.get()
+                    if batch is end_of_item:
+                        break
+                    yield batch
+                # raises errors of the worker
+                future.result()
+
+                for item in itertools.islice(items, 1):
+                    batches = queue.Queue(maxsize=PARALLEL_FILE_READ_AHEAD)
+                    in_flight.append(
+                        (executor.submit(stream_item, item, batches), batches)
+                    )
+        finally:
+            stopped.set()
+
+
+def __glob_base_path__(data_path: str) -> str:
+    # leading directories of a glob pattern, which don't contain wildcards
+    if glob.escape(data_path) == data_path:
+        return data_path
+
+    base_parts = []
+    for part in data_path.split(os.sep):
+        if glob.escape(part) != part:
+            break
+        base_parts.append(part)
+    return os.sep.join(base_parts) or os.curdir
+
+
+def list_csv_files(data_path: str) -> List[str]:
+    """
+    Lists csv files for a data path, which can be a file, a directory that is searched recursively
+    for csv files or a glob pattern.
+
+    :param data_path: str, path of a file, directory or a glob pattern
+    :return: List[str], sorted list of file paths
+    """
+
+    if glob.escape(data_path) != data_path:
+        data_paths = [
+            path
+            for path in glob.glob(data_path, recursive=True)
+            if os.path.isfile(path)
+        ]
+    elif os.path.isdir(data_path):
+        data_paths = []
+        for root, directories, file_names in os.walk(data_path):
+            # hidden and metadata directories, like _delta_log or .cache, are skipped
+            directories[:] = [
+                directory
+                for directory in directories
+                if not directory.startswith((".", "_"))
+            ]
+            data_paths += [
+                os.path.join(root, file_name)
+                for file_name in file_names
+                if file_name.lower().endswith(CSV_FILE_SUFFIXES)
+            ]
+    else:
+        return [data_path]
+
+    return sorted(data_paths)
+
 
 class DataFormats(Enum):
     CSV = "csv"
     PARQUET = "parquet"
+    AWS_CUR_MANIFEST = "aws-cur-manifest"
+    NDJSON = "ndjson"
 
 
 class ParquetDataFormat(Enum):
@@ -30,24 +207,228 @@ class DataLoader:
         data_path: str,
         data_format: DataFormats,
         parquet_data_format: ParquetDataFormat = None,
+        delta_table_version: Optional[int] = None,
+        billing_period_from: Optional[str] = None,
+        billing_period_to: Optional[str] = None,
     ):
         self.__data_path__ = data_path
         self.__data_format__ = data_format
         self.__parquet_data_format__ = parquet_data_format
+        self.__delta_table_version__ = delta_table_version
+        self.__billing_period_range__ = BillingPeriodRange(
+            billing_period_from=billing_period_from,
+            billing_period_to=billing_period_to,
+        )
+
+        # column dtypes declared by the conversion plan, applied by csv readers
+        self.__column_dtypes__: Dict[str, pl.PolarsDataType] = {}
+
+        # source columns read by the conversion plan, all columns are read if not set
+        self.__columns__: Optional[List[str]] = None
+
+    def configure_column_dtypes(self, column_dtypes: Dict[str, pl.PolarsDataType]):
+        self.__column_dtypes__ = column_dtypes
+
+    def configure_columns(self, columns: Optional[List[str]]):
+        self.__columns__ = columns
+
+    def __project_columns__(self, column_names: Iterable[str]) -> List[str]:
+        # columns to be read out of the columns present in source, in source order. source without
+        # any of the configured columns is read whole, so that missing columns are still reported
+        column_names = list(column_names)
+        if self.__columns__ is None:
+            return column_names
+
+        projected_column_names = [
+            column_name
+            for column_name in column_names
+            if column_name in self.__columns__
+        ]
+        return projected_column_names or column_names
+
+    def cache_key_args(self) -> Dict[str, Any]:
+        # source file stats and reader options that decide the batches produced by data scanner
+        file_stats = source_file_stats(self.__data_path__)
+        if self.__data_format__ == DataFormats.AWS_CUR_MANIFEST:
+            # report files listed in the manifest can be replaced without changing the manifest
+            file_stats += [
+                stats
+                for report_path in AWSCURManifest.load(
+                    self.__data_path__
+                ).report_paths()
+                for stats in source_file_stats(report_path)
+            ]
+
+        return {
+            "source_file_stats": file_stats,
+            "data_format": self.__data_format__,
+            "parquet_data_format": self.__parquet_data_format__,
+            "delta_table_version": self.__delta_table_version__,
+            "columns": self.__columns__,
+            "billing_period_range": [
+                self.__billing_period_range__.start,
+                self.__billing_period_range__.end,
+            ],
+        }
 
     def load_pyarrow_dataset(self) -> Iterable[pl.LazyFrame]:
-        dataset = ds.dataset(self.__data_path__)
+        billing_period_range = self.__billing_period_range__
+        if not billing_period_range.is_bounded:
+            dataset = ds.dataset(self.__data_path__)
+            dataset_filter = None
+            columns = self.__project_columns__(dataset.schema.names)
+        else:
+            # hive partitions (year=/month=, BILLING_PERIOD=) are discovered as fields so that the
+            # billing period range can be pushed down as a filter and pruned fragments are never read
+            dataset = ds.dataset(self.__data_path__, partitioning="hive")
+
+            # discovered partition fields are the ones not stored in the data files
+            fragment = next(dataset.get_fragments(), None)
+            physical_names = (
+                fragment.physical_schema.names if fragment else dataset.schema.names
+            )
+            partition_schema = pyarrow.schema(
+                [field for field in dataset.schema if field.name not in physical_names]
+            )
+            dataset_filter = billing_period_range.dataset_filter(
+                partition_schema=partition_schema
+            )
+
+            if dataset_filter is None:
+                # not hive partitioned, prune by date range directories like /20230101-20230201/
+                files = billing_period_range.filter_paths(
+                    dataset.files, base_path=self.__data_path__
+                )
+                if len(files) != len(dataset.files):
+                    dataset = ds.dataset(files, format=dataset.format)
+
+            # discovered partition fields are only used for pruning, source columns are kept as is
+            columns = self.__project_columns__(
+                name
+                for name in dataset.schema.names
+                if name not in partition_schema.names
+            )
+
         scanner = dataset.scanner(
+            columns=columns,
+            filter=dataset_filter,
             batch_size=DEFAULT_BATCH_READ_SIZE,
             use_threads=True,
             fragment_readahead=FRAGMENT_READ_AHEAD,
             batch_readahead=BATCH_READ_AHEAD,
         )
 
-        total_rows = dataset.count_rows()
+        total_rows = dataset.count_rows(filter=dataset_filter)
+
+        yield from self.__yield_record_batches__(
+            batches=scanner.to_batches(), total_rows=total_rows
+        )
+
+    def load_parquet_file(self) -> Iterable[pl.LazyFrame]:
+        # reads parquet file from data path row group by row group, so that only a batch is held
+        # in memory at a time. Total row count is read from the footer metadata without a scan.
+
+        parquet_file = pq.ParquetFile(self.__data_path__)
+        total_rows = parquet_file.metadata.num_rows
+
+        yield from self.__yield_record_batches__(
+            batches=parquet_file.iter_batches(
+                batch_size=DEFAULT_BATCH_READ_SIZE,
+                columns=self.__project_columns__(parquet_file.schema_arrow.names),
+                use_threads=True,
+            ),
+            total_rows=total_rows,
+        )
+
+    def load_delta_table(self) -> Iterable[pl.LazyFrame]:
+        # reads only the files live at the requested table version as recorded in the delta log,
+        # tombstoned and superseded files present on disk are never read
+
+        delta_log = DeltaTableLog(table_path=self.__data_path__)
+        delta_files = delta_log.load(version=self.__delta_table_version__)
+
+        # prune files whose partition values or min/max stats fall outside the billing period range
+        delta_files = [
+            delta_file
+            for delta_file in delta_files
+            if self.__billing_period_range__.partition_values_match(
+                delta_file.partition_values
+            )
+            and (
+                delta_file.stats is None
+                or self.__billing_period_range__.stats_match(
+                    min_values=delta_file.stats.min_values,
+                    max_values=delta_file.stats.max_values,
+                )
+            )
+        ]
+
+        # row counts are taken from the log stats when available for every file
+        row_counts = [
+            delta_file.stats.num_records if delta_file.stats else None
+            for delta_file in delta_files
+        ]
+        total_rows = None if None in row_counts else sum(row_counts)
+
+        # skip files that are known to be empty
+        delta_files = [
+            delta_file
+            for delta_file, row_count in zip(delta_files, row_counts)
+            if row_count != 0
+        ]
+
+        yield from self.__yield_record_batches__(
+            batches=self.__iter_delta_file_batches__(
+                delta_files=delta_files,
+                partition_column_types=delta_log.partition_column_types,
+            ),
+            total_rows=total_rows,
+        )
+
+    def __iter_delta_file_batches__(
+        self, delta_files: List[DeltaDataFile], partition_column_types
+    ) -> Iterable[pyarrow.RecordBatch]:
+        for delta_file in delta_files:
+            parquet_file = pq.ParquetFile(delta_file.path)
+            file_column_names = parquet_file.schema_arrow.names
+            columns = self.__project_columns__(
+                file_column_names + list(partition_column_types.keys())
+            )
+
+            for batch in parquet_file.iter_batches(
+                batch_size=DEFAULT_BATCH_READ_SIZE,
+                columns=[
+                    column_name
+                    for column_name in columns
+                    if column_name in file_column_names
+                ],
+                use_threads=True,
+            ):
+                # partition columns are not stored in the data files, add them from the log
+                for column_name, column_type in partition_column_types.items():
+                    if column_name in batch.schema.names or column_name not in columns:
+                        continue
+
+                    partition_value = delta_file.partition_values.get(column_name)
+                    batch = pyarrow.RecordBatch.from_arrays(
+                        batch.columns
+                        + [
+                            cast_partition_values(
+                                [partition_value] * batch.num_rows, column_type
+                            )
+                        ],
+                        names=batch.schema.names + [column_name],
+                    )
+                yield batch
+
+    @staticmethod
+    def __yield_record_batches__(
+        batches: Iterable[pyarrow.RecordBatch], total_rows: int = None
+    ) -> Iterable[pl.LazyFrame]:
+        # converts arrow record batches to lazy frames while reporting progress
 
         with tqdm(total=total_rows) as pobj:
-            for batch in scanner.to_batches():
+            for batch in batches:
                 df = pl.from_arrow(batch)
 
                 # skip if number of rows empty
@@ -57,29 +438,366 @@ class DataLoader:
                 yield df.lazy()
                 pobj.update(df.shape[0])
 
-    def load_parquet_file(self) -> Iterable[pl.LazyFrame]:
-        # reads parquet from data path and returns a lazy object
+    @staticmethod
+    def __infer_csv_schema__(
+        data_path: str, compression: str
+    ) -> Dict[str, pl.DataType]:
+        # infers csv schema from a sample of the decompressed head, the last line is dropped
+        # from the sample as it may be cut midway
+
+        with open_input_stream(data_path, compression=compression) as stream:
+            sample = stream.read(CSV_SCHEMA_SAMPLE_SIZE)
+            if len(sample) == CSV_SCHEMA_SAMPLE_SIZE:
+                sample = sample[: sample.rfind(b"\n") + 1]
+
+        return pl.read_csv(
+            io.BytesIO(sample),
+            n_rows=CSV_SCHEMA_INFER_ROWS,
+            infer_schema_length=CSV_SCHEMA_INFER_ROWS,
+            try_parse_dates=False,
+            ignore_errors=True,
+            truncate_ragged_lines=True,
+        ).schema
+
+    def __csv_schema__(
+        self,
+        data_path: str,
+        compression: Optional[str],
+        schema: Optional[Dict[str, pl.PolarsDataType]] = None,
+    ) -> Dict[str, pl.PolarsDataType]:
+        # inferred schema with dtypes declared by the conversion plan taking precedence,
+        # so that declared columns are parsed into their final types while reading. Columns of
+        # a file read with a schema shared by more files are typed by that schema, columns it
+        # doesn't list are read as strings.
+        inferred_schema = self.__infer_csv_schema__(data_path, compression)
+        if schema is not None:
+            return {
+                column_name: schema.get(column_name, pl.Utf8)
+                for column_name in inferred_schema
+            }
+
+        schema = inferred_schema
+        for column_name, dtype in self.__column_dtypes__.items():
+            if column_name in schema:
+                schema[column_name] = dtype
+        return schema
 
-        yield pl.read_parquet(self.__data_path__).lazy()
+    @staticmethod
+    def __cast_csv_string_columns__(
+        df: pl.DataFrame, schema: Dict[str, pl.DataType]
+    ) -> pl.DataFrame:
+        # values that fail to cast are set to null, same as ignore_errors in the polars csv reader
+        column_exprs = []
+        for column_name, dtype in schema.items():
+            if dtype == pl.Utf8 or column_name not in df.columns:
+                continue
+
+            if dtype == pl.Boolean:
+                # polars doesn't cast strings to booleans
+                value = pl.col(column_name).str.to_lowercase()
+                column_exprs.append(
+                    pl.when(value == "true")
+                    .then(True)
+                    .when(value == "false")
+                    .then(False)
+                    .otherwise(None)
+                    .alias(column_name)
+                )
+            else:
+                column_exprs.append(pl.col(column_name).cast(dtype, strict=False))
+
+        return df.with_columns(column_exprs)
+
+    @staticmethod
+    def __open_compressed_csv_reader__(
+        data_path: str,
+        compression: str,
+        column_names: Iterable[str],
+        include_columns: Optional[List[str]] = None,
+    ) -> pacsv.CSVStreamingReader:
+        # pyarrow reader decompresses and reads ahead on a background thread while blocks already
+        # read are parsed, all columns are read as strings to avoid type mismatches between blocks.
+        # columns not included are skipped without being converted.
+        return pacsv.open_csv(
+            open_input_stream(data_path, compression=compression),
+            read_options=pacsv.ReadOptions(
+                block_size=CSV_STREAM_BLOCK_SIZE, use_threads=True
+            ),
+            parse_options=pacsv.ParseOptions(invalid_row_handler=lambda _: "skip"),
+            convert_options=pacsv.ConvertOptions(
+                column_types={
+                    column_name: pyarrow.string() for column_name in column_names
+                },
+                include_columns=include_columns,
+                strings_can_be_null=True,
+            ),
+        )
+
+    def __iter_csv_stream_batches__(
+        self,
+        data_path: str,
+        compression: Optional[str],
+        schema: Optional[Dict[str, pl.PolarsDataType]] = None,
+    ) -> Iterable[pl.DataFrame]:
+        # reads csv, compressed or not, as a stream so that only a few blocks are in memory,
+        # string columns are cast to the schema inferred from the head of the stream
+
+        schema = self.__csv_schema__(data_path, compression, schema=schema)
+        reader = self.__open_compressed_csv_reader__(
+            data_path,
+            compression=compression,
+            column_names=schema.keys(),
+            include_columns=self.__project_columns__(schema.keys()),
+        )
+
+        for batch in reader:
+            # skip if number of rows empty
+            if batch.num_rows == 0:
+                continue
+
+            yield self.__cast_csv_string_columns__(pl.from_arrow(batch), schema)
+
+    def load_compressed_csv(
+        self, data_path: str, compression: str
+    ) -> Iterable[pl.LazyFrame]:
+        with tqdm(unit=" rows") as pobj:
+            for df in self.__iter_csv_stream_batches__(
+                data_path, compression=compression
+            ):
+                yield df.lazy()
+                pobj.update(df.shape[0])
+
+    def __iter_csv_file_batches__(
+        self,
+        data_path: str,
+        schema: Optional[Dict[str, pl.PolarsDataType]] = None,
+        parse_workers: int = CSV_PARSE_WORKERS,
+    ) -> Iterable[pl.DataFrame]:
+        # reads a single csv file in batches, schema is inferred once from the head of the file
+        # and shared by all batches. uncompressed files are split into blocks on record boundaries
+        # that are parsed in parallel and yielded in file order.
+
+        compression = detect_compression(data_path)
+        if compression is not None:
+            yield from self.__iter_csv_stream_batches__(
+                data_path, compression=compression, schema=schema
+            )
+            return
+
+        schema = self.__csv_schema__(data_path, compression=None, schema=schema)
+        columns = self.__project_columns__(schema.keys())
+
+        with open(data_path, "rb") as fd:
+            blocks = iter_csv_record_blocks(fd, block_size=CSV_BYTE_RANGE_SIZE)
+            header, first_block = split_csv_header(next(blocks, b""))
+
+            def parse_block(block: bytes) -> pl.DataFrame:
+                # every block is parsed with the header and the schema inferred from the head,
+                # columns not read by the conversion plan are skipped by the parser
+                return pl.read_csv(
+                    io.BytesIO(header + block),
+                    columns=columns,
+                    dtypes={
+                        column_name: schema[column_name] for column_name in columns
+                    },
+                    try_parse_dates=False,
+                    ignore_errors=True,
+                )
+
+            for df in __ordered_parallel_map__(
+                parse_block,
+                itertools.chain([first_block], blocks),
+                max_workers=parse_workers,
+            ):
+                yield from df.iter_slices(n_rows=DEFAULT_BATCH_READ_SIZE)
+
+    def load_csv_file(self, data_path: str) -> Iterable[pl.LazyFrame]:
+        with tqdm(unit=" rows") as pobj:
+            for df in self.__iter_csv_file_batches__(data_path):
+                yield df.lazy()
+                pobj.update(df.shape[0])
+
+    def load_csv_files(self, data_paths: List[str]) -> Iterable[pl.LazyFrame]:
+        # streams csv files on a worker pool, one file per worker, and yields batches in file
+        # order. schema is inferred once from the first file so that batches of all files share
+        # it. block parse workers are split between files, so memory stays bound by the total
+        # number of workers and not by file size.
+
+        schema = self.__csv_schema__(
+            data_paths[0], compression=detect_compression(data_paths[0])
+        )
+
+        def read_csv_file(data_path: str) -> Iterable[pl.DataFrame]:
+            return self.__iter_csv_file_batches__(
+                data_path,
+                schema=schema,
+                parse_workers=max(1, CSV_PARSE_WORKERS // PARALLEL_FILE_READ_WORKERS),
+            )
+
+        with tqdm(unit=" rows") as pobj:
+            for df in __ordered_parallel_batches__(read_csv_file, data_paths):
+                yield df.lazy()
+                pobj.update(df.shape[0])
 
     def load_csv(self) -> Iterable[pl.LazyFrame]:
-        # reads csv from data path and returns a lazy object
+        # reads csv from data path, which can be a file, a directory or a glob pattern,
+        # and returns an iterator of lazy objects
+
+        data_paths = list_csv_files(self.__data_path__)
+        if data_paths != [self.__data_path__]:
+            # files in billing period directories outside the range are not read
+            data_paths = self.__billing_period_range__.filter_paths(
+                data_paths, base_path=__glob_base_path__(self.__data_path__)
+            )
+
+        if not data_paths:
+            logging.warning(f"No csv files to convert found in {self.__data_path__}")
+        elif len(data_paths) == 1:
+            yield from self.load_csv_file(data_paths[0])
+        else:
+            yield from self.load_csv_files(data_paths)
+
+    @staticmethod
+    def __json_schema_fields__(fields: Iterable[pyarrow.Field]) -> List[pyarrow.Field]:
+        # fields only seen with null values have no known type yet, they are left out of the
+        # explicit schema so that their type can be inferred from values in later blocks.
+        # json numbers are read as floats, as a block with only whole numbers infers integers.
+        known_fields = []
+        for field in fields:
+            if pyarrow.types.is_null(field.type):
+                continue
+            elif pyarrow.types.is_integer(field.type):
+                field = field.with_type(pyarrow.float64())
+            elif pyarrow.types.is_struct(field.type):
+                field = field.with_type(
+                    pyarrow.struct(DataLoader.__json_schema_fields__(field.type))
+                )
+            elif pyarrow.types.is_list(field.type):
+                value_fields = DataLoader.__json_schema_fields__(
+                    [field.type.value_field]
+                )
+                if not value_fields:
+                    continue
+                field = field.with_type(pyarrow.list_(value_fields[0]))
+            known_fields.append(field)
+        return known_fields
+
+    @staticmethod
+    def __read_json_block__(
+        block: bytes, schema: Optional[pyarrow.Schema]
+    ) -> pyarrow.Table:
+        return pajson.read_json(
+            io.BytesIO(block),
+            parse_options=pajson.ParseOptions(
+                explicit_schema=schema, unexpected_field_behavior="infer"
+            ),
+        )
+
+    def load_ndjson(self) -> Iterable[pl.LazyFrame]:
+        # reads newline delimited json, like BigQuery billing exports, as a stream of blocks of
+        # whole lines. nested objects and arrays are decoded into arrow structs and lists.
+        # field types inferred from a block are enforced on all following blocks.
+
+        compression = detect_compression(self.__data_path__)
+        schema = None
+
+        with open_input_stream(
+            self.__data_path__, compression=compression
+        ) as stream, tqdm(unit=" rows") as pobj:
+            remainder = b""
+            while True:
+                data = stream.read(NDJSON_BLOCK_SIZE)
+                block = remainder + data
+
+                # new lines can't appear inside json values, so any new line is a record boundary
+                if data:
+                    block_end = block.rfind(b"\n") + 1
+                    block, remainder = block[:block_end], block[block_end:]
+                elif not block.strip():
+                    break
+                else:
+                    remainder = b""
+
+                if not block.strip():
+                    continue
+
+                table = self.__read_json_block__(block, schema)
 
-        yield pl.read_csv(
-            self.__data_path__, try_parse_dates=False, ignore_errors=True
-        ).lazy()
+                # types of fields seen so far are enforced on the following blocks, a block that
+                # has new fields is decoded again so that it is read with the same types
+                block_schema = pyarrow.schema(self.__json_schema_fields__(table.schema))
+                if schema is None or block_schema != schema:
+                    schema = block_schema
+                    table = self.__read_json_block__(block, schema)
+
+                # json decoder has no projection, unused fields are dropped after decoding
+                df = pl.from_arrow(
+                    table.select(self.__project_columns__(table.column_names))
+                )
+                yield df.lazy()
+                pobj.update(df.shape[0])
+
+    def load_aws_cur_manifest(self) -> Iterable[pl.LazyFrame]:
+        # reads report files listed in an AWS CUR manifest, column types are taken from the manifest
+        # so no type inference is done, report files are streamed in parallel and yielded in order
+
+        manifest = AWSCURManifest.load(self.__data_path__)
+
+        if (
+            manifest.billing_period
+            and not self.__billing_period_range__.partition_values_match(
+                {"billing_period": manifest.billing_period.start}
+            )
+        ):
+            logging.info(
+                f"Manifest billing period {manifest.billing_period.start} outside billing period range, skipping"
+            )
+            return
+
+        column_dtypes = {**manifest.column_dtypes, **self.__column_dtypes__}
+
+        def read_report_file(report_path: str) -> Iterable[pl.DataFrame]:
+            return self.__iter_csv_stream_batches__(
+                report_path,
+                compression=detect_compression(report_path),
+                schema=column_dtypes,
+            )
+
+        with tqdm(unit=" rows") as pobj:
+            for df in __ordered_parallel_batches__(
+                read_report_file, manifest.report_paths()
+            ):
+                yield df.lazy()
+                pobj.update(df.shape[0])
 
     def data_scanner(self) -> Iterable[pl.LazyFrame]:
         # helper function to read from different data formats and create an iterator of lazy frames
         # which then can be used to apply lazy eval plans
 
+        if self.__billing_period_range__.is_bounded and (
+            (
+                self.__data_format__ == DataFormats.CSV
+                and os.path.isfile(self.__data_path__)
+            )
+            or self.__parquet_data_format__ == ParquetDataFormat.FILE
+        ):
+            logging.warning(
+                "Billing period range ignored, single file inputs are not partitioned and will be fully converted"
+            )
+
         if self.__data_format__ == DataFormats.CSV:
             yield from self.load_csv()
+        elif self.__data_format__ == DataFormats.AWS_CUR_MANIFEST:
+            yield from self.load_aws_cur_manifest()
+        elif self.__data_format__ == DataFormats.NDJSON:
+            yield from self.load_ndjson()
         elif self.__data_format__ == DataFormats.PARQUET:
             if self.__parquet_data_format__ == ParquetDataFormat.FILE:
                 yield from self.load_parquet_file()
             elif self.__parquet_data_format__ == ParquetDataFormat.DATASET:
                 yield from self.load_pyarrow_dataset()
+            elif self.__parquet_data_format__ == ParquetDataFormat.DELTA:
+                yield from self.load_delta_table()
             else:
                 raise NotImplementedError(
                     f"Parquet format:{self.__parquet_data_format__} not implemented"
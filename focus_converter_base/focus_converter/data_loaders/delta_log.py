@@ -0,0 +1,251 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+import pyarrow
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pydantic import BaseModel, ConfigDict, Field
+
+DELTA_LOG_DIRECTORY = "_delta_log"
+COMMIT_FILE_PATTERN = re.compile(r"^(\d{20})\.json$")
+CHECKPOINT_FILE_PATTERN = re.compile(
+    r"^(\d{20})\.checkpoint(?:\.(\d{10})\.(\d{10}))?\.parquet$"
+)
+
+# delta primitive types mapped to arrow types, used to type partition values which are
+# stored as strings in the log and are not part of the data files
+DELTA_PRIMITIVE_TYPES = {
+    "string": pyarrow.string(),
+    "long": pyarrow.int64(),
+    "integer": pyarrow.int32(),
+    "short": pyarrow.int16(),
+    "byte": pyarrow.int8(),
+    "double": pyarrow.float64(),
+    "float": pyarrow.float32(),
+    "boolean": pyarrow.bool_(),
+    "date": pyarrow.date32(),
+    "timestamp": pyarrow.timestamp("us", tz="UTC"),
+}
+
+# reader table features that don't change how live files are read, deletion vectors are
+# rejected per file when a file uses one
+SUPPORTED_READER_FEATURES = {"deletionVectors"}
+
+
+def cast_partition_values(
+    partition_values: List[Optional[str]], column_type: pyarrow.DataType
+) -> pyarrow.Array:
+    """
+    Casts partition values, stored as strings in the log, to the column type from the table schema.
+    Timestamps are stored as `YYYY-MM-DD HH:MM:SS[.ffffff]` without an offset and are in UTC.
+    """
+
+    values = pyarrow.array(partition_values, type=pyarrow.string())
+    if pyarrow.types.is_timestamp(column_type) and column_type.tz:
+        return pc.assume_timezone(
+            values.cast(pyarrow.timestamp(column_type.unit)), column_type.tz
+        )
+    return values.cast(column_type)
+
+
+class DeltaFileStats(BaseModel):
+    num_records: Optional[int] = Field(default=None, alias="numRecords")
+    min_values: Dict[str, Any] = Field(default_factory=dict, alias="minValues")
+    max_values: Dict[str, Any] = Field(default_factory=dict, alias="maxValues")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class DeltaDataFile(BaseModel):
+    # absolute path of the data file on local disk
+    path: str
+
+    # partition values as recorded in the log, values are always strings or null
+    partition_values: Dict[str, Optional[str]] = {}
+
+    size: Optional[int] = None
+    stats: Optional[DeltaFileStats] = None
+
+
+class DeltaTableLog:
+    """
+    Reads the transaction log of a local delta table and computes the set of data files that are
+    live at a given table version, along with per file statistics recorded in the log.
+    """
+
+    def __init__(self, table_path: str):
+        self.__table_path__ = table_path
+        self.__log_path__ = os.path.join(table_path, DELTA_LOG_DIRECTORY)
+
+        # partition column types, populated from the metaData action while replaying the log
+        self.partition_column_types: Dict[str, pyarrow.DataType] = {}
+
+    @staticmethod
+    def is_delta_table(table_path: str) -> bool:
+        return os.path.isdir(os.path.join(table_path, DELTA_LOG_DIRECTORY))
+
+    def __list_log_files__(self):
+        commits = {}
+        checkpoints = {}
+
+        for file_name in os.listdir(self.__log_path__):
+            commit_match = COMMIT_FILE_PATTERN.match(file_name)
+            checkpoint_match = CHECKPOINT_FILE_PATTERN.match(file_name)
+
+            if commit_match:
+                commits[int(commit_match.group(1))] = file_name
+            elif checkpoint_match:
+                version = int(checkpoint_match.group(1))
+                parts = int(checkpoint_match.group(3) or 1)
+                checkpoints.setdefault(version, {"parts": parts, "files": []})
+                checkpoints[version]["files"].append(file_name)
+
+        # ignore partially written multi-part checkpoints
+        checkpoints = {
+            version: sorted(checkpoint["files"])
+            for version, checkpoint in checkpoints.items()
+            if len(checkpoint["files"]) == checkpoint["parts"]
+        }
+        return commits, checkpoints
+
+    def latest_version(self) -> int:
+        commits, checkpoints = self.__list_log_files__()
+        versions = list(commits.keys()) + list(checkpoints.keys())
+        if not versions:
+            raise ValueError(f"No delta log entries found in {self.__log_path__}")
+        return max(versions)
+
+    def __resolve_data_file_path__(self, path: str) -> str:
+        parsed_path = urlparse(path)
+        if parsed_path.scheme == "file":
+            return unquote(parsed_path.path)
+        elif parsed_path.scheme:
+            raise NotImplementedError(f"Delta data file path not supported: {path}")
+        return os.path.join(self.__table_path__, unquote(path))
+
+    @staticmethod
+    def __apply_protocol_action__(protocol: Dict[str, Any]):
+        unsupported_features = set(protocol.get("readerFeatures") or []).difference(
+            SUPPORTED_READER_FEATURES
+        )
+        if unsupported_features:
+            raise NotImplementedError(
+                f"Delta reader features not supported: {sorted(unsupported_features)}"
+            )
+
+    def __apply_metadata_action__(self, metadata: Dict[str, Any]):
+        # mapped tables store columns under physical names in data files, which would be read as
+        # columns of the table
+        configuration = metadata.get("configuration") or {}
+        if isinstance(configuration, list):
+            configuration = dict(configuration)
+        column_mapping_mode = configuration.get("delta.columnMapping.mode", "none")
+        if column_mapping_mode != "none":
+            raise NotImplementedError(
+                f"Delta column mapping not supported, mode: {column_mapping_mode}"
+            )
+
+        schema = json.loads(metadata.get("schemaString") or "{}")
+        field_types = {
+            field["name"]: field["type"] for field in schema.get("fields", [])
+        }
+
+        self.partition_column_types = {
+            column: DELTA_PRIMITIVE_TYPES.get(field_types.get(column), pyarrow.string())
+            for column in metadata.get("partitionColumns") or []
+        }
+
+    def __apply_add_action__(self, live_files: Dict[str, DeltaDataFile], add_action):
+        if add_action.get("deletionVector"):
+            raise NotImplementedError(
+                f"Delta deletion vectors not supported, file: {add_action['path']}"
+            )
+
+        partition_values = add_action.get("partitionValues") or {}
+        if isinstance(partition_values, list):
+            # map types read from checkpoint files come as a list of key value pairs
+            partition_values = dict(partition_values)
+
+        stats = add_action.get("stats")
+        live_files[unquote(add_action["path"])] = DeltaDataFile(
+            path=self.__resolve_data_file_path__(add_action["path"]),
+            partition_values=partition_values,
+            size=add_action.get("size"),
+            stats=DeltaFileStats.model_validate(json.loads(stats)) if stats else None,
+        )
+
+    def __replay_checkpoint__(self, live_files, checkpoint_files: List[str]):
+        for checkpoint_file in checkpoint_files:
+            table = pq.read_table(os.path.join(self.__log_path__, checkpoint_file))
+
+            # tombstones in checkpoints are only kept for vacuum, live files are the add actions
+            for column_name in ["protocol", "metaData", "add"]:
+                if column_name not in table.column_names:
+                    continue
+
+                for action in table.column(column_name).to_pylist():
+                    if action is None:
+                        continue
+                    elif column_name == "protocol":
+                        self.__apply_protocol_action__(action)
+                    elif column_name == "metaData":
+                        self.__apply_metadata_action__(action)
+                    else:
+                        self.__apply_add_action__(live_files, action)
+
+    def __replay_commit__(self, live_files, commit_file: str):
+        with open(os.path.join(self.__log_path__, commit_file)) as fd:
+            for line in fd:
+                if not line.strip():
+                    continue
+
+                action = json.loads(line)
+                if "protocol" in action:
+                    self.__apply_protocol_action__(action["protocol"])
+                elif "metaData" in action:
+                    self.__apply_metadata_action__(action["metaData"])
+                elif "add" in action:
+                    self.__apply_add_action__(live_files, action["add"])
+                elif "remove" in action:
+                    live_files.pop(unquote(action["remove"]["path"]), None)
+
+    def load(self, version: Optional[int] = None) -> List[DeltaDataFile]:
+        """
+        Replays the log up to the given version, or latest if not specified, and returns live files.
+
+        :param version: int, table version to read
+        :return: List[DeltaDataFile], files that are not tombstoned at the requested version
+        """
+
+        commits, checkpoints = self.__list_log_files__()
+        latest_version = self.latest_version()
+
+        if version is None:
+            version = latest_version
+        elif version > latest_version:
+            raise ValueError(
+                f"Delta table version {version} not found, latest version is {latest_version}"
+            )
+
+        live_files: Dict[str, DeltaDataFile] = {}
+
+        # start from the most recent checkpoint at or before requested version and replay commits after it
+        checkpoint_versions = [v for v in checkpoints if v <= version]
+        if checkpoint_versions:
+            start_version = max(checkpoint_versions)
+            self.__replay_checkpoint__(live_files, checkpoints[start_version])
+            start_version += 1
+        else:
+            start_version = 0
+
+        for commit_version in range(start_version, version + 1):
+            if commit_version not in commits:
+                raise ValueError(
+                    f"Delta log is missing commit for version {commit_version}, cannot read version {version}"
+                )
+            self.__replay_commit__(live_files, commits[commit_version])
+
+        return list(live_files.values())
@@ -0,0 +1,228 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow
+import pyarrow.compute as pc
+
+# billing periods are passed in as YYYY-MM, and compared as YYYYMM strings or integers
+BILLING_PERIOD_PATTERN = re.compile(r"^(\d{4})-(\d{2})$")
+
+# partition keys, compared case-insensitively, that hold a billing period such as
+# BILLING_PERIOD=2023-01 (AWS CUR 2.0) or billing_period=202301
+BILLING_PERIOD_PARTITION_KEYS = {"billing_period", "billingperiod"}
+
+# source columns, compared case-insensitively, whose min/max values in file statistics give the
+# billing periods covered by a file, e.g. delta log stats
+BILLING_PERIOD_STATS_COLUMNS = BILLING_PERIOD_PARTITION_KEYS | {
+    "invoice.month",
+    "bill/billingperiodstartdate",
+    "bill_billing_period_start_date",
+    "billingperiodstartdate",
+}
+
+# year=/month= partitioning used by legacy AWS CUR parquet exports
+YEAR_PARTITION_KEY = "year"
+MONTH_PARTITION_KEY = "month"
+
+# directory partitioning by date range, e.g. /20230101-20230201/ used by AWS CUR and Azure exports
+DATE_RANGE_DIRECTORY_PATTERN = re.compile(
+    r"^(\d{4})(\d{2})\d{2}-(\d{4})(\d{2})(\d{2})$"
+)
+
+
+def parse_billing_period(billing_period: Optional[str]) -> Optional[Tuple[int, int]]:
+    if billing_period is None:
+        return None
+
+    match = BILLING_PERIOD_PATTERN.match(billing_period)
+    if match is None or not 1 <= int(match.group(2)) <= 12:
+        raise ValueError(
+            f"Invalid billing period: {billing_period}, expected format YYYY-MM"
+        )
+    return int(match.group(1)), int(match.group(2))
+
+
+def __period_key__(year: int, month: int) -> int:
+    return year * 100 + month
+
+
+def __parse_period_value__(value) -> Optional[int]:
+    # normalises values like 2023-01, 202301 or 2023-01-01T00:00:00.000Z to YYYYMM
+    period = str(value or "").replace("-", "")[:6]
+    if len(period) == 6 and period.isdigit():
+        return int(period)
+    return None
+
+
+def __flatten_stats__(values: Dict, prefix: str = "") -> Dict:
+    # nested struct stats are flattened to dotted column names, e.g. invoice.month
+    flattened = {}
+    for key, value in values.items():
+        if isinstance(value, dict):
+            flattened.update(__flatten_stats__(value, prefix=f"{prefix}{key}."))
+        else:
+            flattened[f"{prefix}{key}".lower()] = value
+    return flattened
+
+
+class BillingPeriodRange:
+    """
+    Inclusive range of billing periods, either end can be left open.
+    """
+
+    def __init__(
+        self, billing_period_from: Optional[str], billing_period_to: Optional[str]
+    ):
+        period_from = parse_billing_period(billing_period_from)
+        period_to = parse_billing_period(billing_period_to)
+
+        self.start = __period_key__(*period_from) if period_from else None
+        self.end = __period_key__(*period_to) if period_to else None
+
+        if self.start and self.end and self.start > self.end:
+            raise ValueError(
+                f"billing period from: {billing_period_from} is after billing period to: {billing_period_to}"
+            )
+
+    @property
+    def is_bounded(self) -> bool:
+        return self.start is not None or self.end is not None
+
+    def __contains_expression__(self, period_expression, as_string: bool):
+        conditions = []
+        if self.start is not None:
+            conditions.append(
+                period_expression >= (str(self.start) if as_string else self.start)
+            )
+        if self.end is not None:
+            conditions.append(
+                period_expression <= (str(self.end) if as_string else self.end)
+            )
+
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        return expression
+
+    def overlaps(self, start: int, end: int) -> bool:
+        return (self.start is None or end >= self.start) and (
+            self.end is None or start <= self.end
+        )
+
+    def dataset_filter(
+        self, partition_schema: pyarrow.Schema
+    ) -> Optional[pc.Expression]:
+        """
+        Builds a pyarrow dataset filter over discovered hive partition fields, so that fragments
+        outside the billing period range are pruned without being read.
+
+        :param partition_schema: pyarrow.Schema, schema of the discovered partition fields
+        :return: pc.Expression or None if no billing period partition fields are found
+        """
+
+        if not self.is_bounded or partition_schema is None:
+            return None
+
+        field_names = {name.lower(): name for name in partition_schema.names}
+
+        for partition_key in BILLING_PERIOD_PARTITION_KEYS:
+            if partition_key in field_names:
+                # normalise values like 2023-01, 202301 or 2023-01-01 to YYYYMM
+                period_expression = pc.utf8_slice_codeunits(
+                    pc.replace_substring(
+                        pc.field(field_names[partition_key]).cast(pyarrow.string()),
+                        "-",
+                        "",
+                    ),
+                    0,
+                    6,
+                )
+                return self.__contains_expression__(period_expression, as_string=True)
+
+        if YEAR_PARTITION_KEY in field_names and MONTH_PARTITION_KEY in field_names:
+            period_expression = pc.field(field_names[YEAR_PARTITION_KEY]).cast(
+                pyarrow.int64()
+            ) * 100 + pc.field(field_names[MONTH_PARTITION_KEY]).cast(pyarrow.int64())
+            return self.__contains_expression__(period_expression, as_string=False)
+
+        return None
+
+    def partition_values_match(
+        self, partition_values: Dict[str, Optional[str]]
+    ) -> bool:
+        """
+        Checks hive style partition key values, as found in delta logs or directory names.
+        Returns True if the values don't carry a billing period.
+        """
+
+        values = {key.lower(): value for key, value in partition_values.items()}
+
+        for partition_key in BILLING_PERIOD_PARTITION_KEYS:
+            period = __parse_period_value__(values.get(partition_key))
+            if period is not None:
+                return self.overlaps(period, period)
+
+        year = values.get(YEAR_PARTITION_KEY) or ""
+        month = values.get(MONTH_PARTITION_KEY) or ""
+        if year.isdigit() and month.isdigit():
+            period = __period_key__(int(year), int(month))
+            return self.overlaps(period, period)
+
+        return True
+
+    def stats_match(self, min_values: Dict, max_values: Dict) -> bool:
+        """
+        Checks per file min/max statistics of billing period columns.
+        Returns True if the statistics don't carry a billing period.
+        """
+
+        if not self.is_bounded:
+            return True
+
+        min_values = __flatten_stats__(min_values)
+        max_values = __flatten_stats__(max_values)
+
+        for column_name in BILLING_PERIOD_STATS_COLUMNS:
+            start = __parse_period_value__(min_values.get(column_name))
+            end = __parse_period_value__(max_values.get(column_name))
+            if start is not None and end is not None:
+                return self.overlaps(start, end)
+
+        return True
+
+    def path_matches(self, path: str, base_path: str) -> bool:
+        """
+        Checks directory names of a file path relative to base path for hive billing period keys
+        or date range directories. Returns True if the path doesn't carry a billing period.
+        """
+
+        if not self.is_bounded:
+            return True
+
+        directories = os.path.dirname(os.path.relpath(path, base_path)).split(os.sep)
+
+        partition_values = {}
+        for directory in directories:
+            date_range_match = DATE_RANGE_DIRECTORY_PATTERN.match(directory)
+            if date_range_match:
+                start_year, start_month, end_year, end_month, end_day = map(
+                    int, date_range_match.groups()
+                )
+                start = __period_key__(start_year, start_month)
+                end = __period_key__(end_year, end_month)
+
+                # end date is exclusive when it falls on the first day of a month
+                if end_day == 1 and end > start:
+                    end = end - 1 if end_month > 1 else __period_key__(end_year - 1, 12)
+
+                if not self.overlaps(start, end):
+                    return False
+            elif "=" in directory:
+                key, value = directory.split("=", 1)
+                partition_values[key] = value
+
+        return self.partition_values_match(partition_values)
+
+    def filter_paths(self, paths: List[str], base_path: str) -> List[str]:
+        return [path for path in paths if self.path_matches(path, base_path)]
@@ -1,9 +1,11 @@
+import io
 import logging
 
 import pandas as pd
 import polars as pl
 import pyarrow
 import pyarrow.dataset as ds
+import pyarrow.json as pajson
 
 from focus_converter.common.cli_options import (
     DATA_FORMAT_OPTION,
@@ -11,6 +13,19 @@ from focus_converter.common.cli_options import (
 )
 from focus_converter.conversion_functions import STATIC_CONVERSION_TYPES
 from focus_converter.converter import FocusConverter
+from focus_converter.data_loaders.aws_cur_manifest import (
+    AWSCURManifest,
+    is_aws_cur_manifest,
+)
+from focus_converter.data_loaders.compression import (
+    detect_compression,
+    open_input_stream,
+)
+from focus_converter.data_loaders.data_loader import list_csv_files
+from focus_converter.data_loaders.delta_log import DeltaTableLog
+
+# number of bytes read from the head of a file to sample the first json line
+NDJSON_SAMPLE_SIZE = 1 << 20
 
 
 class ProviderSensor:
@@ -27,8 +42,50 @@ class ProviderSensor:
         self.__base_path__ = base_path
 
     def __try_load_csv_file__(self):
-        df = pd.read_csv(self.__base_path__)
-        return df.head(10)
+        # only the first rows of the first file are read, compressed files are decompressed as a stream
+        data_path = list_csv_files(self.__base_path__)[0]
+        compression = detect_compression(data_path)
+        with open_input_stream(data_path, compression=compression) as stream:
+            return pd.read_csv(stream, nrows=10)
+
+    def __try_load_aws_cur_manifest__(self):
+        if not is_aws_cur_manifest(self.__base_path__):
+            raise ValueError(f"{self.__base_path__} is not an AWS CUR manifest")
+
+        # column names are listed in the manifest, report files need not be read
+        manifest = AWSCURManifest.load(self.__base_path__)
+        return pd.DataFrame(columns=manifest.column_names)
+
+    def __try_load_ndjson__(self):
+        # only the first line is read, json lines files start with an object
+        compression = detect_compression(self.__base_path__)
+        with open_input_stream(self.__base_path__, compression=compression) as stream:
+            first_line = stream.read(NDJSON_SAMPLE_SIZE).split(b"\n", 1)[0]
+
+        if not first_line.lstrip().startswith(b"{"):
+            raise ValueError(f"{self.__base_path__} is not a json lines file")
+
+        return pajson.read_json(io.BytesIO(first_line)).to_pandas()
+
+    def __try_load_delta_table__(self):
+        if not DeltaTableLog.is_delta_table(self.__base_path__):
+            raise ValueError(f"{self.__base_path__} is not a delta table")
+
+        # only sample from files live in the latest table version
+        try:
+            delta_files = DeltaTableLog(table_path=self.__base_path__).load()
+        except NotImplementedError as e:
+            raise RuntimeError(
+                f"Delta table {self.__base_path__} uses a feature not supported by the converter: {str(e)}"
+            )
+
+        if not delta_files:
+            raise RuntimeError(
+                f"Delta table {self.__base_path__} has no live data files in its latest version"
+            )
+
+        dataset = ds.dataset([delta_file.path for delta_file in delta_files])
+        return pl.scan_pyarrow_dataset(dataset).head(10).collect().to_pandas()
 
     def __try_load_parquet_fragments__(self):
         dataset = ds.dataset(self.__base_path__)
@@ -38,12 +95,27 @@ class ProviderSensor:
         return pl.scan_parquet(self.__base_path__).head(10).collect().to_pandas()
 
     def __sense_file_format__(self):
+        try:
+            data_sample = self.__try_load_aws_cur_manifest__()
+            self.data_format = DATA_FORMAT_OPTION.AWS_CUR_MANIFEST
+            return data_sample
+        except ValueError as e:
+            logging.debug(f"Not AWS CUR manifest, {str(e)}")
+
+        try:
+            data_sample = self.__try_load_delta_table__()
+            self.data_format = DATA_FORMAT_OPTION.PARQUET
+            self.parquet_data_format = PARQUET_DATA_FORMAT_OPTION.DELTA
+            return data_sample
+        except ValueError as e:
+            logging.debug(f"Not delta table, {str(e)}")
+
         try:
             data_sample = self.__try_load_parquet_fragments__()
             self.data_format = DATA_FORMAT_OPTION.PARQUET
             self.parquet_data_format = PARQUET_DATA_FORMAT_OPTION.DATASET
             return data_sample
-        except pyarrow.lib.ArrowInvalid as e:
+        except (pyarrow.lib.ArrowInvalid, FileNotFoundError) as e:
             logging.debug(f"Not parquet dataset, {str(e)}")
 
         try:
@@ -51,9 +123,16 @@ class ProviderSensor:
             self.data_format = DATA_FORMAT_OPTION.PARQUET
             self.parquet_data_format = PARQUET_DATA_FORMAT_OPTION.FILE
             return data_sample
-        except pl.exceptions.ComputeError as e:
+        except (pl.exceptions.ComputeError, IsADirectoryError) as e:
             logging.debug(f"Not parquet file, {str(e)}")
 
+        try:
+            data_sample = self.__try_load_ndjson__()
+            self.data_format = DATA_FORMAT_OPTION.NDJSON
+            return data_sample
+        except (ValueError, OSError) as e:
+            logging.debug(f"Not json lines file, {str(e)}")
+
         try:
             data_sample = self.__try_load_csv_file__()
             self.data_format = DATA_FORMAT_OPTION.CSV
@@ -0,0 +1,169 @@
+from typing import Dict, Iterable, List, Set
+
+import polars as pl
+
+# expressions are evaluated on distinct values when the ratio of distinct values to rows of a
+# batch is below this threshold
+DISTINCT_RATIO_THRESHOLD = 0.1
+
+# batches with fewer rows are always evaluated on all rows
+DISTINCT_VALUES_MIN_ROWS = 1_000
+
+
+def low_cardinality_columns(
+    lf: pl.LazyFrame,
+    column_names: Iterable[str],
+    distinct_ratio_threshold: float = DISTINCT_RATIO_THRESHOLD,
+) -> Set[str]:
+    """
+    Counts distinct values of columns over a whole batch and lists the ones with a distinct ratio
+    below the threshold.
+
+    :param lf: pl.LazyFrame, batch
+    :param column_names: Iterable[str], columns to be checked
+    :param distinct_ratio_threshold: float, distinct ratio below which a column is listed
+    :return: Set[str], low cardinality columns
+    """
+
+    column_names = list(column_names)
+    if not column_names:
+        return set()
+
+    counts = (
+        lf.select(
+            [pl.len().alias("__rows__")]
+            + [pl.col(column_name).n_unique() for column_name in column_names]
+        )
+        .collect()
+        .row(0, named=True)
+    )
+
+    row_count = counts.pop("__rows__")
+    if row_count < DISTINCT_VALUES_MIN_ROWS:
+        return set()
+    return {
+        column_name
+        for column_name, distinct_count in counts.items()
+        if distinct_count < row_count * distinct_ratio_threshold
+    }
+
+
+class DistinctValueLayer:
+    """
+    Layer of column expressions where expressions reading a single string column are evaluated
+    on a frame of the distinct values of that column and joined back to the batch, when the
+    column has a low cardinality in the batch. Low cardinality columns like product codes or
+    usage types are then transformed once per distinct value instead of per row, using native
+    polars operations only. Columns with a high cardinality are evaluated on all rows.
+    """
+
+    def __init__(
+        self,
+        column_exprs: List[pl.Expr],
+        distinct_value_exprs: Dict[str, List[pl.Expr]],
+        input_column_names: List[str],
+        column_names: List[str],
+    ):
+        self.__column_exprs__ = column_exprs
+        self.__distinct_value_exprs__ = distinct_value_exprs
+        self.__input_column_names__ = set(input_column_names)
+        self.__column_names__ = column_names
+
+    @property
+    def column_exprs(self) -> List[pl.Expr]:
+        return self.__column_exprs__
+
+    @property
+    def distinct_value_columns(self) -> List[str]:
+        return list(self.__distinct_value_exprs__)
+
+    @classmethod
+    def compile(
+        cls,
+        column_exprs: List[pl.Expr],
+        schema: Dict[str, pl.PolarsDataType],
+        column_names: Iterable[str],
+    ) -> "DistinctValueLayer":
+        """
+        Groups expressions of a layer by the string column they read. Plan expressions are row
+        wise, so an expression reading a single column gives the same values on distinct values.
+
+        :param column_exprs: List[pl.Expr], layer of column expressions
+        :param schema: Dict[str, pl.PolarsDataType], schema of the frame the layer is applied on
+        :param column_names: Iterable[str], columns whose cardinality is known before the layer,
+        only expressions reading one of them are eligible
+        :return: DistinctValueLayer, layer with expressions grouped by input column
+        """
+
+        # join keys must not be rewritten by the layer
+        column_names = set(column_names) - {
+            column_expr.meta.output_name() for column_expr in column_exprs
+        }
+
+        distinct_value_exprs: Dict[str, List[pl.Expr]] = {}
+        for column_expr in column_exprs:
+            root_names = column_expr.meta.root_names()
+            if (
+                len(root_names) == 1
+                and root_names[0] in column_names
+                and schema.get(root_names[0]) == pl.Utf8
+                and not column_expr.meta.undo_aliases().meta.is_column()
+            ):
+                distinct_value_exprs.setdefault(root_names[0], []).append(column_expr)
+
+        return cls(
+            column_exprs=column_exprs,
+            distinct_value_exprs=distinct_value_exprs,
+            input_column_names=list(schema),
+            column_names=pl.LazyFrame(schema=schema).with_columns(column_exprs).columns,
+        )
+
+    def apply(
+        self, lf: pl.LazyFrame, low_cardinality_columns: Set[str]
+    ) -> pl.LazyFrame:
+        """
+        Applies the layer to a batch.
+
+        :param lf: pl.LazyFrame, batch
+        :param low_cardinality_columns: Set[str], columns of the batch with a low cardinality
+        :return: pl.LazyFrame, batch with the columns of the layer
+        """
+
+        joined_column_exprs = {
+            column_name: distinct_value_exprs
+            for column_name, distinct_value_exprs in self.__distinct_value_exprs__.items()
+            if column_name in low_cardinality_columns
+        }
+        if not joined_column_exprs:
+            return lf.with_columns(self.__column_exprs__)
+
+        joined_expr_ids = {
+            id(column_expr)
+            for distinct_value_exprs in joined_column_exprs.values()
+            for column_expr in distinct_value_exprs
+        }
+        column_exprs = [
+            column_expr
+            for column_expr in self.__column_exprs__
+            if id(column_expr) not in joined_expr_ids
+        ]
+        if column_exprs:
+            lf = lf.with_columns(column_exprs)
+
+        for column_name, distinct_value_exprs in joined_column_exprs.items():
+            distinct_values_lf = lf.select(pl.col(column_name).unique()).with_columns(
+                distinct_value_exprs
+            )
+
+            # columns rewritten by the layer are replaced by the joined columns, expressions of
+            # a layer never read columns written by the same layer
+            lf = lf.drop(
+                [
+                    column_expr.meta.output_name()
+                    for column_expr in distinct_value_exprs
+                    if column_expr.meta.output_name() in self.__input_column_names__
+                ]
+            ).join(distinct_values_lf, on=column_name, how="left", join_nulls=True)
+
+        # joined columns are added last, columns are ordered same as with_columns would
+        return lf.select(self.__column_names__)
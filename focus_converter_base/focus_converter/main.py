@@ -10,8 +10,12 @@ from rich import print
 from typing_extensions import Annotated
 
 from focus_converter.common.cli_options import (
+    BILLING_PERIOD_FROM_OPTION,
+    BILLING_PERIOD_TO_OPTION,
+    DATA_CACHE_DIR_OPTION,
     DATA_FORMAT_OPTION,
     DATA_PATH,
+    DELTA_TABLE_VERSION_OPTION,
     EXPORT_DATA_FORMAT,
     EXPORT_INCLUDE_SOURCE_COLUMNS,
     EXPORT_PATH_OPTION,
@@ -35,6 +39,10 @@ def main_auto(
     export_path: EXPORT_PATH_OPTION,
     export_format: EXPORT_DATA_FORMAT = "parquet",
     export_include_source_columns: EXPORT_INCLUDE_SOURCE_COLUMNS = True,
+    delta_table_version: DELTA_TABLE_VERSION_OPTION = None,
+    billing_period_from: BILLING_PERIOD_FROM_OPTION = None,
+    billing_period_to: BILLING_PERIOD_TO_OPTION = None,
+    cache_dir: DATA_CACHE_DIR_OPTION = None,
     column_prefix: Annotated[
         str,
         typer.Option(
@@ -75,6 +83,9 @@ def main_auto(
         data_path=data_path,
         data_format=provider_sensor.data_format,
         parquet_data_format=provider_sensor.parquet_data_format,
+        delta_table_version=delta_table_version,
+        billing_period_from=billing_period_from,
+        billing_period_to=billing_period_to,
     )
     converter.configure_data_export(
         export_path=export_path,
@@ -83,6 +94,7 @@ def main_auto(
         export_format=export_format,
     )
     converter.prepare_horizontal_conversion_plan(provider=provider_sensor.provider)
+    converter.configure_data_cache(cache_dir=cache_dir)
     converter.convert()
 
     if validate:
@@ -106,6 +118,10 @@ def main(
     data_path: DATA_PATH,
     export_format: EXPORT_DATA_FORMAT = "parquet",
     parquet_data_format: PARQUET_DATA_FORMAT_OPTION = None,
+    delta_table_version: DELTA_TABLE_VERSION_OPTION = None,
+    billing_period_from: BILLING_PERIOD_FROM_OPTION = None,
+    billing_period_to: BILLING_PERIOD_TO_OPTION = None,
+    cache_dir: DATA_CACHE_DIR_OPTION = None,
     export_include_source_columns: EXPORT_INCLUDE_SOURCE_COLUMNS = True,
     column_prefix: Annotated[
         str,
@@ -149,6 +165,9 @@ def main(
         data_path=data_path,
         data_format=data_format,
         parquet_data_format=parquet_data_format,
+        delta_table_version=delta_table_version,
+        billing_period_from=billing_period_from,
+        billing_period_to=billing_period_to,
     )
     converter.configure_data_export(
         export_path=export_path,
@@ -157,6 +176,7 @@ def main(
         export_format=export_format,
     )
     converter.prepare_horizontal_conversion_plan(provider=provider)
+    converter.configure_data_cache(cache_dir=cache_dir)
     converter.convert()
 
     if validate:
@@ -1,7 +1,7 @@
 import os
 import tempfile
 from datetime import datetime, date
-from unittest import TestCase
+from unittest import TestCase, mock
 from uuid import uuid4
 
 import pandas as pd
@@ -11,6 +11,9 @@ import multiprocessing
 
 from focus_converter.configs.base_config import ConversionPlan
 from focus_converter.conversion_functions import STATIC_CONVERSION_TYPES
+from focus_converter.conversion_functions.datetime_functions import (
+    DateTimeConversionFunctions,
+)
 from focus_converter.converter import FocusConverter
 from focus_converter.data_loaders.data_loader import DataLoader, DataFormats
 from focus_converter.models.focus_column_names import FocusColumnNames
@@ -524,3 +527,243 @@ class TestSetColumnDTypes(TestCase):
             list(modified_pl_df["test_column"]),
             [test_date, test_date, test_date, test_date, None],
         )
+
+    def test_dtype_cast_str_to_datetime_with_format(self):
+        df = pd.DataFrame(
+            [
+                {"a": 1, "test_column": "2021-01-01T10:00Z"},
+                {"a": 1, "test_column": "2021-01-01T11:00Z"},
+                {"a": 1, "test_column": None},
+            ]
+        )
+        pl_df = pl.from_dataframe(df).lazy()
+
+        sample_provider_name = str(uuid4())
+
+        focus_converter = FocusConverter(column_prefix=None)
+        focus_converter.plans = {
+            sample_provider_name: [
+                ConversionPlan(
+                    column="test_column",
+                    config_file_name="D001_S001.yaml",
+                    plan_name="test-plan",
+                    dimension_id=1,
+                    priority=0,
+                    conversion_type=STATIC_CONVERSION_TYPES.SET_COLUMN_DTYPES,
+                    focus_column=FocusColumnNames.PLACE_HOLDER,
+                    conversion_args={
+                        "dtype_args": [
+                            {
+                                "dtype": "datetime",
+                                "column_name": "test_column",
+                                "format": "%Y-%m-%dT%H:%M%#z",
+                            },
+                        ]
+                    },
+                ),
+                RENAME_SAMPLE_PLAN,
+            ]
+        }
+        focus_converter.prepare_horizontal_conversion_plan(
+            provider=sample_provider_name
+        )
+        modified_pl_df = (
+            focus_converter.__process_lazy_frame__(lf=pl_df)
+            .select("test_column")
+            .collect()
+        )
+        self.assertEqual(
+            modified_pl_df.dtypes[0], pl.Datetime(time_unit="us", time_zone="UTC")
+        )
+        self.assertEqual(
+            [
+                value and value.replace(tzinfo=None)
+                for value in modified_pl_df["test_column"]
+            ],
+            [datetime(2021, 1, 1, 10), datetime(2021, 1, 1, 11), None],
+        )
+
+    def test_dtype_plan_applied_by_csv_reader(self):
+        # account ids with leading zeros would be inferred as integers without the declared dtype
+        df = pd.DataFrame(
+            [
+                {"account_id": "0012", "cost": "1", "test_column": "2021-01-01"},
+                {"account_id": "0034", "cost": "2", "test_column": "2021-01-02"},
+            ]
+        )
+
+        sample_provider_name = str(uuid4())
+
+        focus_converter = FocusConverter(column_prefix=None)
+        focus_converter.plans = {
+            sample_provider_name: [
+                ConversionPlan(
+                    column="test_column",
+                    config_file_name="D001_S001.yaml",
+                    plan_name="test-plan",
+                    dimension_id=1,
+                    priority=0,
+                    conversion_type=STATIC_CONVERSION_TYPES.SET_COLUMN_DTYPES,
+                    focus_column=FocusColumnNames.PLACE_HOLDER,
+                    conversion_args={
+                        "dtype_args": [
+                            {"dtype": "string", "column_name": "account_id"},
+                            {"dtype": "float", "column_name": "cost"},
+                            {"dtype": "date", "column_name": "test_column"},
+                        ]
+                    },
+                ),
+                RENAME_SAMPLE_PLAN,
+                RENAME_SAMPLE_PLAN.model_copy(
+                    update={
+                        "column": "account_id",
+                        "focus_column": FocusColumnNames.BILLING_ACCOUNT_ID,
+                    }
+                ),
+                RENAME_SAMPLE_PLAN.model_copy(
+                    update={
+                        "column": "cost",
+                        "focus_column": FocusColumnNames.BILLED_COST,
+                    }
+                ),
+            ]
+        }
+        focus_converter.prepare_horizontal_conversion_plan(
+            provider=sample_provider_name
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "test.csv")
+            df.to_csv(temp_file_path, index=False)
+
+            focus_converter.load_data(
+                data_path=temp_file_path, data_format=DataFormats.CSV
+            )
+            pl_df = list(focus_converter.__scan_prepared_source__())[0].collect()
+
+        self.assertEqual(pl_df.schema["account_id"], pl.Utf8)
+        self.assertEqual(pl_df["account_id"].to_list(), ["0012", "0034"])
+        self.assertEqual(pl_df.schema["cost"], pl.Float64)
+        self.assertEqual(pl_df.schema["test_column"], pl.Date)
+
+    def test_dtype_cast_str_to_datetime_format_inferred_once(self):
+        batches = [
+            pl.DataFrame(
+                {
+                    "test_column": [
+                        "2021-01-01T10:00:00.000Z",
+                        None,
+                        "2021-01-01T11:00:00Z",
+                    ]
+                }
+            ).lazy(),
+            # batch with another schema reuses the inferred format
+            pl.DataFrame(
+                {"a": [1, 1], "test_column": ["2021-01-01T12:00:00.500Z", None]}
+            ).lazy(),
+        ]
+
+        sample_provider_name = str(uuid4())
+
+        focus_converter = FocusConverter(column_prefix=None)
+        focus_converter.plans = {
+            sample_provider_name: [
+                ConversionPlan(
+                    column="test_column",
+                    config_file_name="D001_S001.yaml",
+                    plan_name="test-plan",
+                    dimension_id=1,
+                    priority=0,
+                    conversion_type=STATIC_CONVERSION_TYPES.SET_COLUMN_DTYPES,
+                    focus_column=FocusColumnNames.PLACE_HOLDER,
+                    conversion_args={
+                        "dtype_args": [
+                            {"dtype": "datetime", "column_name": "test_column"},
+                        ]
+                    },
+                ),
+                RENAME_SAMPLE_PLAN,
+            ]
+        }
+        focus_converter.prepare_horizontal_conversion_plan(
+            provider=sample_provider_name
+        )
+
+        with mock.patch.object(
+            DateTimeConversionFunctions,
+            "infer_datetime_format",
+            wraps=DateTimeConversionFunctions.infer_datetime_format,
+        ) as infer_datetime_format:
+            modified_pl_dfs = [
+                focus_converter.__process_lazy_frame__(lf=lf)
+                .select("test_column")
+                .collect()
+                for lf in batches
+            ]
+        infer_datetime_format.assert_called_once()
+        self.assertEqual(
+            DateTimeConversionFunctions.infer_datetime_format(
+                **infer_datetime_format.call_args.kwargs
+            ),
+            "%Y-%m-%dT%H:%M:%S%.f%#z",
+        )
+
+        for modified_pl_df, lf in zip(modified_pl_dfs, batches):
+            # parsed same as polars format inference
+            self.assertTrue(
+                modified_pl_df["test_column"].equals(
+                    lf.collect()["test_column"].str.to_datetime()
+                )
+            )
+
+    def test_dtype_cast_str_to_datetime_later_batch_in_another_layout(self):
+        batches = [
+            pl.DataFrame(
+                {"test_column": ["2021-01-01T10:00:00.000Z", "2021-01-01T11:00:00Z"]}
+            ).lazy(),
+            # same schema, values without seconds or with an offset
+            pl.DataFrame(
+                {"test_column": ["2021-01-01T12:00Z", "2021-01-01T13:00:00.5+01:00"]}
+            ).lazy(),
+            pl.DataFrame({"test_column": ["2021-01-01T14:00Z", None]}).lazy(),
+        ]
+
+        sample_provider_name = str(uuid4())
+
+        focus_converter = FocusConverter(column_prefix=None)
+        focus_converter.plans = {
+            sample_provider_name: [
+                ConversionPlan(
+                    column="test_column",
+                    config_file_name="D001_S001.yaml",
+                    plan_name="test-plan",
+                    dimension_id=1,
+                    priority=0,
+                    conversion_type=STATIC_CONVERSION_TYPES.SET_COLUMN_DTYPES,
+                    focus_column=FocusColumnNames.PLACE_HOLDER,
+                    conversion_args={
+                        "dtype_args": [
+                            {"dtype": "datetime", "column_name": "test_column"},
+                        ]
+                    },
+                ),
+                RENAME_SAMPLE_PLAN,
+            ]
+        }
+        focus_converter.prepare_horizontal_conversion_plan(
+            provider=sample_provider_name
+        )
+
+        for lf in batches:
+            modified_pl_df = (
+                focus_converter.__process_lazy_frame__(lf=lf)
+                .select("test_column")
+                .collect()
+            )
+
+            # parsed same as polars format inference on the batch alone
+            self.assertTrue(
+                modified_pl_df["test_column"].equals(
+                    lf.collect()["test_column"].str.to_datetime()
+                )
+            )
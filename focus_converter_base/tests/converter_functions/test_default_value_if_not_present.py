@@ -1,4 +1,4 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 from uuid import uuid4
 
 import pandas as pd
@@ -101,6 +101,45 @@ class TestDefaultValueIfNotPresent(TestCase):
         self.assertEqual(len(assigned_value), 4)
         self.assertEqual(list(assigned_value), [None, None, None, None])
 
+    def test_steps_compiled_once_per_schema(self):
+        sample_provider_name = str(uuid4())
+        test_plan = ConversionPlan(
+            column="test_column",
+            config_file_name="D001_S001.yaml",
+            plan_name="test-plan",
+            dimension_id=1,
+            priority=0,
+            conversion_type=STATIC_CONVERSION_TYPES.APPLY_DEFAULT_IF_COLUMN_MISSING,
+            focus_column=FocusColumnNames.PROVIDER,
+            column_prefix="tmp_prefill",
+            conversion_args={"data_type": "string"},
+        )
+
+        focus_converter = FocusConverter(column_prefix=None)
+        focus_converter.plans = {sample_provider_name: [test_plan, RENAME_SAMPLE_PLAN]}
+        conversion_plan = focus_converter.prepare_horizontal_conversion_plan(
+            provider=sample_provider_name
+        )
+
+        batches = [
+            pl.LazyFrame({"a": [1, 1]}),
+            pl.LazyFrame({"a": [2, 2]}),
+            pl.LazyFrame({"a": [3], "test_column": ["x"]}),
+        ]
+        with mock.patch.object(
+            conversion_plan,
+            "__compile_prepare_steps__",
+            wraps=conversion_plan.__compile_prepare_steps__,
+        ) as compile_prepare_steps:
+            assigned_values = [
+                conversion_plan.apply(lf=lf).collect()["Provider"].to_list()
+                for lf in batches
+            ]
+
+        # second batch reuses the steps compiled for the first, a schema change recompiles
+        self.assertEqual(compile_prepare_steps.call_count, 2)
+        self.assertEqual(assigned_values, [[None, None], [None, None], ["x"]])
+
     def test_uml_generation(self):
         test_plan = ConversionPlan(
             column="test_column",
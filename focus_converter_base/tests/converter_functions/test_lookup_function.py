@@ -191,3 +191,198 @@ class TestMappingFunction(TestCase):
             self.assertTrue(
                 pathlib.Path(conversion_args.reference_dataset_path).is_file()
             )
+
+    def test_lookup_expression_with_duplicate_keys(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mapping_csv = os.path.join(temp_dir, "mapping.csv")
+            pl.DataFrame(
+                {
+                    "source": ["1", "2", "1", None, "3"],
+                    "destination": ["1_first", "2_mapped", "1_second", "null", None],
+                }
+            ).write_csv(mapping_csv)
+
+            conversion_plan = ConversionPlan(
+                plan_name="sample",
+                priority=1,
+                column="key",
+                conversion_type="lookup",
+                focus_column="RegionId",
+                config_file_name="D001_S001.yaml",
+                dimension_id=1,
+                conversion_args={
+                    "reference_dataset_path": mapping_csv,
+                    "source_value": "source",
+                    "destination_value": "destination",
+                    "reference_path_in_package": False,
+                },
+            )
+            lookup_args = LookupFunction.map_values_using_lookup(
+                plan=conversion_plan,
+                column_alias="mapped",
+                column_validator=ColumnValidator(),
+            )
+
+            # reference dataset is loaded once and shared by plans using it
+            self.assertIs(
+                LookupFunction.load_reference_dataset(
+                    reference_dataset_path=mapping_csv,
+                    source_value="source",
+                    destination_value="destination",
+                ),
+                LookupFunction.load_reference_dataset(
+                    reference_dataset_path=mapping_csv,
+                    source_value="source",
+                    destination_value="destination",
+                ),
+            )
+
+        pl_df = pl.DataFrame({"key": ["1", "2", "3", "4", None]}).lazy()
+
+        joined_df = pl_df.join(**lookup_args).collect()
+        replaced_df = pl_df.with_columns(
+            LookupFunction.lookup_expression(lookup_args)
+        ).collect()
+
+        # duplicate keys map to their first value, null keys are never matched
+        self.assertEqual(
+            list(replaced_df["mapped"]), ["1_first", "2_mapped", None, None, None]
+        )
+        self.assertTrue(replaced_df.equals(joined_df))
+
+    def test_changed_reference_dataset_replaces_cached_one(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mapping_csv = os.path.join(temp_dir, "mapping.csv")
+            reference_dfs = []
+            for destination in ["1_mapped", "1_changed"]:
+                pl.DataFrame({"source": ["1"], "destination": [destination]}).write_csv(
+                    mapping_csv
+                )
+                os.utime(mapping_csv, ns=(len(reference_dfs), len(reference_dfs)))
+                reference_dfs.append(
+                    LookupFunction.load_reference_dataset(
+                        reference_dataset_path=mapping_csv,
+                        source_value="source",
+                        destination_value="destination",
+                    )
+                )
+
+            # changed file is loaded again and the stale dataset is evicted
+            self.assertEqual(
+                [list(df["destination"]) for df in reference_dfs],
+                [["1_mapped"], ["1_changed"]],
+            )
+            self.assertEqual(
+                [
+                    reference_df
+                    for _, reference_df in LookupFunction.__reference_datasets__.values()
+                    if reference_df is reference_dfs[0]
+                ],
+                [],
+            )
+
+    def test_lookup_binary_reference_datasets(self):
+        reference_df = pl.DataFrame(
+            {
+                "source": [3, 1, 2, 1],
+                "destination": ["3_mapped", "1_first", "2_mapped", "1_second"],
+            }
+        )
+        pl_df = pl.DataFrame({"key": ["1", "2", "3", "4", None]}).lazy()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for file_name, key_index in [
+                ("mapping.parquet", "hash"),
+                ("mapping.parquet", "sorted"),
+                ("mapping.arrow", "hash"),
+                ("mapping.arrow", "sorted"),
+            ]:
+                with self.subTest(file_name=file_name, key_index=key_index):
+                    mapping_path = os.path.join(temp_dir, file_name)
+                    if file_name.endswith(".parquet"):
+                        reference_df.write_parquet(mapping_path)
+                    else:
+                        reference_df.write_ipc(mapping_path)
+
+                    conversion_plan = ConversionPlan(
+                        plan_name="sample",
+                        priority=1,
+                        column="key",
+                        conversion_type="lookup",
+                        focus_column="RegionId",
+                        config_file_name="D001_S001.yaml",
+                        dimension_id=1,
+                        conversion_args={
+                            "reference_dataset_path": mapping_path,
+                            "source_value": "source",
+                            "destination_value": "destination",
+                            "reference_path_in_package": False,
+                            "key_index": key_index,
+                        },
+                    )
+                    lookup_args = LookupFunction.map_values_using_lookup(
+                        plan=conversion_plan,
+                        column_alias="mapped",
+                        column_validator=ColumnValidator(),
+                    )
+
+                    replaced_df = pl_df.with_columns(
+                        LookupFunction.lookup_expression(lookup_args)
+                    ).collect()
+                    self.assertEqual(
+                        list(replaced_df["mapped"]),
+                        ["1_first", "2_mapped", "3_mapped", None, None],
+                    )
+                    self.assertTrue(
+                        replaced_df.equals(pl_df.join(**lookup_args).collect())
+                    )
+
+    def test_lookup_patterns(self):
+        reference_df = pl.DataFrame(
+            {
+                "source": ["AmazonEC2", "Amazon", "AWS", r"arn:aws:s3:.*", r"arn:.*"],
+                "destination": ["Compute", "Other", "Management", "Storage", "Other"],
+            }
+        )
+        pl_df = pl.DataFrame(
+            {"key": ["AmazonEC2-x", "AmazonS3", "AWSLambda", "Azure", None]}
+        ).lazy()
+        arn_df = pl.DataFrame(
+            {"key": ["arn:aws:s3:::bucket", "arn:aws:ec2:i-1", "AmazonEC2", None]}
+        ).lazy()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mapping_path = os.path.join(temp_dir, "mapping.csv")
+            reference_df.write_csv(mapping_path)
+
+            for match, lf, expected_values in [
+                ("prefix", pl_df, ["Compute", "Other", "Management", None, None]),
+                ("regex", arn_df, ["Storage", "Other", "Compute", None]),
+            ]:
+                with self.subTest(match=match):
+                    conversion_plan = ConversionPlan(
+                        plan_name="sample",
+                        priority=1,
+                        column="key",
+                        conversion_type="lookup",
+                        focus_column="ServiceCategory",
+                        config_file_name="D001_S001.yaml",
+                        dimension_id=1,
+                        conversion_args={
+                            "reference_dataset_path": mapping_path,
+                            "source_value": "source",
+                            "destination_value": "destination",
+                            "reference_path_in_package": False,
+                            "match": match,
+                        },
+                    )
+                    lookup_args = LookupFunction.map_values_using_lookup(
+                        plan=conversion_plan,
+                        column_alias="mapped",
+                        column_validator=ColumnValidator(),
+                    )
+
+                    mapped_df = FocusConverter.__apply_lookup_reference_plans__(
+                        lf=lf, lookup_args=[lookup_args]
+                    ).collect()
+                    self.assertEqual(list(mapped_df["mapped"]), expected_values)
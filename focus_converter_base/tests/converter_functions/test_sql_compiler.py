@@ -0,0 +1,144 @@
+from unittest import TestCase, mock
+
+import polars as pl
+
+from focus_converter.conversion_functions.sql_compiler import SQLCompiler
+from focus_converter.conversion_functions.sql_functions import SQLFunctions
+from focus_converter.converter import FocusConverter
+
+SAMPLE_DATASETS = {
+    "aws-cur": "tests/provider_config_tests/aws/sample-anonymous-aws-export-dataset.csv",
+    "azure": "tests/provider_config_tests/azure/sample-anonymous-ea-export-dataset.csv",
+}
+
+
+class TestSQLCompiler(TestCase):
+    @staticmethod
+    def eval_sql_context(lf, sql_query):
+        return SQLFunctions.create_sql_context(lf=lf).execute(sql_query, eager=True)
+
+    def assert_compiled_same(self, lf, sql_query):
+        column_exprs = SQLCompiler.compile_query(sql_query)
+        self.assertIsNotNone(column_exprs)
+
+        df = lf.with_columns(column_exprs).collect()
+        self.assertTrue(df.equals(self.eval_sql_context(lf, sql_query)))
+
+    def test_case_conditions_compiled(self):
+        lf = pl.LazyFrame(
+            {
+                "charge_type": ["Usage", "Tax", "Refund", None],
+                "benefit_id": [
+                    "/a/Microsoft.Capacity/b",
+                    "x",
+                    None,
+                    "/microsoft_capacity/",
+                ],
+                "cost": [1.5, None, -2.0, 4.0],
+                "credit": [0.5, 1.0, None, -5.0],
+            }
+        )
+
+        for sql_query in [
+            "select *, case WHEN charge_type = 'Usage' THEN 'Usage' WHEN charge_type = 'Tax' "
+            "OR charge_type = 'Fee' THEN 'Tax' ELSE 'Adjustment' END as ChargeCategory from cost_data",
+            "select *, case WHEN LOWER(benefit_id) LIKE '%/microsoft.capacity/%' THEN 'Usage' "
+            "ELSE NULL END as CommitmentDiscountCategory from cost_data",
+            "SELECT *, CASE WHEN credit + cost > 0 THEN credit + cost ELSE 0 END AS EffectiveCost FROM cost_data",
+            "select *, case WHEN cost is not null AND NOT (charge_type <> 'Usage') THEN cost * 2 "
+            "ELSE NULL END as BilledCost from cost_data",
+            "select *, COALESCE(cost, credit, -1.5) as ListCost from cost_data",
+        ]:
+            with self.subTest(sql_query=sql_query):
+                self.assert_compiled_same(lf, sql_query)
+
+    def test_equality_chain_compiled_to_value_map(self):
+        lf = pl.LazyFrame({"charge_type": ["Usage", "Tax", "Refund", "Credit", None]})
+        sql_query = (
+            "select *, case WHEN charge_type = 'Usage' THEN 'Usage' WHEN (charge_type = 'Tax') "
+            "THEN 'Tax' WHEN charge_type = 'Credit' OR charge_type = 'Refund' THEN 'Adjustment' "
+            "WHEN charge_type = 'Tax' THEN 'Purchase' ELSE 'Other' END as ChargeCategory from cost_data"
+        )
+
+        (column_expr,) = SQLCompiler.compile_query(sql_query)
+        self.assertIn("replace", str(column_expr))
+        self.assert_compiled_same(lf, sql_query)
+
+        # first matching condition wins for values listed more than once
+        self.assertEqual(
+            lf.select(column_expr).collect()["ChargeCategory"].to_list(),
+            ["Usage", "Tax", "Adjustment", "Adjustment", "Other"],
+        )
+
+    def test_equality_chain_with_null_default(self):
+        lf = pl.LazyFrame(
+            {"purchase_option": [None, None]}, schema={"purchase_option": pl.Null}
+        )
+        sql_query = (
+            "select *, case WHEN purchase_option = 'On-Demand' THEN 'Standard' "
+            "WHEN purchase_option = 'Spot' THEN 'Dynamic' ELSE NULL END as PricingCategory from cost_data"
+        )
+
+        df = lf.with_columns(SQLCompiler.compile_query(sql_query)).collect()
+        self.assertEqual(df.schema["PricingCategory"], pl.Utf8)
+        self.assertEqual(df["PricingCategory"].to_list(), [None, None])
+
+    def test_integer_division_same_as_sql_context(self):
+        lf = pl.LazyFrame(
+            {"quantity": [7, -7, 6], "hours": [2, 2, 0], "cost": [7.0, -7.0, 1.0]}
+        )
+
+        # integer operands are divided with floor division by the sql context, so divisions
+        # without a float literal operand are left to it
+        for sql_query in [
+            "select *, quantity / hours as Rate from cost_data",
+            "select *, cost / hours as Rate from cost_data",
+            "select *, quantity / 2 as Rate from cost_data",
+        ]:
+            with self.subTest(sql_query=sql_query):
+                self.assertIsNone(SQLCompiler.compile_query(sql_query))
+
+        for sql_query in [
+            "select *, quantity / 2.0 as Rate from cost_data",
+            "select *, 10.5 / hours as Rate from cost_data",
+        ]:
+            with self.subTest(sql_query=sql_query):
+                self.assert_compiled_same(lf, sql_query)
+
+    def test_unsupported_query_not_compiled(self):
+        for sql_query in [
+            "select *, cost as BilledCost from cost_data where cost > 0",
+            "select cost as BilledCost from cost_data",
+            "select *, sum(cost) as BilledCost from cost_data",
+            "select *, cost as BilledCost from other_data",
+        ]:
+            with self.subTest(sql_query=sql_query):
+                self.assertIsNone(SQLCompiler.compile_query(sql_query))
+
+    def test_provider_plans_same_as_sql_context(self):
+        for provider, data_path in SAMPLE_DATASETS.items():
+            with self.subTest(provider=provider):
+                converter = FocusConverter()
+                converter.load_provider_conversion_configs()
+                lf = pl.scan_csv(data_path)
+
+                # every sql plan of the provider is compiled
+                conversion_plan = converter.prepare_horizontal_conversion_plan(
+                    provider=provider
+                )
+                self.assertTrue(
+                    all(
+                        SQLCompiler.compile_query(sql_query) is not None
+                        for sql_query in conversion_plan.sql_queries
+                    )
+                )
+                df = conversion_plan.apply(lf).collect()
+
+                with mock.patch.object(SQLCompiler, "compile_query", return_value=None):
+                    sql_context_df = (
+                        converter.prepare_horizontal_conversion_plan(provider=provider)
+                        .apply(lf)
+                        .collect()
+                    )
+
+                self.assertTrue(df.equals(sql_context_df))
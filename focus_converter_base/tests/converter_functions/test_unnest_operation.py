@@ -7,6 +7,7 @@ from focus_converter.configs.base_config import ConversionPlan
 from focus_converter.conversion_functions import STATIC_CONVERSION_TYPES
 from focus_converter.conversion_functions.column_functions import ColumnFunctions
 from focus_converter.conversion_functions.validations import ColumnValidator
+from focus_converter.converter import FocusConverter
 from focus_converter.models.focus_column_names import FocusColumnNames
 
 
@@ -242,3 +243,118 @@ class TestUnnestOperation(TestCase):
         unnested_values = list(pl_df["unnested"])
         self.assertEqual(len(unnested_values), 1)
         self.assertEqual(unnested_values[0], 4)
+
+    def test_list_unnests_on_same_column_fused(self):
+        # tests unnest plans of the same list column evaluated in a single pass
+
+        pl_df = pl.DataFrame(
+            {
+                "nested_field": [
+                    [{"child": 2, "name": "a"}, {"child": 4, "name": "b"}],
+                    [],
+                    None,
+                ]
+            }
+        ).lazy()
+
+        unnest_plans = []
+        column_exprs = [pl.col("nested_field").alias("other")]
+        for column, aggregation_operation in [
+            ("nested_field.child", "sum"),
+            ("nested_field.child", "max"),
+            ("nested_field.name", "last"),
+            ("nested_field.child", "sum"),
+        ]:
+            plan = ConversionPlan(
+                column=column,
+                config_file_name="D0001-S000.yaml",
+                plan_name="test-plan",
+                dimension_id=1,
+                priority=0,
+                conversion_type=STATIC_CONVERSION_TYPES.UNNEST_COLUMN,
+                focus_column=FocusColumnNames.PROVIDER,
+                conversion_args={
+                    "children_type": "list",
+                    "aggregation_operation": aggregation_operation,
+                },
+            )
+            column_alias = f"unnested_{len(unnest_plans)}"
+            unnest_plans.append((len(column_exprs), plan, column_alias))
+            column_exprs.append(
+                ColumnFunctions.unnest(
+                    plan=plan,
+                    column_alias=column_alias,
+                    column_validator=ColumnValidator(),
+                )
+            )
+
+        expected_df = pl_df.with_columns(column_exprs).collect()
+
+        fused_columns = ColumnFunctions.fuse_list_unnests(
+            column_exprs=column_exprs, unnest_plans=unnest_plans
+        )
+        self.assertEqual(fused_columns, ["__unnest_nested_field"])
+        self.assertEqual(len(column_exprs), 6)
+
+        fused_df = pl_df
+        for expr in column_exprs:
+            fused_df = fused_df.with_columns(expr)
+        fused_df = fused_df.drop(fused_columns).collect()
+
+        self.assertTrue(fused_df.equals(expected_df))
+        self.assertEqual(list(fused_df["unnested_0"]), [6, 0, None])
+        self.assertEqual(list(fused_df["unnested_2"]), ["b", None, None])
+
+    def test_converter_fuses_list_unnests_on_same_column(self):
+        # tests a conversion plan with unnest plans of the same list column walking it once
+
+        pl_df = pl.DataFrame(
+            {
+                "credits": [
+                    [{"amount": -1.5, "name": "a"}, {"amount": -2.0, "name": "b"}],
+                    [],
+                    None,
+                ]
+            }
+        ).lazy()
+
+        focus_converter = FocusConverter(column_prefix=None)
+        focus_converter.plans = {
+            "test-provider": [
+                ConversionPlan(
+                    column=column,
+                    config_file_name="D0001-S000.yaml",
+                    plan_name="test-plan",
+                    dimension_id=1,
+                    priority=0,
+                    conversion_type=STATIC_CONVERSION_TYPES.UNNEST_COLUMN,
+                    focus_column=focus_column,
+                    conversion_args={
+                        "children_type": "list",
+                        "aggregation_operation": aggregation_operation,
+                    },
+                )
+                for column, focus_column, aggregation_operation in [
+                    ("credits.amount", FocusColumnNames.EFFECTIVE_COST, "sum"),
+                    ("credits.name", FocusColumnNames.CHARGE_DESCRIPTION, "last"),
+                ]
+            ]
+        }
+        conversion_plan = focus_converter.prepare_horizontal_conversion_plan(
+            provider="test-provider"
+        )
+
+        # list column is walked by a single fused expression
+        self.assertEqual(
+            [
+                column_expr.meta.output_name()
+                for column_expr in conversion_plan.column_exprs
+                if column_expr.meta.root_names() == ["credits"]
+            ],
+            ["__unnest_credits"],
+        )
+
+        converted_df = focus_converter.__process_lazy_frame__(lf=pl_df).collect()
+        self.assertNotIn("__unnest_credits", converted_df.columns)
+        self.assertEqual(list(converted_df["EffectiveCost"]), [-3.5, 0, None])
+        self.assertEqual(list(converted_df["ChargeDescription"]), ["b", None, None])
@@ -15,7 +15,7 @@ class TestAWSProvider(TestCase):
 
         focus_converter = FocusConverter()
         focus_converter.plans = {"aws": [conversion_plan]}
-        column_exprs = focus_converter.prepare_horizontal_conversion_plan(
+        conversion_plan = focus_converter.prepare_horizontal_conversion_plan(
             provider="aws"
         )
 
@@ -24,7 +24,7 @@ class TestAWSProvider(TestCase):
         test_pl_df = (
             pl.from_dataframe(test_dataframe)
             .lazy()
-            .with_columns(column_exprs)
+            .with_columns(conversion_plan.column_exprs)
             .collect()
         )
         self.assertEqual(list(test_pl_df["Provider"])[0], "AWS")
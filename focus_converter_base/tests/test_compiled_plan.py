@@ -0,0 +1,202 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+import polars as pl
+
+from focus_converter.compiled_plan import CompiledConversionPlan
+from focus_converter.converter import FocusConverter
+from focus_converter.distinct_values import DistinctValueLayer
+
+SAMPLE_DATA_PATH = (
+    "tests/provider_config_tests/aws/sample-anonymous-aws-export-dataset.csv"
+)
+
+
+class TestCompiledConversionPlan(TestCase):
+    @staticmethod
+    def prepare_plan(column_prefix=None):
+        converter = FocusConverter(column_prefix=column_prefix)
+        converter.load_provider_conversion_configs()
+        return converter.prepare_horizontal_conversion_plan(provider="aws-cur")
+
+    def test_pickled_plan_converts_same(self):
+        conversion_plan = self.prepare_plan()
+        lf = pl.scan_csv(SAMPLE_DATA_PATH)
+
+        df = conversion_plan.apply(lf).collect()
+        unpickled_df = pickle.loads(pickle.dumps(conversion_plan)).apply(lf).collect()
+
+        self.assertGreater(df.shape[0], 0)
+        self.assertTrue(unpickled_df.equals(df))
+
+    def test_plan_shared_across_threads(self):
+        conversion_plan = self.prepare_plan()
+        batches = [
+            df.lazy() for df in pl.read_csv(SAMPLE_DATA_PATH).iter_slices(n_rows=10)
+        ]
+
+        expected_dfs = [conversion_plan.apply(lf).collect() for lf in batches]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            dfs = list(
+                executor.map(lambda lf: conversion_plan.apply(lf).collect(), batches)
+            )
+
+        for df, expected_df in zip(dfs, expected_dfs):
+            self.assertTrue(df.equals(expected_df))
+
+    def test_schema_steps_compiled_once_across_threads(self):
+        conversion_plan = self.prepare_plan()
+        batches = [
+            df.lazy() for df in pl.read_csv(SAMPLE_DATA_PATH).iter_slices(n_rows=10)
+        ]
+
+        with mock.patch.object(
+            conversion_plan,
+            "__compile_process_steps__",
+            wraps=conversion_plan.__compile_process_steps__,
+        ) as compile_process_steps:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(
+                    executor.map(
+                        lambda lf: conversion_plan.apply(lf).collect(), batches
+                    )
+                )
+        self.assertEqual(compile_process_steps.call_count, 1)
+
+        # compiled steps are run state, which is not pickled
+        unpickled_plan = pickle.loads(pickle.dumps(conversion_plan))
+        self.assertEqual(unpickled_plan.__compiled_process_steps__, {})
+        self.assertEqual(unpickled_plan.__compiled_prepare_steps__, {})
+
+    def test_apply_has_no_side_effects(self):
+        conversion_plan = self.prepare_plan(column_prefix="src_")
+        lf = pl.read_csv(SAMPLE_DATA_PATH).head(10).lazy()
+        lf = lf.rename({column: f"src_{column}" for column in lf.columns})
+
+        columns = [conversion_plan.apply(lf).columns for _ in range(3)]
+
+        # re-mapped source columns are dropped on every batch, and are not carried over
+        self.assertEqual(columns[0], columns[1])
+        self.assertEqual(columns[0], columns[2])
+        self.assertFalse(
+            [column for column in columns[0] if f"src_{column}" in columns[0]]
+        )
+
+    def test_column_expressions_applied_in_layers(self):
+        column_exprs = [
+            pl.col("a").alias("b"),
+            pl.col("c").alias("d"),
+            (pl.col("b") + 1).alias("e"),
+            (pl.col("a") * 2).alias("a"),
+            (pl.col("e") + pl.col("d")).alias("f"),
+        ]
+        layers = CompiledConversionPlan.__expression_layers__(column_exprs)
+
+        # independent expressions share a layer, order within a layer follows the plan
+        self.assertEqual(
+            [[expr.meta.output_name() for expr in layer] for layer in layers],
+            [["b", "d"], ["e", "a"], ["f"]],
+        )
+
+        lf = pl.LazyFrame({"a": [1, 2], "c": [3, 4]})
+        sequential_lf = lf
+        for expr in column_exprs:
+            sequential_lf = sequential_lf.with_columns_seq(expr)
+        layered_lf = lf
+        for layer in layers:
+            layered_lf = layered_lf.with_columns(layer)
+
+        self.assertTrue(layered_lf.collect().equals(sequential_lf.collect()))
+
+    def test_layered_plan_converts_same(self):
+        conversion_plan = self.prepare_plan()
+        lf = pl.scan_csv(SAMPLE_DATA_PATH)
+
+        sequential_lf = conversion_plan.prepare(lf)
+        for expr in conversion_plan.column_exprs:
+            sequential_lf = sequential_lf.with_columns_seq(expr)
+        layered_lf = conversion_plan.__apply_compiled_steps__(
+            lf=conversion_plan.prepare(lf),
+            steps=conversion_plan.__column_expr_layers__,
+        )
+
+        self.assertLess(
+            len(conversion_plan.__column_expr_layers__),
+            len(conversion_plan.column_exprs),
+        )
+        self.assertTrue(
+            layered_lf.select(sequential_lf.columns)
+            .collect()
+            .equals(sequential_lf.collect())
+        )
+
+    def test_columns_dropped_after_last_use(self):
+        conversion_plan = self.prepare_plan(column_prefix="src_")
+        lf = pl.read_csv(SAMPLE_DATA_PATH).head(10).lazy()
+        lf = lf.rename({column: f"src_{column}" for column in lf.columns})
+        lf = conversion_plan.prepare(lf)
+
+        (
+            _,
+            drop_columns_after_stages,
+            _,
+        ) = conversion_plan.__compile_process_steps__(lf=lf)
+
+        # re-mapped columns not used by any stage are dropped before the first stage, and every
+        # temporary column is dropped exactly once
+        self.assertTrue(drop_columns_after_stages[0])
+        drop_columns = sum(drop_columns_after_stages, [])
+        self.assertEqual(len(drop_columns), len(set(drop_columns)))
+        for column in conversion_plan.__temporary_columns__:
+            self.assertIn(column, drop_columns)
+        self.assertFalse(set(drop_columns) & set(conversion_plan.process(lf).columns))
+
+    def test_shared_subexpressions_computed_once(self):
+        conversion_plan = self.prepare_plan()
+
+        # resource id and resource name plans take the same split part in a single layer
+        (layer,) = [
+            layer
+            for layer in conversion_plan.__column_expr_layers__
+            if any(
+                column_expr.meta.output_name() == "tmp_resource_id_ResourceType"
+                for column_expr in layer
+            )
+        ]
+        self.assertIn(
+            "ResourceName", [column_expr.meta.output_name() for column_expr in layer]
+        )
+
+        layer = [
+            column_expr
+            for column_expr in layer
+            if column_expr.meta.root_names() == ["lineItem/ResourceId"]
+        ]
+        lf = pl.LazyFrame({"lineItem/ResourceId": ["arn:aws:ec2:us-east-1:1:i/1"]})
+        self.assertEqual(lf.with_columns(layer).explain().count("list.get([6])"), 1)
+
+    def test_distinct_value_evaluation_converts_same(self):
+        lf = pl.concat([pl.read_csv(SAMPLE_DATA_PATH)] * 5).lazy()
+
+        conversion_plan = self.prepare_plan()
+        with mock.patch.object(
+            DistinctValueLayer,
+            "apply",
+            autospec=True,
+            side_effect=DistinctValueLayer.apply,
+        ) as apply:
+            df = conversion_plan.apply(lf).collect()
+
+        # low cardinality columns of the batch are evaluated on distinct values
+        self.assertTrue(
+            any(
+                set(call.args[0].distinct_value_columns)
+                & call.kwargs["low_cardinality_columns"]
+                for call in apply.call_args_list
+            )
+        )
+
+        conversion_plan.__distinct_ratio_threshold__ = None
+        conversion_plan.__compiled_process_steps__.clear()
+        self.assertTrue(conversion_plan.apply(lf).collect().equals(df))
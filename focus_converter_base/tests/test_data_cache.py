@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+import polars as pl
+import pyarrow.dataset as ds
+
+from focus_converter.converter import FocusConverter
+from focus_converter.data_loaders.data_loader import DataFormats, DataLoader
+
+SAMPLE_DATA_PATH = (
+    "tests/provider_config_tests/aws/sample-anonymous-aws-export-dataset.csv"
+)
+
+
+class TestDataCache(TestCase):
+    def create_converter(self, data_path, cache_dir, export_path=None):
+        converter = FocusConverter()
+        converter.load_provider_conversion_configs()
+        converter.load_data(data_path=data_path, data_format=DataFormats.CSV)
+        if export_path:
+            converter.configure_data_export(
+                export_path=export_path, export_include_source_columns=False
+            )
+        converter.prepare_horizontal_conversion_plan(provider="aws-cur")
+        converter.configure_data_cache(cache_dir=cache_dir)
+        return converter
+
+    def test_cached_batches_read_without_source(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, "cache")
+
+            converter = self.create_converter(SAMPLE_DATA_PATH, cache_dir)
+            self.assertFalse(converter.data_cache.is_cached)
+            batches = [lf.collect() for lf in converter.__scan_prepared_source__()]
+            self.assertTrue(converter.data_cache.is_cached)
+
+            # second run reads batches from the cache only
+            converter = self.create_converter(SAMPLE_DATA_PATH, cache_dir)
+            with mock.patch.object(
+                DataLoader, "data_scanner", side_effect=AssertionError
+            ):
+                cached_batches = [
+                    lf.collect() for lf in converter.__scan_prepared_source__()
+                ]
+
+        self.assertEqual(len(cached_batches), len(batches))
+        for cached_df, df in zip(cached_batches, batches):
+            self.assertTrue(cached_df.equals(df))
+
+    def test_cache_invalidated_on_source_change(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, "cache")
+            data_path = os.path.join(temp_dir, "data.csv")
+            shutil.copy(SAMPLE_DATA_PATH, data_path)
+
+            converter = self.create_converter(data_path, cache_dir)
+            list(converter.__scan_prepared_source__())
+            self.assertTrue(converter.data_cache.is_cached)
+
+            stat = os.stat(data_path)
+            os.utime(data_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+            converter = self.create_converter(data_path, cache_dir)
+            self.assertFalse(converter.data_cache.is_cached)
+
+    def test_incomplete_cache_entry_discarded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, "cache")
+
+            converter = self.create_converter(SAMPLE_DATA_PATH, cache_dir)
+            batches = converter.__scan_prepared_source__()
+            next(batches)
+            batches.close()
+
+            self.assertFalse(converter.data_cache.is_cached)
+            self.assertEqual(os.listdir(cache_dir), [])
+
+    def test_converted_output_same_with_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, "cache")
+
+            exported_dfs = []
+            for run in range(2):
+                export_path = os.path.join(temp_dir, f"export-{run}")
+                self.create_converter(
+                    SAMPLE_DATA_PATH, cache_dir, export_path=export_path
+                ).convert()
+                exported_dfs.append(
+                    pl.scan_pyarrow_dataset(ds.dataset(export_path)).collect()
+                )
+
+        self.assertGreater(exported_dfs[0].shape[0], 0)
+        self.assertTrue(exported_dfs[0].equals(exported_dfs[1]))
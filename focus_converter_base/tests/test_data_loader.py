@@ -0,0 +1,1076 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import TestCase, mock
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from focus_converter.converter import FocusConverter
+from focus_converter.data_loaders.csv_blocks import (
+    iter_csv_record_blocks,
+    split_csv_header,
+)
+from focus_converter.data_loaders.data_loader import (
+    DataFormats,
+    DataLoader,
+    ParquetDataFormat,
+)
+from focus_converter.data_loaders.delta_log import DeltaTableLog
+from focus_converter.data_loaders.partitioning import BillingPeriodRange
+from focus_converter.data_loaders.provider_sensor import ProviderSensor
+
+
+def write_sample_csv(path, row_count):
+    pl.DataFrame(
+        {
+            "line_item_id": list(range(row_count)),
+            "line_item_unblended_cost": [i * 0.5 for i in range(row_count)],
+        }
+    ).write_csv(path)
+
+
+class TestDataLoaderCSV(TestCase):
+    def test_csv_loaded_in_batches(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "test.csv")
+            write_sample_csv(temp_file_path, row_count=5000)
+
+            data_loader = DataLoader(
+                data_path=temp_file_path, data_format=DataFormats.CSV
+            )
+            with mock.patch(
+                "focus_converter.data_loaders.data_loader.DEFAULT_BATCH_READ_SIZE",
+                500,
+            ):
+                batches = [lf.collect() for lf in data_loader.data_scanner()]
+
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(sum(df.shape[0] for df in batches), 5000)
+
+        # schema is inferred once and shared across all batches
+        for df in batches:
+            self.assertEqual(df.schema, batches[0].schema)
+
+        df = pl.concat(batches)
+        self.assertEqual(df["line_item_id"].to_list(), list(range(5000)))
+
+    def test_csv_blocks_split_on_record_boundaries(self):
+        # quoted new lines and escaped quotes must not be used as block boundaries
+        rows = [
+            f'{i},"line one\nline ""two""\n",{i * 0.5}'
+            if i % 3 == 0
+            else f"{i},plain,{i * 0.5}"
+            for i in range(2000)
+        ]
+
+        for line_terminator, trailing_new_line in [("\n", True), ("\r\n", False)]:
+            with self.subTest(line_terminator=line_terminator):
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    temp_file_path = os.path.join(temp_dir, "test.csv")
+                    content = line_terminator.join(
+                        [
+                            'line_item_id,"line_item_description",line_item_unblended_cost'
+                        ]
+                        + rows
+                    )
+                    with open(temp_file_path, "w", newline="") as fd:
+                        fd.write(
+                            content + (line_terminator if trailing_new_line else "")
+                        )
+
+                    expected_df = pl.read_csv(temp_file_path)
+
+                    with open(temp_file_path, "rb") as fd:
+                        blocks = list(iter_csv_record_blocks(fd, block_size=1024))
+                    header, _ = split_csv_header(blocks[0])
+                    self.assertGreater(len(blocks), 1)
+                    self.assertEqual(
+                        header.rstrip(),
+                        b'line_item_id,"line_item_description",line_item_unblended_cost',
+                    )
+
+                    data_loader = DataLoader(
+                        data_path=temp_file_path, data_format=DataFormats.CSV
+                    )
+                    with mock.patch(
+                        "focus_converter.data_loaders.data_loader.CSV_BYTE_RANGE_SIZE",
+                        1024,
+                    ):
+                        df = pl.concat(
+                            [lf.collect() for lf in data_loader.data_scanner()]
+                        )
+
+                self.assertTrue(df.equals(expected_df))
+
+
+class TestDataLoaderMultipleCSV(TestCase):
+    def write_daily_csv_files(self, temp_dir):
+        # daily files under monthly date range directories, one of them compressed
+        for day in range(1, 5):
+            for month_directory in ["20230101-20230201", "20230201-20230301"]:
+                directory = os.path.join(temp_dir, month_directory)
+                os.makedirs(directory, exist_ok=True)
+
+                df = pl.DataFrame(
+                    {
+                        "date": [
+                            f"{month_directory[:4]}-{month_directory[4:6]}-{day:02d}"
+                        ]
+                        * 10,
+                        "line_item_unblended_cost": [i * 0.5 for i in range(10)],
+                    }
+                )
+                if day == 4:
+                    with gzip.open(
+                        os.path.join(directory, f"day-{day}.csv.gz"), "wb"
+                    ) as fd:
+                        df.write_csv(fd)
+                else:
+                    df.write_csv(os.path.join(directory, f"day-{day}.csv"))
+
+        # non csv files are skipped when reading a directory
+        with open(os.path.join(temp_dir, "manifest.json"), "w") as fd:
+            fd.write("{}")
+
+    def load(self, data_path, **kwargs):
+        data_loader = DataLoader(
+            data_path=data_path, data_format=DataFormats.CSV, **kwargs
+        )
+        batches = [lf.collect() for lf in data_loader.data_scanner()]
+        for df in batches:
+            self.assertEqual(df.schema, batches[0].schema)
+        return pl.concat(batches)
+
+    def test_directory_files_loaded_in_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.write_daily_csv_files(temp_dir)
+            df = self.load(temp_dir)
+
+        self.assertEqual(df.shape[0], 80)
+        self.assertEqual(df.schema["line_item_unblended_cost"], pl.Float64)
+        self.assertEqual(
+            df["date"].unique(maintain_order=True).to_list(),
+            [f"2023-{month:02d}-{day:02d}" for month in [1, 2] for day in range(1, 5)],
+        )
+
+    def test_files_streamed_in_batches(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.write_daily_csv_files(temp_dir)
+
+            data_loader = DataLoader(data_path=temp_dir, data_format=DataFormats.CSV)
+            with mock.patch(
+                "focus_converter.data_loaders.data_loader.CSV_STREAM_BLOCK_SIZE", 64
+            ):
+                batches = [lf.collect() for lf in data_loader.data_scanner()]
+
+                # batches stop being read once the consumer stops
+                scanner = data_loader.data_scanner()
+                next(scanner)
+                scanner.close()
+
+        # compressed files are streamed in blocks instead of being read whole
+        self.assertGreater(len(batches), 8)
+        self.assertEqual(pl.concat(batches).shape[0], 80)
+
+    def test_glob_files_loaded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.write_daily_csv_files(temp_dir)
+            df = self.load(os.path.join(temp_dir, "*", "day-[12].csv"))
+
+        self.assertEqual(df.shape[0], 40)
+        self.assertEqual(
+            sorted(df["date"].unique().to_list()),
+            ["2023-01-01", "2023-01-02", "2023-02-01", "2023-02-02"],
+        )
+
+    def test_files_pruned_by_billing_period(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.write_daily_csv_files(temp_dir)
+            df = self.load(temp_dir, billing_period_from="2023-02")
+
+        self.assertEqual(df.shape[0], 40)
+        self.assertTrue(df["date"].str.starts_with("2023-02").all())
+
+    def test_provider_sensor_reads_csv_directory(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for file_name in ["a.csv", "b.csv"]:
+                with open(
+                    "tests/provider_config_tests/aws/sample-anonymous-aws-export-dataset.csv",
+                    "rb",
+                ) as fd, open(os.path.join(temp_dir, file_name), "wb") as csv_fd:
+                    csv_fd.write(fd.read())
+
+            for data_path in [temp_dir, os.path.join(temp_dir, "*.csv")]:
+                provider_sensor = ProviderSensor(base_path=data_path)
+                provider_sensor.load()
+
+                self.assertEqual(provider_sensor.data_format, DataFormats.CSV)
+                self.assertEqual(provider_sensor.provider, "aws-cur")
+
+
+class TestDataLoaderCompressedCSV(TestCase):
+    def write_compressed_csv(self, path, compression, row_count):
+        # compressed file written without an extension, compression is detected by magic bytes
+        df = pl.DataFrame(
+            {
+                "line_item_id": list(range(row_count)),
+                "line_item_unblended_cost": [i * 0.5 for i in range(row_count)],
+                "line_item_description": [f"item {i}" for i in range(row_count)],
+                "is_credit": [i % 2 == 0 for i in range(row_count)],
+            }
+        )
+        with pa.CompressedOutputStream(path, compression) as stream:
+            stream.write(df.write_csv().encode())
+        return df
+
+    def test_compressed_csv_streamed_in_batches(self):
+        for compression in ["gzip", "bz2", "zstd"]:
+            with self.subTest(compression=compression):
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    temp_file_path = os.path.join(temp_dir, "report")
+                    expected_df = self.write_compressed_csv(
+                        temp_file_path, compression, row_count=5000
+                    )
+
+                    data_loader = DataLoader(
+                        data_path=temp_file_path, data_format=DataFormats.CSV
+                    )
+                    with mock.patch(
+                        "focus_converter.data_loaders.data_loader.CSV_STREAM_BLOCK_SIZE",
+                        16 << 10,
+                    ):
+                        batches = [lf.collect() for lf in data_loader.data_scanner()]
+
+                self.assertGreater(len(batches), 1)
+                for df in batches:
+                    self.assertEqual(df.schema, expected_df.schema)
+                self.assertTrue(pl.concat(batches).equals(expected_df))
+
+    def test_compressed_csv_invalid_values_set_to_null(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "report.csv.gz")
+            with gzip.open(temp_file_path, "wt") as fd:
+                fd.write("line_item_id,line_item_unblended_cost\n")
+                fd.write("".join(f"{i},{i * 0.5}\n" for i in range(200)))
+                fd.write("200,not a number\n201,\n")
+
+            data_loader = DataLoader(
+                data_path=temp_file_path, data_format=DataFormats.CSV
+            )
+            df = pl.concat([lf.collect() for lf in data_loader.data_scanner()])
+
+        self.assertEqual(df.schema["line_item_unblended_cost"], pl.Float64)
+        self.assertEqual(df.shape[0], 202)
+        self.assertEqual(df["line_item_unblended_cost"].tail(2).to_list(), [None, None])
+
+    def test_provider_sensor_reads_compressed_csv(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "report")
+            with open(
+                "tests/provider_config_tests/aws/sample-anonymous-aws-export-dataset.csv",
+                "rb",
+            ) as fd, gzip.open(temp_file_path, "wb") as compressed_fd:
+                compressed_fd.write(fd.read())
+
+            provider_sensor = ProviderSensor(base_path=temp_file_path)
+            provider_sensor.load()
+
+        self.assertEqual(provider_sensor.data_format, DataFormats.CSV)
+        self.assertEqual(provider_sensor.provider, "aws-cur")
+
+
+class TestDataLoaderParquetFile(TestCase):
+    def test_parquet_file_loaded_by_row_group(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "test.parquet")
+            pl.DataFrame(
+                {
+                    "line_item_id": list(range(5000)),
+                    "line_item_unblended_cost": [i * 0.5 for i in range(5000)],
+                }
+            ).write_parquet(temp_file_path, row_group_size=1000)
+
+            data_loader = DataLoader(
+                data_path=temp_file_path,
+                data_format=DataFormats.PARQUET,
+                parquet_data_format=ParquetDataFormat.FILE,
+            )
+            with mock.patch(
+                "focus_converter.data_loaders.data_loader.DEFAULT_BATCH_READ_SIZE",
+                1000,
+            ):
+                batches = [lf.collect() for lf in data_loader.data_scanner()]
+
+        self.assertEqual([df.shape[0] for df in batches], [1000] * 5)
+        df = pl.concat(batches)
+        self.assertEqual(df["line_item_id"].to_list(), list(range(5000)))
+
+
+def write_delta_commit(table_path, version, actions):
+    log_path = os.path.join(table_path, "_delta_log")
+    os.makedirs(log_path, exist_ok=True)
+    with open(os.path.join(log_path, f"{version:020}.json"), "w") as fd:
+        for action in actions:
+            fd.write(json.dumps(action) + "\n")
+
+
+def delta_add_action(table_path, file_name, line_item_ids, billing_period):
+    file_path = os.path.join(table_path, f"billing_period={billing_period}")
+    os.makedirs(file_path, exist_ok=True)
+    pl.DataFrame({"line_item_id": line_item_ids}).write_parquet(
+        os.path.join(file_path, file_name)
+    )
+    return {
+        "add": {
+            "path": f"billing_period={billing_period}/{file_name}",
+            "partitionValues": {"billing_period": billing_period},
+            "size": 0,
+            "dataChange": True,
+            "stats": json.dumps(
+                {
+                    "numRecords": len(line_item_ids),
+                    "minValues": {"line_item_id": min(line_item_ids)},
+                    "maxValues": {"line_item_id": max(line_item_ids)},
+                }
+            ),
+        }
+    }
+
+
+DELTA_METADATA_ACTION = {
+    "metaData": {
+        "id": "test",
+        "format": {"provider": "parquet", "options": {}},
+        "schemaString": json.dumps(
+            {
+                "type": "struct",
+                "fields": [
+                    {"name": "line_item_id", "type": "long"},
+                    {"name": "billing_period", "type": "string"},
+                ],
+            }
+        ),
+        "partitionColumns": ["billing_period"],
+    }
+}
+
+
+class TestDataLoaderDelta(TestCase):
+    def write_sample_table(self, table_path):
+        # version 0 writes two files, version 1 compacts them into one file and version 2 appends
+        write_delta_commit(
+            table_path,
+            0,
+            [
+                DELTA_METADATA_ACTION,
+                delta_add_action(table_path, "part-0.parquet", [1, 2], "2023-01"),
+                delta_add_action(table_path, "part-1.parquet", [3, 4], "2023-01"),
+            ],
+        )
+        write_delta_commit(
+            table_path,
+            1,
+            [
+                {"remove": {"path": "billing_period=2023-01/part-0.parquet"}},
+                {"remove": {"path": "billing_period=2023-01/part-1.parquet"}},
+                delta_add_action(table_path, "part-2.parquet", [1, 2, 3, 4], "2023-01"),
+            ],
+        )
+        write_delta_commit(
+            table_path,
+            2,
+            [delta_add_action(table_path, "part-3.parquet", [5, 6], "2023-02")],
+        )
+
+    @staticmethod
+    def read_table(table_path, version=None):
+        data_loader = DataLoader(
+            data_path=table_path,
+            data_format=DataFormats.PARQUET,
+            parquet_data_format=ParquetDataFormat.DELTA,
+            delta_table_version=version,
+        )
+        return pl.concat([lf.collect() for lf in data_loader.data_scanner()]).sort(
+            "line_item_id"
+        )
+
+    def test_latest_version_skips_tombstoned_files(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            self.write_sample_table(table_path)
+
+            df = self.read_table(table_path)
+            self.assertEqual(df["line_item_id"].to_list(), [1, 2, 3, 4, 5, 6])
+            self.assertEqual(
+                df["billing_period"].to_list(), ["2023-01"] * 4 + ["2023-02"] * 2
+            )
+
+    def test_requested_version(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            self.write_sample_table(table_path)
+
+            df = self.read_table(table_path, version=0)
+            self.assertEqual(df["line_item_id"].to_list(), [1, 2, 3, 4])
+
+            with self.assertRaises(ValueError):
+                self.read_table(table_path, version=3)
+
+    def test_log_replayed_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            self.write_sample_table(table_path)
+
+            # checkpoint version 1 and drop commits covered by it
+            delta_log = DeltaTableLog(table_path=table_path)
+            delta_files = delta_log.load(version=1)
+            pq.write_table(
+                pa.table(
+                    {
+                        "metaData": [
+                            {
+                                "id": "test",
+                                "schemaString": DELTA_METADATA_ACTION["metaData"][
+                                    "schemaString"
+                                ],
+                                "partitionColumns": ["billing_period"],
+                            },
+                            None,
+                        ],
+                        "add": [
+                            None,
+                            {
+                                "path": "billing_period=2023-01/part-2.parquet",
+                                "partitionValues": [("billing_period", "2023-01")],
+                                "stats": delta_files[0].stats.model_dump_json(
+                                    by_alias=True
+                                ),
+                            },
+                        ],
+                    }
+                ),
+                os.path.join(table_path, "_delta_log", f"{1:020}.checkpoint.parquet"),
+            )
+            os.remove(os.path.join(table_path, "_delta_log", f"{0:020}.json"))
+            os.remove(os.path.join(table_path, "_delta_log", f"{1:020}.json"))
+
+            delta_files = DeltaTableLog(table_path=table_path).load()
+            self.assertEqual(
+                sorted(os.path.basename(f.path) for f in delta_files),
+                ["part-2.parquet", "part-3.parquet"],
+            )
+            self.assertEqual(delta_files[0].stats.max_values["line_item_id"], 4)
+
+            df = self.read_table(table_path)
+            self.assertEqual(df["line_item_id"].to_list(), [1, 2, 3, 4, 5, 6])
+
+    def test_partition_values_pruned_by_billing_period(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            self.write_sample_table(table_path)
+
+            data_loader = DataLoader(
+                data_path=table_path,
+                data_format=DataFormats.PARQUET,
+                parquet_data_format=ParquetDataFormat.DELTA,
+                billing_period_from="2023-02",
+            )
+            df = pl.concat([lf.collect() for lf in data_loader.data_scanner()])
+            self.assertEqual(sorted(df["line_item_id"].to_list()), [5, 6])
+
+    def test_files_pruned_by_billing_period_stats(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            actions = [
+                {
+                    "metaData": {
+                        "id": "test",
+                        "schemaString": json.dumps({"type": "struct", "fields": []}),
+                        "partitionColumns": [],
+                    }
+                }
+            ]
+            for index, invoice_month in enumerate(["202301", "202302", "202303"]):
+                pq.write_table(
+                    pa.table(
+                        {
+                            "line_item_id": [index],
+                            "invoice": [{"month": invoice_month}],
+                        }
+                    ),
+                    os.path.join(table_path, f"part-{index}.parquet"),
+                )
+                actions.append(
+                    {
+                        "add": {
+                            "path": f"part-{index}.parquet",
+                            "partitionValues": {},
+                            "stats": json.dumps(
+                                {
+                                    "numRecords": 1,
+                                    "minValues": {"invoice": {"month": invoice_month}},
+                                    "maxValues": {"invoice": {"month": invoice_month}},
+                                }
+                            ),
+                        }
+                    }
+                )
+            write_delta_commit(table_path, 0, actions)
+
+            data_loader = DataLoader(
+                data_path=table_path,
+                data_format=DataFormats.PARQUET,
+                parquet_data_format=ParquetDataFormat.DELTA,
+                billing_period_from="2023-02",
+                billing_period_to="2023-02",
+            )
+            df = pl.concat([lf.collect() for lf in data_loader.data_scanner()])
+            self.assertEqual(df["line_item_id"].to_list(), [1])
+
+    def test_timestamp_partition_values(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            os.makedirs(os.path.join(table_path, "usage_start=2023-01-01"))
+            pl.DataFrame({"line_item_id": [1, 2]}).write_parquet(
+                os.path.join(table_path, "usage_start=2023-01-01", "part-0.parquet")
+            )
+            write_delta_commit(
+                table_path,
+                0,
+                [
+                    {
+                        "metaData": {
+                            "id": "test",
+                            "schemaString": json.dumps(
+                                {
+                                    "type": "struct",
+                                    "fields": [
+                                        {"name": "line_item_id", "type": "long"},
+                                        {"name": "usage_start", "type": "timestamp"},
+                                    ],
+                                }
+                            ),
+                            "partitionColumns": ["usage_start"],
+                        }
+                    },
+                    {
+                        "add": {
+                            "path": "usage_start=2023-01-01/part-0.parquet",
+                            "partitionValues": {
+                                "usage_start": "2023-01-01 10:30:00.500000"
+                            },
+                        }
+                    },
+                ],
+            )
+
+            df = self.read_table(table_path)
+            self.assertEqual(
+                df.schema["usage_start"], pl.Datetime(time_unit="us", time_zone="UTC")
+            )
+            self.assertEqual(
+                df["usage_start"].to_list()[0],
+                datetime(2023, 1, 1, 10, 30, 0, 500000, tzinfo=timezone.utc),
+            )
+
+    def test_provider_sensor_unreadable_delta_table(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            # all files removed in the latest version
+            self.write_sample_table(table_path)
+            write_delta_commit(
+                table_path,
+                3,
+                [
+                    {"remove": {"path": "billing_period=2023-01/part-2.parquet"}},
+                    {"remove": {"path": "billing_period=2023-02/part-3.parquet"}},
+                ],
+            )
+
+            with self.assertRaisesRegex(RuntimeError, "no live data files"):
+                ProviderSensor(base_path=table_path).__sense_file_format__()
+
+            add_action = delta_add_action(table_path, "part-4.parquet", [7], "2023-03")
+            add_action["add"]["deletionVector"] = {"storageType": "u"}
+            write_delta_commit(table_path, 4, [add_action])
+
+            with self.assertRaisesRegex(RuntimeError, "not supported"):
+                ProviderSensor(base_path=table_path).__sense_file_format__()
+
+    def test_unsupported_delta_table_features(self):
+        column_mapping_action = {
+            "metaData": {
+                **DELTA_METADATA_ACTION["metaData"],
+                "configuration": {"delta.columnMapping.mode": "name"},
+            }
+        }
+        protocol_action = {
+            "protocol": {
+                "minReaderVersion": 3,
+                "minWriterVersion": 7,
+                "readerFeatures": ["deletionVectors", "v2Checkpoint"],
+            }
+        }
+
+        for action, message in [
+            (column_mapping_action, "column mapping"),
+            (protocol_action, "v2Checkpoint"),
+        ]:
+            with self.subTest(message=message):
+                with tempfile.TemporaryDirectory() as table_path:
+                    self.write_sample_table(table_path)
+                    write_delta_commit(table_path, 3, [action])
+
+                    with self.assertRaisesRegex(NotImplementedError, message):
+                        DeltaTableLog(table_path=table_path).load()
+
+    def test_provider_sensor_detects_delta_table(self):
+        with tempfile.TemporaryDirectory() as table_path:
+            self.write_sample_table(table_path)
+
+            provider_sensor = ProviderSensor(base_path=table_path)
+            data_sample = provider_sensor.__sense_file_format__()
+
+            self.assertEqual(
+                provider_sensor.parquet_data_format, ParquetDataFormat.DELTA
+            )
+            self.assertEqual(len(data_sample), 6)
+
+
+class TestDataLoaderBillingPeriodPartitions(TestCase):
+    @staticmethod
+    def write_partitioned_dataset(base_path, directory_template):
+        for year in [2022, 2023]:
+            for month in range(1, 13):
+                partition_path = os.path.join(
+                    base_path, directory_template.format(year=year, month=month)
+                )
+                os.makedirs(partition_path)
+                pl.DataFrame({"period": [year * 100 + month]}).write_parquet(
+                    os.path.join(partition_path, "part-0.parquet")
+                )
+
+    @staticmethod
+    def read_periods(base_path, billing_period_from, billing_period_to):
+        data_loader = DataLoader(
+            data_path=base_path,
+            data_format=DataFormats.PARQUET,
+            parquet_data_format=ParquetDataFormat.DATASET,
+            billing_period_from=billing_period_from,
+            billing_period_to=billing_period_to,
+        )
+        df = pl.concat([lf.collect() for lf in data_loader.data_scanner()])
+
+        # partition fields are used for pruning only and not added as source columns
+        assert df.columns == ["period"]
+        return sorted(df["period"].to_list())
+
+    def test_year_month_partitions_pruned(self):
+        with tempfile.TemporaryDirectory() as base_path:
+            self.write_partitioned_dataset(base_path, "year={year}/month={month}")
+
+            self.assertEqual(
+                self.read_periods(base_path, "2022-11", "2023-02"),
+                [202211, 202212, 202301, 202302],
+            )
+            self.assertEqual(self.read_periods(base_path, "2023-12", None), [202312])
+            self.assertEqual(len(self.read_periods(base_path, None, None)), 24)
+
+    def test_billing_period_partitions_pruned(self):
+        with tempfile.TemporaryDirectory() as base_path:
+            self.write_partitioned_dataset(
+                base_path, "BILLING_PERIOD={year}-{month:02}"
+            )
+
+            self.assertEqual(
+                self.read_periods(base_path, "2023-01", "2023-01"), [202301]
+            )
+
+    def test_date_range_directories_pruned(self):
+        with tempfile.TemporaryDirectory() as base_path:
+            self.write_partitioned_dataset(
+                base_path, "report/{year}{month:02}01-{year}{month:02}28"
+            )
+
+            self.assertEqual(
+                self.read_periods(base_path, None, "2022-02"), [202201, 202202]
+            )
+
+    def test_billing_period_ignored_for_single_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "test.csv")
+            write_sample_csv(temp_file_path, row_count=10)
+
+            data_loader = DataLoader(
+                data_path=temp_file_path,
+                data_format=DataFormats.CSV,
+                billing_period_from="2023-01",
+            )
+            with self.assertLogs(level="WARNING"):
+                df = pl.concat([lf.collect() for lf in data_loader.data_scanner()])
+            self.assertEqual(df.shape[0], 10)
+
+    def test_invalid_billing_period(self):
+        for billing_period in ["2023-13", "202301", "2023-1"]:
+            with self.assertRaises(ValueError):
+                BillingPeriodRange(
+                    billing_period_from=billing_period, billing_period_to=None
+                )
+
+        with self.assertRaises(ValueError):
+            BillingPeriodRange(
+                billing_period_from="2023-02", billing_period_to="2023-01"
+            )
+
+    def test_date_range_directory_end_is_exclusive(self):
+        billing_period_range = BillingPeriodRange(
+            billing_period_from="2023-02", billing_period_to=None
+        )
+        self.assertFalse(
+            billing_period_range.path_matches(
+                "/data/20230101-20230201/part-0.csv", "/data"
+            )
+        )
+        self.assertTrue(
+            billing_period_range.path_matches(
+                "/data/20230201-20230301/part-0.csv", "/data"
+            )
+        )
+
+
+class TestDataLoaderAWSCURManifest(TestCase):
+    def write_sample_report(self, report_path, row_offset, row_count=3):
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        df = pl.DataFrame(
+            {
+                "identity/LineItemId": [str(row_offset + i) for i in range(row_count)],
+                "lineItem/UnblendedCost": [str(i * 0.5) for i in range(row_count)],
+                "lineItem/UsageStartDate": ["2023-01-01T00:00:00Z"] * row_count,
+            }
+        )
+        with gzip.open(report_path, "wb") as fd:
+            df.write_csv(fd)
+
+    def write_sample_manifest(
+        self, report_directory, billing_period_start, report_row_count=3
+    ):
+        # report keys are s3 keys, synced locally under the report date range directory
+        report_keys = []
+        for part in range(3):
+            report_keys.append(
+                f"cur/my-report/20230101-20230201/assembly-id/my-report-{part + 1}.csv.gz"
+            )
+            self.write_sample_report(
+                os.path.join(
+                    report_directory,
+                    "assembly-id",
+                    f"my-report-{part + 1}.csv.gz",
+                ),
+                row_offset=part * report_row_count,
+                row_count=report_row_count,
+            )
+
+        manifest_path = os.path.join(report_directory, "my-report-Manifest.json")
+        with open(manifest_path, "w") as fd:
+            json.dump(
+                {
+                    "columns": [
+                        {
+                            "category": "identity",
+                            "name": "LineItemId",
+                            "type": "String",
+                        },
+                        {
+                            "category": "lineItem",
+                            "name": "UnblendedCost",
+                            "type": "BigDecimal",
+                        },
+                        {
+                            "category": "lineItem",
+                            "name": "UsageStartDate",
+                            "type": "DateTime",
+                        },
+                    ],
+                    "reportKeys": report_keys,
+                    "billingPeriod": {
+                        "start": billing_period_start,
+                        "end": "20230201T000000.000Z",
+                    },
+                    "compression": "GZIP",
+                    "contentType": "text/csv",
+                },
+                fd,
+            )
+        return manifest_path
+
+    def test_report_keys_loaded_in_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = self.write_sample_manifest(
+                temp_dir, billing_period_start="20230101T000000.000Z"
+            )
+
+            data_loader = DataLoader(
+                data_path=manifest_path, data_format=DataFormats.AWS_CUR_MANIFEST
+            )
+            df = pl.concat([lf.collect() for lf in data_loader.data_scanner()])
+
+        self.assertEqual(
+            df["identity/LineItemId"].to_list(), [str(i) for i in range(9)]
+        )
+
+        # column types come from the manifest, no inference
+        self.assertEqual(df.schema["lineItem/UnblendedCost"], pl.Float64)
+        self.assertEqual(df.schema["identity/LineItemId"], pl.Utf8)
+        self.assertEqual(df.schema["lineItem/UsageStartDate"], pl.Utf8)
+
+    def test_report_files_streamed_in_batches(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = self.write_sample_manifest(
+                temp_dir,
+                billing_period_start="20230101T000000.000Z",
+                report_row_count=2000,
+            )
+
+            data_loader = DataLoader(
+                data_path=manifest_path, data_format=DataFormats.AWS_CUR_MANIFEST
+            )
+            with mock.patch(
+                "focus_converter.data_loaders.data_loader.CSV_STREAM_BLOCK_SIZE",
+                16 << 10,
+            ):
+                batches = [lf.collect() for lf in data_loader.data_scanner()]
+
+        # more than one batch per report file
+        self.assertGreater(len(batches), 3)
+        self.assertEqual(
+            pl.concat(batches)["identity/LineItemId"].to_list(),
+            [str(i) for i in range(6000)],
+        )
+
+    def test_cache_key_includes_report_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = self.write_sample_manifest(
+                temp_dir, billing_period_start="20230101T000000.000Z"
+            )
+            data_loader = DataLoader(
+                data_path=manifest_path, data_format=DataFormats.AWS_CUR_MANIFEST
+            )
+            cache_key_args = data_loader.cache_key_args()
+
+            # report part replaced under the same key, manifest unchanged
+            self.write_sample_report(
+                os.path.join(temp_dir, "assembly-id", "my-report-2.csv.gz"),
+                row_offset=100,
+                row_count=4,
+            )
+            self.assertNotEqual(data_loader.cache_key_args(), cache_key_args)
+
+    def test_manifest_outside_billing_period_skipped(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = self.write_sample_manifest(
+                temp_dir, billing_period_start="20230101T000000.000Z"
+            )
+
+            data_loader = DataLoader(
+                data_path=manifest_path,
+                data_format=DataFormats.AWS_CUR_MANIFEST,
+                billing_period_from="2023-02",
+            )
+            self.assertEqual(list(data_loader.data_scanner()), [])
+
+    def test_missing_report_key(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = self.write_sample_manifest(
+                temp_dir, billing_period_start="20230101T000000.000Z"
+            )
+            os.remove(os.path.join(temp_dir, "assembly-id", "my-report-2.csv.gz"))
+
+            data_loader = DataLoader(
+                data_path=manifest_path, data_format=DataFormats.AWS_CUR_MANIFEST
+            )
+            with self.assertRaises(FileNotFoundError):
+                list(data_loader.data_scanner())
+
+    def test_provider_sensor_detects_manifest(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = self.write_sample_manifest(
+                temp_dir, billing_period_start="20230101T000000.000Z"
+            )
+
+            provider_sensor = ProviderSensor(base_path=manifest_path)
+            provider_sensor.load()
+
+        self.assertEqual(provider_sensor.data_format, DataFormats.AWS_CUR_MANIFEST)
+        self.assertEqual(provider_sensor.provider, "aws-cur")
+
+
+class TestDataLoaderNDJSON(TestCase):
+    def write_sample_export(self, path, row_count, compression=None):
+        # BigQuery billing export rows with nested structs and repeated fields
+        rows = []
+        for i in range(row_count):
+            row = {
+                "billing_account_id": "0123-4567",
+                "service": {"id": f"service-{i % 3}", "description": "Compute Engine"},
+                "invoice": {"month": "202301"},
+                # whole numbers in the first rows are still read as floats
+                "cost": i if i < 100 else i * 0.5,
+                "labels": [{"key": "env", "value": f"env-{i}"}],
+                "credits": [],
+                # only set on later rows, first rows are null
+                "project": {"id": f"project-{i}"} if i >= 100 else None,
+            }
+            rows.append(json.dumps(row))
+
+        content = "\n".join(rows).encode()
+        if compression:
+            with pa.CompressedOutputStream(path, compression) as stream:
+                stream.write(content)
+        else:
+            with open(path, "wb") as fd:
+                fd.write(content)
+
+    def test_ndjson_loaded_in_batches(self):
+        for compression in [None, "gzip"]:
+            with self.subTest(compression=compression):
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    temp_file_path = os.path.join(temp_dir, "export.json")
+                    self.write_sample_export(
+                        temp_file_path, row_count=500, compression=compression
+                    )
+
+                    data_loader = DataLoader(
+                        data_path=temp_file_path, data_format=DataFormats.NDJSON
+                    )
+                    with mock.patch(
+                        "focus_converter.data_loaders.data_loader.NDJSON_BLOCK_SIZE",
+                        4096,
+                    ):
+                        batches = [lf.collect() for lf in data_loader.data_scanner()]
+
+                self.assertGreater(len(batches), 1)
+                for df in batches:
+                    self.assertEqual(df.schema["cost"], pl.Float64)
+
+                # project is only typed from the block where its values are first seen
+                df = pl.concat(batches, how="diagonal_relaxed")
+                self.assertEqual(df.shape[0], 500)
+                self.assertEqual(
+                    df["cost"].to_list(),
+                    [float(i if i < 100 else i * 0.5) for i in range(500)],
+                )
+
+                # nested fields are decoded as structs and lists
+                self.assertEqual(
+                    df.select(pl.col("service").struct.field("description"))
+                    .unique()
+                    .to_series()
+                    .to_list(),
+                    ["Compute Engine"],
+                )
+                self.assertEqual(
+                    df["labels"].list.get(0).struct.field("value").to_list(),
+                    [f"env-{i}" for i in range(500)],
+                )
+                self.assertEqual(
+                    df["project"].struct.field("id").drop_nulls().to_list(),
+                    [f"project-{i}" for i in range(100, 500)],
+                )
+
+    def test_provider_sensor_detects_ndjson(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "export.json.gz")
+            self.write_sample_export(temp_file_path, row_count=10, compression="gzip")
+
+            provider_sensor = ProviderSensor(base_path=temp_file_path)
+            provider_sensor.load()
+
+        self.assertEqual(provider_sensor.data_format, DataFormats.NDJSON)
+        self.assertEqual(provider_sensor.provider, "gcp")
+
+
+class TestDataLoaderProjection(TestCase):
+    SAMPLE_DF = pl.DataFrame(
+        {
+            "line_item_id": list(range(100)),
+            "line_item_unblended_cost": [i * 0.5 for i in range(100)],
+            "line_item_description": [f"item {i}" for i in range(100)],
+        }
+    )
+
+    def read_projected(self, data_path, **kwargs):
+        data_loader = DataLoader(data_path=data_path, **kwargs)
+        data_loader.configure_columns(
+            ["line_item_description", "line_item_id", "missing_column"]
+        )
+        return pl.concat([lf.collect() for lf in data_loader.data_scanner()])
+
+    def assert_projected(self, df):
+        # columns are read in source order, columns missing in source are skipped
+        self.assertEqual(df.columns, ["line_item_id", "line_item_description"])
+        self.assertTrue(
+            df.equals(self.SAMPLE_DF.select(["line_item_id", "line_item_description"]))
+        )
+
+    def test_csv_columns_projected(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "test.csv")
+            self.SAMPLE_DF.write_csv(temp_file_path)
+
+            self.assert_projected(
+                self.read_projected(temp_file_path, data_format=DataFormats.CSV)
+            )
+
+    def test_compressed_csv_columns_projected(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, "test.csv.gz")
+            with gzip.open(temp_file_path, "wb") as fd:
+                fd.write(self.SAMPLE_DF.write_csv().encode())
+
+            self.assert_projected(
+                self.read_projected(temp_file_path, data_format=DataFormats.CSV)
+            )
+
+    def test_csv_directory_columns_projected(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.SAMPLE_DF.head(50).write_csv(os.path.join(temp_dir, "part-0.csv"))
+            with gzip.open(os.path.join(temp_dir, "part-1.csv.gz"), "wb") as fd:
+                fd.write(self.SAMPLE_DF.tail(50).write_csv().encode())
+
+            self.assert_projected(
+                self.read_projected(temp_dir, data_format=DataFormats.CSV)
+            )
+
+    def test_parquet_columns_projected(self):
+        for parquet_data_format in [ParquetDataFormat.FILE, ParquetDataFormat.DATASET]:
+            with self.subTest(parquet_data_format=parquet_data_format):
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    temp_file_path = os.path.join(temp_dir, "test.parquet")
+                    self.SAMPLE_DF.write_parquet(temp_file_path)
+
+                    self.assert_projected(
+                        self.read_projected(
+                            temp_file_path,
+                            data_format=DataFormats.PARQUET,
+                            parquet_data_format=parquet_data_format,
+                        )
+                    )
+
+    def test_converter_pushes_plan_columns_to_loader(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            converter = FocusConverter()
+            converter.load_provider_conversion_configs()
+            converter.load_data(
+                data_path="tests/provider_config_tests/aws/sample-anonymous-aws-export-dataset.csv",
+                data_format=DataFormats.CSV,
+            )
+            converter.configure_data_export(
+                export_path=temp_dir, export_include_source_columns=False
+            )
+            converter.prepare_horizontal_conversion_plan(provider="aws-cur")
+
+            try:
+                lf = next(converter.__scan_prepared_source__())
+            finally:
+                converter.data_exporter.close()
+
+        source_columns = converter.__column_validator__.source_column_names()
+        self.assertTrue(set(lf.columns) <= set(source_columns))
+        self.assertNotIn("identity/LineItemId", lf.columns)
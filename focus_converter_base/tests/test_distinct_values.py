@@ -0,0 +1,98 @@
+from unittest import TestCase, mock
+
+import polars as pl
+
+from focus_converter.distinct_values import DistinctValueLayer, low_cardinality_columns
+
+
+class TestDistinctValueLayer(TestCase):
+    def test_evaluated_on_distinct_values(self):
+        lf = pl.LazyFrame(
+            {
+                "product_code": ["AmazonEC2", "AmazonS3", None, "AWSLambda"] * 1000,
+                "other": list(range(4000)),
+            }
+        )
+        column_exprs = [
+            pl.col("product_code")
+            .replace({"AmazonEC2": "Compute", None: "Unknown"}, default="Other")
+            .alias("category"),
+            pl.col("product_code").str.to_lowercase().alias("other"),
+            (pl.col("other") + 1).alias("next"),
+        ]
+
+        layer = DistinctValueLayer.compile(
+            column_exprs=column_exprs, schema=lf.schema, column_names=lf.columns
+        )
+        self.assertEqual(layer.distinct_value_columns, ["product_code"])
+
+        with mock.patch.object(
+            pl.LazyFrame, "join", autospec=True, side_effect=pl.LazyFrame.join
+        ) as join:
+            df = layer.apply(lf=lf, low_cardinality_columns={"product_code"}).collect()
+
+        # distinct values and null are evaluated once and joined to the batch
+        distinct_values_df = join.call_args.args[1].collect()
+        self.assertEqual(len(distinct_values_df), 4)
+        self.assertTrue(df.equals(lf.with_columns(column_exprs).collect()))
+
+    def test_high_cardinality_evaluated_on_all_rows(self):
+        lf = pl.LazyFrame(
+            {"resource_id": [f"i-{index}" for index in range(2000)] + ["i-0"] * 2000}
+        )
+        self.assertEqual(
+            low_cardinality_columns(lf=lf, column_names=["resource_id"]), set()
+        )
+
+        layer = DistinctValueLayer.compile(
+            column_exprs=[pl.col("resource_id").str.to_uppercase().alias("upper")],
+            schema=lf.schema,
+            column_names=lf.columns,
+        )
+        with mock.patch.object(pl.LazyFrame, "join", autospec=True) as join:
+            df = layer.apply(lf=lf, low_cardinality_columns=set()).collect()
+        join.assert_not_called()
+        self.assertEqual(df["upper"][1], "I-1")
+
+    def test_low_cardinality_counted_on_whole_batch(self):
+        lf = pl.LazyFrame(
+            {
+                # distinct values are only found late in the batch
+                "usage_type": ["BoxUsage"] * 5000
+                + [f"usage-{index}" for index in range(5000)],
+                "region": ["us-east-1", "eu-west-1"] * 5000,
+            }
+        )
+        self.assertEqual(
+            low_cardinality_columns(lf=lf, column_names=["usage_type", "region"]),
+            {"region"},
+        )
+
+        # small batches are evaluated on all rows
+        self.assertEqual(
+            low_cardinality_columns(lf=lf.head(10), column_names=["region"]), set()
+        )
+
+    def test_only_single_string_column_expressions_grouped(self):
+        schema = {"a": pl.Utf8, "b": pl.Utf8, "c": pl.Int64}
+
+        layer = DistinctValueLayer.compile(
+            column_exprs=[
+                pl.col("a").alias("x"),
+                (pl.col("c") + 1).alias("y"),
+                (pl.col("a") + pl.col("b")).alias("z"),
+                pl.col("b").str.to_uppercase().alias("b"),
+                pl.col("a").str.to_uppercase().alias("w"),
+            ],
+            schema=schema,
+            column_names=["a", "b", "c"],
+        )
+        self.assertEqual(layer.distinct_value_columns, ["a"])
+
+        # columns written by earlier stages are not grouped
+        layer = DistinctValueLayer.compile(
+            column_exprs=[pl.col("a").str.to_uppercase().alias("w")],
+            schema=schema,
+            column_names=["b", "c"],
+        )
+        self.assertEqual(layer.distinct_value_columns, [])